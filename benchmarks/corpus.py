@@ -0,0 +1,190 @@
+"""Deterministic corpus of pyproject.toml documents for benchmarking.
+
+Every document is generated from a fixed seed, so two runs on different
+commits measure exactly the same input. Keys and tables are emitted out
+of order and with uneven spacing so the sort and format stages have
+real work to do.
+"""
+
+from __future__ import annotations
+
+__all__ = ["CASES", "build_corpus", "write_corpus"]
+
+import random
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SEED = 20240601
+
+_PACKAGES = [
+    "attrs", "black", "boto3", "click", "coverage", "django", "fastapi",
+    "flask", "httpx", "hypothesis", "jinja2", "mypy", "numpy", "orjson",
+    "pandas", "pydantic", "pytest", "pyyaml", "requests", "rich", "ruff",
+    "scipy", "sqlalchemy", "structlog", "tomlkit", "typer", "uvicorn",
+]  # fmt: skip
+
+_TOOLS = [
+    "black", "coverage", "hatch", "isort", "mypy", "poe", "pylint",
+    "pyright", "pytest", "ruff", "setuptools", "tox", "uv",
+]  # fmt: skip
+
+
+def _requirement(rng: random.Random, index: int) -> str:
+    """Return a plausible PEP 508 requirement string."""
+    name = f"{rng.choice(_PACKAGES)}-{index}" if index else rng.choice(_PACKAGES)
+    major, minor = rng.randint(0, 9), rng.randint(0, 30)
+    marker = "; python_version < '3.12'" if rng.random() < 0.1 else ""
+    return f'"{name}>={major}.{minor}{marker}"'
+
+
+def _array(items: list[str], multiline: bool) -> str:
+    """Render an array, either inline or one item per line."""
+    if not multiline:
+        return "[" + ", ".join(items) + "]"
+    return "[\n" + "".join(f"  {item},\n" for item in items) + "]"
+
+
+def _value(rng: random.Random, depth: int = 0) -> str:
+    """Return a random scalar, array or inline table."""
+    kind = rng.randrange(6 if depth == 0 else 4)
+    if kind == 0:
+        return str(rng.randint(0, 1000))
+    if kind == 1:
+        return rng.choice(["true", "false"])
+    if kind == 2:
+        return f'"{rng.choice(_PACKAGES)}"'
+    if kind == 3:
+        return f"{rng.random():.3f}"
+    if kind == 4:
+        items = [f'"{rng.choice(_PACKAGES)}"' for _ in range(rng.randint(1, 6))]
+        return _array(items, multiline=len(items) > 3)
+    keys = rng.sample(_PACKAGES, rng.randint(1, 3))
+    return "{ " + ", ".join(f"{key} = {_value(rng, 1)}" for key in keys) + " }"
+
+
+def _keys(rng: random.Random, count: int) -> str:
+    """Render ``count`` key/value lines in unsorted order."""
+    keys = [f"{rng.choice(_PACKAGES)}-{index}" for index in range(count)]
+    rng.shuffle(keys)
+    return "".join(f"{key}   =  {_value(rng)}\n" for key in keys)
+
+
+def _project(rng: random.Random, dependencies: int, extras: int) -> str:
+    """Render a ``[project]`` table with its dependency arrays."""
+    requirements = [_requirement(rng, index) for index in range(dependencies)]
+    text = (
+        '[project]\nversion = "1.0.0"\nname = "bench"\n'
+        'requires-python = ">=3.11"\n'
+        f"dependencies = {_array(requirements, multiline=dependencies > 3)}\n"
+    )
+    if extras:
+        text += "\n[project.optional-dependencies]\n"
+        for extra in range(extras, 0, -1):
+            group = [_requirement(rng, index) for index in range(8)]
+            text += f"extra{extra} = {_array(group, multiline=True)}\n"
+    return text + "\n"
+
+
+def _tools(rng: random.Random, count: int, keys: int) -> str:
+    """Render ``count`` ``[tool.*]`` tables, each with a nested subtable."""
+    names = [f"{_TOOLS[index % len(_TOOLS)]}{index // len(_TOOLS) or ''}"
+             for index in range(count)]  # fmt: skip
+    rng.shuffle(names)
+    text = ""
+    for name in names:
+        text += f"[tool.{name}]\n{_keys(rng, keys)}\n"
+        text += f"[tool.{name}.options]\n{_keys(rng, max(1, keys // 2))}\n"
+    return text
+
+
+def _deep(rng: random.Random, depth: int, breadth: int) -> str:
+    """Render ``tool.deep`` tables nested ``depth`` levels, ``breadth`` wide."""
+    text = ""
+    paths = [["tool", "deep"]]
+    for _ in range(depth):
+        paths = [[*path, f"level{child}"] for path in paths for child in range(breadth)]
+        for path in rng.sample(paths, len(paths)):
+            text += f"[{'.'.join(path)}]\n{_keys(rng, 3)}\n"
+        paths = paths[:breadth]  # grow depth, not an exponential tree
+    return text
+
+
+def _pypfmt_config() -> str:
+    """Render a ``[tool.pypfmt]`` table exercising every config section."""
+    return (
+        "[tool.pypfmt]\n"
+        'extend-sort-first = ["tool.ruff"]\n'
+        'extend-taplo-options = ["array_auto_collapse=false"]\n'
+        "[tool.pypfmt.extend-overrides]\n"
+        '"tool.pytest" = { first = ["ini_options"] }\n\n'
+    )
+
+
+def _small(rng: random.Random) -> str:
+    return _project(rng, dependencies=2, extras=0)
+
+
+def _typical(rng: random.Random) -> str:
+    return (
+        _tools(rng, count=8, keys=8)
+        + _project(rng, dependencies=15, extras=3)
+        + _pypfmt_config()
+    )
+
+
+def _huge(rng: random.Random) -> str:
+    return (
+        _tools(rng, count=60, keys=25)
+        + _project(rng, dependencies=300, extras=20)
+        + _pypfmt_config()
+    )
+
+
+def _deep_tool(rng: random.Random) -> str:
+    return _project(rng, dependencies=5, extras=0) + _deep(rng, depth=5, breadth=3)
+
+
+def _long_dependencies(rng: random.Random) -> str:
+    return _project(rng, dependencies=3000, extras=10)
+
+
+CASES = {
+    "small": _small,
+    "typical": _typical,
+    "huge": _huge,
+    "deep-tool": _deep_tool,
+    "long-dependencies": _long_dependencies,
+}
+"""Corpus case names mapped to their generators, smallest first."""
+
+
+def build_corpus(names: list[str] | None = None) -> dict[str, str]:
+    """Generate the corpus documents.
+
+    Args:
+        names: Cases to generate, or ``None`` for all of ``CASES``.
+
+    Returns:
+        Case name mapped to document text, in ``CASES`` order.
+    """
+    return {
+        name: generate(random.Random(f"{_SEED}:{name}"))
+        for name, generate in CASES.items()
+        if names is None or name in names
+    }
+
+
+def write_corpus(directory: Path) -> list[Path]:
+    """Write every case to ``directory/<case>/pyproject.toml``.
+
+    Useful for timing the CLI itself, e.g. ``pypfmt --check -j auto DIR``.
+    """
+    written = []
+    for name, text in build_corpus().items():
+        path = directory / name / "pyproject.toml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        written.append(path)
+    return written
@@ -0,0 +1,209 @@
+"""Benchmark the pypfmt pipeline stages on a generated corpus.
+
+Measures ``merge_config``, ``sort_toml``, ``format_toml`` and the full
+``format_pyproject`` separately for every corpus case (see
+``corpus.py``) and writes the timings as JSON, so runs on two commits can
+be compared. ``merge_config`` is timed with its memo cleared, i.e. as the
+first document with a given ``[tool.pypfmt]`` section::
+
+    python benchmarks/run.py --output base.json
+    git switch feature
+    python benchmarks/run.py --compare base.json
+
+``--compare`` exits non-zero when any median slows down by more than
+``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tomllib
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from corpus import CASES, build_corpus, write_corpus
+
+import pypfmt.config
+import pypfmt.pipeline
+from pypfmt import __version__
+from pypfmt.config import TAPLO_OPTIONS, extract_config, merge_config
+from pypfmt.formatter import format_toml
+from pypfmt.pipeline import format_pyproject
+from pypfmt.sorter import sort_toml
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SCHEMA_VERSION = 1  # bump when the report layout changes
+
+
+def _forget_fixed_points() -> None:
+    """Stop the pipeline short-circuiting documents it has already seen."""
+    pypfmt.pipeline._FIXED_POINTS.clear()
+
+
+def _merge_cold(user: dict[str, object]) -> object:
+    """Merge ``user`` without the memo, i.e. the first file of a run."""
+    pypfmt.config._MERGED.clear()
+    return merge_config(user)
+
+
+def _stage_calls(text: str) -> dict[str, Callable[[], object]]:
+    """Build one zero-argument call per benchmark for document ``text``."""
+    user = extract_config(tomllib.loads(text)) or {}
+    sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts = merge_config(user)
+    sorted_text = sort_toml(text, sort_cfg, overrides, comment_cfg, format_cfg)
+
+    def full_pipeline() -> object:
+        _forget_fixed_points()
+        return format_pyproject(text)
+
+    return {
+        "merge_config": lambda: _merge_cold(user),
+        "sort_toml": lambda: sort_toml(
+            text, sort_cfg, overrides, comment_cfg, format_cfg
+        ),
+        "format_toml": lambda: format_toml(sorted_text, taplo_opts or TAPLO_OPTIONS),
+        "format_pyproject": full_pipeline,
+    }
+
+
+def _measure(call: Callable[[], object], rounds: int, warmup: int) -> dict[str, Any]:
+    """Time ``call`` ``rounds`` times after ``warmup`` untimed calls."""
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return {
+        "rounds": rounds,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if rounds > 1 else 0.0,
+    }
+
+
+def _environment() -> dict[str, Any]:
+    """Describe the machine and the code being measured."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {"pypfmt": __version__}
+    for dist in ("toml-sort", "taplo"):
+        try:
+            versions[dist] = version(dist)
+        except PackageNotFoundError:
+            versions[dist] = None
+    return {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": versions,
+    }
+
+
+def run(cases: list[str] | None, rounds: int, warmup: int) -> dict[str, Any]:
+    """Run every benchmark on every selected case.
+
+    Returns:
+        The JSON-serialisable report.
+    """
+    results = []
+    for case, text in build_corpus(cases).items():
+        for benchmark, call in _stage_calls(text).items():
+            stats = _measure(call, rounds, warmup)
+            results.append(
+                {"case": case, "benchmark": benchmark, "bytes": len(text), **stats}
+            )
+            print(
+                f"{case:<18} {benchmark:<17} {stats['median'] * 1000:9.3f} ms",
+                file=sys.stderr,
+            )
+    return {"schema": SCHEMA_VERSION, **_environment(), "results": results}
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> bool:
+    """Print median ratios against ``baseline``.
+
+    Returns:
+        ``True`` if no benchmark regressed by more than ``threshold``.
+    """
+    before = {(r["case"], r["benchmark"]): r["median"] for r in baseline["results"]}
+    ok = True
+    for result in current["results"]:
+        key = (result["case"], result["benchmark"])
+        if key not in before:
+            continue
+        ratio = result["median"] / before[key]
+        regressed = ratio > 1 + threshold
+        ok = ok and not regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key[0]:<18} {key[1]:<17} {ratio:6.2f}x{flag}")
+    return ok
+
+
+def main() -> int:
+    """Parse arguments, run the benchmarks and report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=list(CASES),
+        help="corpus case to run (repeatable; default: all)",
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="timed calls per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls first")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON report")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed median slowdown for --compare (default: 0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--write-corpus",
+        type=Path,
+        metavar="DIR",
+        help="write the corpus as DIR/<case>/pyproject.toml and exit",
+    )
+    args = parser.parse_args()
+
+    if args.write_corpus is not None:
+        for path in write_corpus(args.write_corpus):
+            print(path)
+        return 0
+
+    report = run(args.case, args.rounds, args.warmup)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    elif args.compare is None:
+        print(json.dumps(report, indent=2))
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        return 0 if compare(baseline, report, args.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,15 @@
 """A Python package to sort and format pyproject.toml (pypfmt)."""
 
-from pypfmt.version import __version__
+from __future__ import annotations
 
 __all__ = ["__version__"]
+
+
+def __getattr__(name: str) -> str:
+    """Resolve ``__version__`` on first access rather than at import time."""
+    if name == "__version__":
+        from pypfmt.version import __version__
+
+        return __version__
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
@@ -0,0 +1,193 @@
+"""On-disk cache of documents already known to be formatted.
+
+Each entry is an empty marker file named by a SHA-256 key over the
+document content, its merged config, the pypfmt, toml-sort and tomlkit
+versions, a fingerprint of pypfmt's own modules and the path and version
+of the taplo binary that formats. The fingerprint covers editable and
+development installs, whose version does not change with the code. A hit means
+the pipeline previously returned the content unchanged, so sorting and
+formatting can be skipped. Only such proven fixed points are recorded,
+which keeps ``--check`` verdicts identical with and without the cache.
+
+Every new marker also appends one byte to a journal file, so ``prune``
+can tell from a single ``stat`` whether enough entries were added since
+the last prune to be worth scanning the shards. Runs that only hit the
+cache never scan it.
+"""
+
+from __future__ import annotations
+
+__all__ = ["DEFAULT_MAX_ENTRIES", "FormatCache", "default_cache_dir"]
+
+import contextlib
+import functools
+import hashlib
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pypfmt.config import MergedConfig
+
+DEFAULT_MAX_ENTRIES = 10_000
+"""Entries kept after pruning; the least recently used are evicted first."""
+
+_CACHE_VERSION = "1"  # bump when the key derivation changes
+
+_JOURNAL = "added"  # one byte per marker added since the last prune
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory used when none is configured.
+
+    Honours ``PYPFMT_CACHE_DIR``, then the platform cache location
+    (``LOCALAPPDATA`` on Windows, ``XDG_CACHE_HOME`` or ``~/.cache``
+    elsewhere).
+    """
+    if env_dir := os.environ.get("PYPFMT_CACHE_DIR"):
+        return Path(env_dir)
+    if sys.platform == "win32":  # pragma: no cover
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pypfmt"
+
+
+def _package_fingerprint() -> str:
+    """Return a digest of the name, size and mtime of pypfmt's modules."""
+    digest = hashlib.sha256()
+    package = Path(__file__).parent
+    for module in sorted(package.glob("*.py")):
+        try:
+            info = module.stat()
+        except OSError:
+            continue
+        digest.update(f"{module.name}:{info.st_size}:{info.st_mtime_ns}\0".encode())
+    return digest.hexdigest()[:16]
+
+
+@functools.cache
+def _tool_versions() -> str:
+    """Return the versions of every tool that shapes the output."""
+    # Deferred: resolving versions loads importlib.metadata and the
+    # formatter, which only matters once a document is actually looked up.
+    from importlib.metadata import PackageNotFoundError, version
+
+    from pypfmt import __version__
+    from pypfmt.formatter import get_formatter
+
+    versions = [f"pypfmt={__version__}+{_package_fingerprint()}"]
+    for dist in ("toml-sort", "tomlkit"):
+        try:
+            versions.append(f"{dist}={version(dist)}")
+        except PackageNotFoundError:
+            versions.append(f"{dist}=unknown")
+    # The binary on PATH formats, whatever the taplo distribution says;
+    # its path and reported version catch upgrades made outside pip.
+    formatter = get_formatter()
+    try:
+        binary = formatter.binary
+    except RuntimeError:
+        binary = "missing"
+    versions.append(f"taplo={binary}@{formatter.release or 'unknown'}")
+    return ";".join(versions)
+
+
+class FormatCache:
+    """Content-addressed set of formatted documents, bounded in size.
+
+    Instances hold only a path and a limit, so they pickle cheaply into
+    pool workers. Every filesystem error is swallowed: a broken cache
+    degrades to a cache miss, never to a failed run.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Create a cache rooted at ``directory``.
+
+        Pruning is amortised: the shards are only scanned once a tenth of
+        ``max_entries`` markers were added since the last prune.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_every = max(1, max_entries // 10)
+
+    def key(self, text: str, config: MergedConfig | None) -> str:
+        """Return the cache key for ``text`` formatted with ``config``.
+
+        Args:
+            text: Raw document content.
+            config: Merged config for the document, or ``None`` for defaults.
+                The taplo options are part of the merged config.
+        """
+        digest = hashlib.sha256()
+        for part in (_CACHE_VERSION, _tool_versions(), repr(config), text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        """Return the marker path for ``key``, sharded by its first byte."""
+        return self.directory / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``key`` is cached; a hit refreshes its eviction order."""
+        try:
+            os.utime(self._entry(key))
+        except OSError:
+            return False
+        return True
+
+    def add(self, key: str) -> None:
+        """Record ``key`` as a formatted document."""
+        entry = self._entry(key)
+        with contextlib.suppress(OSError):
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                entry.touch(exist_ok=False)
+            except FileExistsError:
+                # Another run recorded it first; only refresh its age.
+                os.utime(entry)
+                return
+            # Appends this small are atomic, so concurrent runs and pool
+            # workers can share the journal.
+            with (self.directory / _JOURNAL).open("ab") as journal:
+                journal.write(b".")
+
+    def _markers(self) -> list[tuple[float, str]]:
+        """Return ``(mtime, path)`` of every marker.
+
+        Raises:
+            OSError: If the cache directory cannot be read.
+        """
+        entries: list[tuple[float, str]] = []
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as markers:
+                    entries.extend(
+                        (marker.stat().st_mtime, marker.path) for marker in markers
+                    )
+        return entries
+
+    def prune(self) -> None:
+        """Evict the least recently used entries beyond ``max_entries``.
+
+        Does nothing until ``prune_every`` markers were added since the
+        last prune, so the common case costs one ``stat``.
+        """
+        journal = self.directory / _JOURNAL
+        try:
+            if journal.stat().st_size < self.prune_every:
+                return
+            journal.unlink()
+            entries = self._markers()
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            with contextlib.suppress(OSError):
+                Path(path).unlink()
@@ -0,0 +1,15 @@
+"""Names accepted by pypfmt's enumerated options.
+
+Kept free of imports so the CLI can validate option values without
+loading the modules that implement them.
+"""
+
+from __future__ import annotations
+
+__all__ = ["DIFF_FORMATS", "SORT_ENGINES"]
+
+SORT_ENGINES = ("toml-sort", "native", "fused")
+"""Sort engine names accepted by ``sort-engine``; the first is the default."""
+
+DIFF_FORMATS = ("unified", "json", "stat")
+"""Output formats accepted by ``--diff-format``."""
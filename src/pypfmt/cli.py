@@ -4,32 +4,41 @@ from __future__ import annotations
 
 __all__ = ["app"]
 
-import difflib
+import contextlib
 import io
-import select
+import os
+import socket
+import stat
 import sys
-import tomllib
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, cast
 
 import typer
 
-from pypfmt import __version__
-from pypfmt.config import (
-    MergedConfig,
-    check_config_conflict,
-    load_config,
-    merge_config,
-)
-from pypfmt.pipeline import format_pyproject
+from pypfmt.cache import FormatCache, default_cache_dir
+from pypfmt.choices import DIFF_FORMATS, SORT_ENGINES
+from pypfmt.client import DaemonClient, DaemonError, socket_path
+from pypfmt.discovery import discover, select
+from pypfmt.output import Messages, write_file
+from pypfmt.result import FileResult
+from pypfmt.stream import FRAMINGS, read_frames, write_frame
+from pypfmt.timing import Profile
+
+# The formatting engine pulls in toml-sort, tomlkit and the pipeline, so
+# it is imported only by the code paths that format in this process;
+# --version, --help and runs served by a daemon never load it. Likewise
+# pypfmt.diff is only imported to print a diff.
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from pypfmt.config import MergedConfig
 
 _RED = "\033[31m"
 _GREEN = "\033[32m"
 _CYAN = "\033[36m"
 _RESET = "\033[0m"
 
-_STDIN_TIMEOUT = 0.1  # seconds to wait for stdin data in non-TTY mode
-
 app = typer.Typer(
     name="pypfmt",
     help="Sort and format pyproject.toml files.",
@@ -40,12 +49,18 @@ app = typer.Typer(
 def _version_callback(value: bool) -> None:
     """Print version and exit."""
     if value:
+        from pypfmt import __version__
+
         typer.echo(f"pypfmt {__version__}")
         raise typer.Exit()
 
 
-def _print_diff(original: str, formatted: str, filename: str) -> None:
-    """Print unified diff, colored if stdout is a terminal.
+def _print_diff(
+    original: str, formatted: str, filename: str, diff_format: str = "unified"
+) -> None:
+    """Print the diff of one file in a single write.
+
+    Unified diffs are colored if stdout is a terminal.
 
     Args:
         original: The original TOML content before formatting.
@@ -53,148 +68,345 @@ def _print_diff(original: str, formatted: str, filename: str) -> None:
         filename: Label used as the diff header path. This is a display
             label, not necessarily a real filesystem path — callers may
             pass ``"stdin"`` when processing piped input.
+        diff_format: One of ``DIFF_FORMATS``.
     """
-    diff_lines = difflib.unified_diff(
-        original.splitlines(keepends=True),
-        formatted.splitlines(keepends=True),
-        fromfile=f"a/{filename}",
-        tofile=f"b/{filename}",
-    )
-    use_color = sys.stdout.isatty()
-    for line in diff_lines:
-        if use_color:
-            if line.startswith(("---", "+++", "@@")):
-                sys.stdout.write(f"{_CYAN}{line}{_RESET}")
-            elif line.startswith("-"):
-                sys.stdout.write(f"{_RED}{line}{_RESET}")
-            elif line.startswith("+"):
-                sys.stdout.write(f"{_GREEN}{line}{_RESET}")
-            else:
-                sys.stdout.write(line)
-        else:
-            sys.stdout.write(line)
-
-
-def _load_and_warn(text: str) -> MergedConfig | None:
-    """Load config from text, emit conflict warning, return merged config.
-
-    Returns a ``MergedConfig`` 5-tuple when ``[tool.pypfmt]`` is
-    present, or ``None`` so the pipeline uses its hardcoded defaults.
-
-    If the TOML is invalid, returns ``None`` -- the pipeline's own
-    validation will catch and report the parse error.
+    from pypfmt.diff import diff_stat, json_diff, unified_diff
+
+    if diff_format == "json":
+        sys.stdout.write(json_diff(original, formatted, filename))
+        return
+    if diff_format == "stat":
+        sys.stdout.write(diff_stat(original, formatted, filename))
+        return
+    diff_lines = unified_diff(original, formatted, filename)
+    if sys.stdout.isatty():
+        diff_lines = [_color(line) for line in diff_lines]
+    sys.stdout.write("".join(diff_lines))
+
+
+def _color(line: str) -> str:
+    """Wrap one unified diff line in its terminal color."""
+    if line.startswith(("---", "+++", "@@")):
+        return f"{_CYAN}{line}{_RESET}"
+    if line.startswith("-"):
+        return f"{_RED}{line}{_RESET}"
+    if line.startswith("+"):
+        return f"{_GREEN}{line}{_RESET}"
+    return line
+
+
+def _stdin_is_input() -> bool:
+    """Check whether stdin is something to read a document from.
+
+    Without file arguments, pypfmt reads stdin only when it is a pipe, a
+    regular file or a socket. Terminals and other character devices (such
+    as ``/dev/null`` in subprocess calls that never pipe) are not input.
+    The decision comes from the kind of file descriptor, so it never
+    waits for data; ``-`` reads stdin whatever it is.
+
+    Returns:
+        ``True`` if stdin should be read, ``False`` otherwise. In-memory
+        stdin wrappers without a descriptor (e.g. inside test harnesses)
+        count as input.
     """
     try:
-        warning = check_config_conflict(text)
-    except tomllib.TOMLDecodeError:
-        return None
+        mode = os.fstat(sys.stdin.fileno()).st_mode
+    except (ValueError, io.UnsupportedOperation):
+        return True
+    except OSError:
+        # Closed or invalid descriptor.
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode) or stat.S_ISSOCK(mode)
 
-    if warning is not None:
-        typer.echo(warning, err=True)
 
-    user_config = load_config(text)
-    if user_config is None:
-        return None
+def _parse_jobs(value: str) -> int:
+    """Convert the ``--jobs`` option into a worker count."""
+    from pypfmt.engine import resolve_jobs
 
-    return merge_config(user_config)
-
-
-def _format_with_config(text: str, merged: MergedConfig | None) -> str:
-    """Run ``format_pyproject`` with optional merged config."""
-    if merged is None:
-        return format_pyproject(text)
-    sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts = merged
-    return format_pyproject(
-        text,
-        sort_config=sort_cfg,
-        sort_overrides=overrides,
-        comment_config=comment_cfg,
-        format_config=format_cfg,
-        taplo_options=taplo_opts,
-    )
+    try:
+        return resolve_jobs(value)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="'--jobs'") from exc
 
 
-def _stdin_has_data() -> bool:
-    """Check whether stdin has data available without blocking.
+def _choice(choices: tuple[str, ...]) -> Callable[[str | None], str | None]:
+    """Return an option callback accepting only ``choices`` (or no value)."""
 
-    Uses ``select.select`` with a short timeout to detect whether piped
-    data is ready on stdin.  This prevents the CLI from hanging when
-    invoked without files in non-TTY environments (e.g. subprocess calls,
-    CI runners, editor integrations) where ``isatty()`` returns ``False``
-    but no data is actually piped.
+    def check(value: str | None) -> str | None:
+        if value is not None and value not in choices:
+            expected = ", ".join(repr(choice) for choice in choices)
+            msg = f"expected one of {expected}, got {value!r}"
+            raise typer.BadParameter(msg)
+        return value
 
-    Returns:
-        ``True`` if stdin has data ready to read, ``False`` otherwise.
+    return check
 
-    Note:
-        ``select.select`` requires a real file descriptor.  If stdin is a
-        wrapper without ``fileno()`` (e.g. inside test harnesses), we fall
-        back to ``True`` so the caller proceeds to ``stdin.read()``.
 
-        On Windows, ``select.select`` does not support non-socket file
-        descriptors, so this also falls back to ``True``.  Windows callers
-        that invoke pypfmt without files and without piped input will
-        still block.
+def _load_config(path: Path) -> tuple[MergedConfig, str]:
+    """Resolve ``--config`` into a merged config and its sort engine.
+
+    Raises:
+        typer.BadParameter: If the file is unreadable or invalid.
     """
-    if sys.platform == "win32":
-        return True  # pragma: no cover
+    from pypfmt.config import get_sort_engine, merge_config, read_config_file
+
     try:
-        readable, _, _ = select.select([sys.stdin], [], [], _STDIN_TIMEOUT)
-    except (ValueError, OSError, io.UnsupportedOperation):
-        # stdin doesn't support fileno() (e.g. test harness wrappers)
-        # or the fd is closed/invalid -- assume data is available
-        return True
-    return bool(readable)
+        table = read_config_file(str(path))
+        return merge_config(table), get_sort_engine(table)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="'--config'") from exc
 
 
-def _process_file(filepath: str, *, check: bool, diff: bool) -> int:
-    """Process a single file through the formatting pipeline.
+def _git_changed(since: str | None, *, staged: bool) -> list[str]:
+    """Return the files git reports as changed, or exit on git errors."""
+    from pypfmt.git import GitError, changed_files
+
+    try:
+        return changed_files(since, staged=staged)
+    except GitError as exc:
+        typer.echo(f"error: git: {exc}", err=True)
+        raise typer.Exit(code=2) from exc
+
+
+def _process_index(
+    paths: list[str],
+    *,
+    exclude: list[str],
+    changed: list[str] | None,
+    check: bool,
+    diff: bool,
+    diff_format: str,
+    write: bool,
+    jobs: int,
+    cache: FormatCache | None,
+    profiler: Profile | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> int:
+    """Format the staged versions of the selected files.
+
+    Blobs are streamed from the object store through one git process and
+    reported under their paths. Check and diff mode report like
+    ``_process_file``; with ``write`` fixed blobs are staged in place of
+    the old ones, leaving the work tree alone.
+
+    Args:
+        paths: Files and directories to select index entries from.
+        exclude: Extra gitignore-style patterns, as for directory walks.
+        changed: If not ``None``, only entries among these paths.
+        check: When ``True``, exit non-zero if any blob needs formatting.
+        diff: When ``True``, print a diff of any changes.
+        diff_format: One of ``DIFF_FORMATS``.
+        write: When ``True``, stage the formatted blobs.
+        jobs: Number of worker processes.
+        cache: Cache of known-formatted documents, or ``None``.
+        profiler: Profile collecting the stage timings, or ``None``.
+        sort_engine: Sort engine overriding ``[tool.pypfmt] sort-engine``.
+        config: Merged ``--config`` replacing every file's config, or ``None``.
 
     Returns:
-        0 on success (or no changes needed), 1 on error or check failure.
+        0 on success (or no changes needed), 1 on errors or check failure,
+        2 if git fails.
     """
-    try:
-        text = Path(filepath).read_text(encoding="utf-8")
-    except FileNotFoundError:
-        typer.echo(f"error: {filepath}: file not found", err=True)
-        return 1
-    except PermissionError:
-        typer.echo(f"error: {filepath}: permission denied", err=True)
-        return 1
+    from pypfmt.engine import format_frames
+    from pypfmt.git import (
+        GitError,
+        IndexEntry,
+        index_entries,
+        read_blobs,
+        update_index,
+        write_blobs,
+    )
 
     try:
-        merged = _load_and_warn(text)
-    except ValueError as exc:
-        typer.echo(f"error: {filepath}: {exc}", err=True)
-        return 1
+        entries = index_entries(paths)
+        selected = set(select([entry.path for entry in entries], paths, exclude))
+        if changed is not None:
+            selected.intersection_update(changed)
+        entries = [entry for entry in entries if entry.path in selected]
+        frames = zip(
+            [entry.path for entry in entries],
+            read_blobs(entry.oid for entry in entries),
+            strict=True,
+        )
+        results = format_frames(
+            frames, jobs=jobs, cache=cache, sort_engine=sort_engine, config=config
+        )
+        exit_code = 0
+        fixed: list[tuple[IndexEntry, bytes]] = []
+        messages = Messages()
+        for entry, result in zip(entries, results, strict=True):
+            if profiler is not None:
+                profiler.add(result.timings)
+            if not write:
+                code = _process_file(
+                    result, check=check, diff=diff, diff_format=diff_format
+                )
+                exit_code = max(exit_code, code)
+            elif _report_errors(result):
+                exit_code = 1
+            elif result.changed:
+                fixed.append((entry, cast("str", result.formatted).encode("utf-8")))
+                messages.add(f"{entry.path}: reformatted in index")
+        oids = write_blobs(data for _, data in fixed)
+        update_index(
+            IndexEntry(entry.path, entry.mode, oid)
+            for (entry, _), oid in zip(fixed, oids, strict=True)
+        )
+        messages.flush()
+    except GitError as exc:
+        typer.echo(f"error: git: {exc}", err=True)
+        return 2
+    return exit_code
+
+
+def _report_errors(result: FileResult) -> bool:
+    """Emit the warning and error lines for ``result``.
 
-    try:
-        result = _format_with_config(text, merged)
-    except tomllib.TOMLDecodeError as exc:
-        typer.echo(f"error: {filepath}: {exc}", err=True)
-        return 1
+    Returns:
+        ``True`` if the result is an error and has been reported.
+    """
+    if result.warning is not None:
+        typer.echo(result.warning, err=True)
+    if result.error is not None:
+        typer.echo(f"error: {result.path}: {result.error}", err=True)
+        return True
+    return False
+
+
+def _connect_daemon(
+    *,
+    jobs: str,
+    no_cache: bool,
+    cache_dir: Path | None,
+    profile: bool,
+    sort_engine: str | None = None,
+) -> DaemonClient | None:
+    """Connect to a running ``--serve`` daemon if this run can use it.
+
+    The daemon formats serially with its own cache and engine settings
+    and does not report stage timings, so runs asking for parallel jobs,
+    explicit cache options, a sort engine or a profile stay in-process.
+    """
+    if (
+        jobs != "1"
+        or no_cache
+        or cache_dir is not None
+        or profile
+        or sort_engine is not None
+    ):
+        return None
+    from pypfmt import __version__
+
+    return DaemonClient.connect(version=__version__)
+
+
+def _remote_result(client: DaemonClient, path: str, text: str | None) -> FileResult:
+    """Format ``path`` (or ``text``, labelled ``path``) on the daemon.
+
+    Files are read here and sent as text, so whether a file changed is
+    decided against what this process read, never against content the
+    daemon claims to have read.
+
+    Raises:
+        DaemonError: If the daemon could not answer.
+    """
+    if text is None:
+        try:
+            text = Path(path).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return FileResult(path, error="file not found")
+        except PermissionError:
+            return FileResult(path, error="permission denied")
+    # The daemon shares neither our working directory, which locates the
+    # config inherited by the document, nor our environment.
+    request = {
+        "op": "format",
+        "path": str(Path(path).absolute()),
+        "text": text,
+        "hide_conflict_warning": bool(os.environ.get("PPF_HIDE_CONFLICT_WARNING")),
+    }
+    response = client.request(request)
+    return FileResult(
+        path,
+        original=text,
+        formatted=response["formatted"],
+        error=response["error"],
+        warning=response["warning"],
+    )
+
+
+def _format_via_daemon(
+    client: DaemonClient, paths: Iterable[str], cache: FormatCache | None
+) -> Iterator[FileResult]:
+    """Format ``paths`` on the daemon, in-process for any it cannot answer."""
+    from pypfmt.engine import format_file
+
+    for path in paths:
+        try:
+            yield _remote_result(client, path, None)
+        except DaemonError:
+            yield format_file(path, cache)
+
+
+def _process_file(
+    result: FileResult,
+    *,
+    check: bool,
+    diff: bool,
+    diff_format: str = "unified",
+    messages: Messages | None = None,
+) -> int:
+    """Report or apply the formatting result for a single file.
 
-    if text == result:
+    In fix mode the file is replaced atomically, and only if its bytes
+    change; the "reformatted" line goes to ``messages`` when given, for
+    the caller to flush, and straight to stderr otherwise.
+
+    Returns:
+        0 on success (or no changes needed), 1 on error or check failure.
+    """
+    if _report_errors(result):
+        return 1
+    if not result.changed:
         return 0
+    # Not an error, so both texts are present.
+    text, formatted = cast("str", result.original), cast("str", result.formatted)
+    filepath = result.path
 
     # File needs changes
     if check and diff:
-        _print_diff(text, result, filepath)
+        _print_diff(text, formatted, filepath, diff_format)
         return 1
     if check:
         typer.echo(f"error: {filepath}: not properly formatted", err=True)
         return 1
     if diff:
-        _print_diff(text, result, filepath)
+        _print_diff(text, formatted, filepath, diff_format)
         return 0
 
     # Fix mode: write back
-    Path(filepath).write_text(result, encoding="utf-8")
-    typer.echo(f"{filepath}: reformatted", err=True)
+    try:
+        written = write_file(filepath, formatted)
+    except OSError as exc:
+        typer.echo(f"error: {filepath}: {exc.strerror or exc}", err=True)
+        return 1
+    if written:
+        (messages or Messages(buffered=False)).add(f"{filepath}: reformatted")
     return 0
 
 
-def _process_stdin(*, check: bool, diff: bool) -> int:
+def _process_stdin(
+    label: str = "stdin",
+    *,
+    check: bool,
+    diff: bool,
+    diff_format: str = "unified",
+    client: DaemonClient | None = None,
+    profiler: Profile | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> int:
     """Process piped stdin input through the formatting pipeline.
 
     Reads TOML content from stdin, formats it, and dispatches based on
@@ -202,9 +414,16 @@ def _process_stdin(*, check: bool, diff: bool) -> int:
     ``_process_file`` for file-based processing.
 
     Args:
+        label: Name for stdin in messages and diff headers.
         check: When ``True``, exit non-zero if stdin content is not
             already formatted; do not emit formatted output.
-        diff: When ``True``, print a unified diff of any changes.
+        diff: When ``True``, print a diff of any changes.
+        diff_format: One of ``DIFF_FORMATS``.
+        client: Running daemon to format on, or ``None`` for in-process.
+        profiler: Profile collecting the stage timings, or ``None``.
+        sort_engine: Sort engine overriding ``[tool.pypfmt] sort-engine``.
+        config: Merged ``--config`` replacing the document's config, or
+            ``None``.
 
     Returns:
         0 when stdin is already formatted or when fix/diff mode succeeds,
@@ -213,37 +432,118 @@ def _process_stdin(*, check: bool, diff: bool) -> int:
     # Decode piped input as UTF-8 rather than the locale code page
     # (e.g. cp1252 on Windows), which would corrupt non-ASCII content.
     text = sys.stdin.buffer.read().decode("utf-8")
-    try:
-        merged = _load_and_warn(text)
-    except ValueError as exc:
-        typer.echo(f"error: stdin: {exc}", err=True)
-        return 1
-    try:
-        result = _format_with_config(text, merged)
-    except tomllib.TOMLDecodeError as exc:
-        typer.echo(f"error: stdin: {exc}", err=True)
+    result = None
+    if client is not None:
+        with contextlib.suppress(DaemonError):
+            result = _remote_result(client, label, text)
+    if result is None:
+        from pypfmt.engine import format_text
+
+        result = format_text(text, label, sort_engine, config)
+    if profiler is not None:
+        profiler.add(result.timings)
+    if _report_errors(result):
         return 1
+    formatted = cast("str", result.formatted)
 
     if check and diff:
-        if text != result:
-            _print_diff(text, result, "stdin")
-        return 0 if text == result else 1
+        if result.changed:
+            _print_diff(text, formatted, label, diff_format)
+        return 1 if result.changed else 0
     if check:
-        return 0 if text == result else 1
+        return 1 if result.changed else 0
     if diff:
-        if text != result:
-            _print_diff(text, result, "stdin")
+        if result.changed:
+            _print_diff(text, formatted, label, diff_format)
         return 0
     # Fix mode: write formatted output to stdout
-    typer.echo(result, nl=False)
+    typer.echo(formatted, nl=False)
     return 0
 
 
+def _process_frame(
+    result: FileResult,
+    *,
+    check: bool,
+    diff: bool,
+    framing: str,
+    diff_format: str = "unified",
+) -> int:
+    """Report one document of a ``--stream`` run.
+
+    In fix mode every input frame gets exactly one output frame: the
+    formatted document, or the input unchanged if it could not be
+    formatted. Check and diff mode report like ``_process_file``.
+
+    Returns:
+        0 on success (or no changes needed), 1 on error or check failure.
+    """
+    if check or diff:
+        return _process_file(result, check=check, diff=diff, diff_format=diff_format)
+    failed = _report_errors(result)
+    text = cast("str", result.original if failed else result.formatted)
+    write_frame(sys.stdout.buffer, text.encode("utf-8", "surrogateescape"), framing)
+    return 1 if failed else 0
+
+
+def _process_stream(
+    framing: str,
+    label: str = "stdin",
+    *,
+    check: bool,
+    diff: bool,
+    diff_format: str = "unified",
+    jobs: int,
+    cache: FormatCache | None,
+    profiler: Profile | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> int:
+    """Format every framed document on stdin, emitting results in order.
+
+    Documents are labelled ``<label>:1``, ``<label>:2``, ... in messages.
+
+    Returns:
+        0 if every document succeeded (or needed no changes), 1 if any
+        failed, failed the check, or the framing itself was broken.
+    """
+    from pypfmt.engine import format_frames
+
+    frames = (
+        (f"{label}:{index}", data)
+        for index, data in enumerate(read_frames(sys.stdin.buffer, framing), 1)
+    )
+    exit_code = 0
+    try:
+        for result in format_frames(
+            frames, jobs=jobs, cache=cache, sort_engine=sort_engine, config=config
+        ):
+            if profiler is not None:
+                profiler.add(result.timings)
+            code = _process_frame(
+                result,
+                check=check,
+                diff=diff,
+                framing=framing,
+                diff_format=diff_format,
+            )
+            exit_code = max(exit_code, code)
+    except ValueError as exc:
+        typer.echo(f"error: {label}: {exc}", err=True)
+        return 1
+    return exit_code
+
+
 @app.command()
 def main(
     files: Annotated[
         list[str] | None,
-        typer.Argument(help="pyproject.toml files to format"),
+        typer.Argument(
+            help=(
+                "pyproject.toml files, or directories to search for them; "
+                "'-' reads stdin"
+            )
+        ),
     ] = None,
     check: Annotated[
         bool,
@@ -255,6 +555,161 @@ def main(
         bool,
         typer.Option("--diff", help="Show unified diff of changes"),
     ] = False,
+    diff_format: Annotated[
+        str | None,
+        typer.Option(
+            "--diff-format",
+            help=(
+                "Diff output: 'unified', 'json' (one line of hunks per file) "
+                "or 'stat' (changed line counts); implies --diff"
+            ),
+            callback=_choice(DIFF_FORMATS),
+            metavar="|".join(DIFF_FORMATS),
+        ),
+    ] = None,
+    jobs: Annotated[
+        str,
+        typer.Option(
+            "--jobs",
+            "-j",
+            help="Number of files to format in parallel, or 'auto' for one per CPU",
+            metavar="N|auto",
+        ),
+    ] = "1",
+    exclude: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--exclude",
+            help=(
+                "gitignore-style pattern of paths to skip when searching "
+                "directories (repeatable)"
+            ),
+        ),
+    ] = None,
+    changed_since: Annotated[
+        str | None,
+        typer.Option(
+            "--changed-since",
+            help=(
+                "Only format pyproject.toml files changed since the merge "
+                "base of REF and HEAD, according to git"
+            ),
+            metavar="REF",
+        ),
+    ] = None,
+    staged: Annotated[
+        bool,
+        typer.Option(
+            "--staged",
+            help=(
+                "Only format pyproject.toml files with staged changes, according to git"
+            ),
+        ),
+    ] = False,
+    from_index: Annotated[
+        bool,
+        typer.Option(
+            "--from-index",
+            help=(
+                "Format the staged content of the files instead of the work "
+                "tree; needs --check, --diff or --write-index"
+            ),
+        ),
+    ] = False,
+    write_index: Annotated[
+        bool,
+        typer.Option(
+            "--write-index",
+            help=(
+                "Stage the formatted content in place of the staged content, "
+                "leaving the work tree alone; implies --from-index"
+            ),
+        ),
+    ] = False,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch",
+            help="Keep running and reformat files whenever they change",
+        ),
+    ] = False,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Do not read or write the format cache"),
+    ] = False,
+    cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            "--cache-dir",
+            help=(
+                "Directory for the format cache "
+                "[default: $PYPFMT_CACHE_DIR or the user cache directory]"
+            ),
+            file_okay=False,
+        ),
+    ] = None,
+    serve_daemon: Annotated[
+        bool,
+        typer.Option(
+            "--serve",
+            help=(
+                "Run a formatting daemon on a local socket "
+                "[$PYPFMT_SOCKET]; later runs use it automatically"
+            ),
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Print a per-stage timing breakdown across all files to stderr",
+        ),
+    ] = False,
+    sort_engine: Annotated[
+        str | None,
+        typer.Option(
+            "--sort-engine",
+            help=(
+                "Sort engine to use, overriding the sort-engine setting "
+                "(default: toml-sort)"
+            ),
+            callback=_choice(SORT_ENGINES),
+            metavar="|".join(SORT_ENGINES),
+        ),
+    ] = None,
+    config_file: Annotated[
+        Path | None,
+        typer.Option(
+            "--config",
+            help=(
+                "Read settings from this pypfmt.toml (or pyproject.toml's "
+                "[tool.pypfmt]) instead of each file's own and inherited config"
+            ),
+            dir_okay=False,
+            metavar="PATH",
+        ),
+    ] = None,
+    stdin_filename: Annotated[
+        str | None,
+        typer.Option(
+            "--stdin-filename",
+            help="Name to report for stdin in messages and diffs",
+            metavar="PATH",
+        ),
+    ] = None,
+    stream: Annotated[
+        str | None,
+        typer.Option(
+            "--stream",
+            help=(
+                "Format a stream of framed documents from stdin to stdout: "
+                "'nul' ends each document with a NUL byte, 'length' prefixes "
+                "it with its byte size and a newline"
+            ),
+            callback=_choice(FRAMINGS),
+            metavar="|".join(FRAMINGS),
+        ),
+    ] = None,
     version: Annotated[  # noqa: ARG001
         bool | None,
         typer.Option(
@@ -266,25 +721,213 @@ def main(
     ] = None,
 ) -> None:
     """Sort and format pyproject.toml files."""
-    if not files:
-        if sys.stdin.isatty():
+    cache = None if no_cache else FormatCache(cache_dir or default_cache_dir())
+    profiler = Profile() if profile else None
+    if serve_daemon:
+        if not hasattr(socket, "AF_UNIX"):  # pragma: no cover - Windows
+            typer.echo("error: --serve requires Unix domain sockets", err=True)
+            raise typer.Exit(code=2)
+        from pypfmt.server import serve  # Unix-only module
+
+        typer.echo(f"pypfmt: serving on {socket_path()} (Ctrl-C to stop)", err=True)
+        try:
+            serve(cache=cache)
+        except RuntimeError as exc:
+            typer.echo(f"error: {exc}", err=True)
+            raise typer.Exit(code=1) from exc
+        raise typer.Exit(code=0)
+    from_index = from_index or write_index
+    git_filter = changed_since is not None or staged
+    read_stdin = files == ["-"] or (not files and not git_filter and not from_index)
+    if not read_stdin and "-" in (files or ()):
+        typer.echo("error: '-' (stdin) cannot be combined with paths", err=True)
+        raise typer.Exit(code=2)
+    if stream is not None and (not read_stdin or watch):
+        typer.echo("error: --stream reads stdin and takes no files", err=True)
+        raise typer.Exit(code=2)
+    if (git_filter or from_index) and (read_stdin or watch or stream is not None):
+        typer.echo(
+            "error: --changed-since, --staged and --from-index select files "
+            "and cannot be used with stdin, --stream or --watch",
+            err=True,
+        )
+        raise typer.Exit(code=2)
+    if write_index and (check or diff or diff_format is not None):
+        typer.echo(
+            "error: --write-index cannot be used with --check or --diff", err=True
+        )
+        raise typer.Exit(code=2)
+    if from_index and not (check or diff or diff_format is not None or write_index):
+        typer.echo(
+            "error: --from-index needs --check, --diff or --write-index", err=True
+        )
+        raise typer.Exit(code=2)
+    if stdin_filename is not None and not read_stdin:
+        typer.echo("error: --stdin-filename only applies to stdin", err=True)
+        raise typer.Exit(code=2)
+    label = stdin_filename or "stdin"
+    config = None
+    if config_file is not None:
+        config, config_engine = _load_config(config_file)
+        sort_engine = sort_engine or config_engine
+    if diff_format is not None:
+        diff = True
+    diff_format = diff_format or "unified"
+    # Runs a daemon can serve skip --jobs parsing, which loads the engine.
+    client = (
+        None
+        if watch or stream is not None or from_index or config is not None
+        else _connect_daemon(
+            jobs=jobs,
+            no_cache=no_cache,
+            cache_dir=cache_dir,
+            profile=profile,
+            sort_engine=sort_engine,
+        )
+    )
+    worker_count = 1 if client is not None else _parse_jobs(jobs)
+    if stream is not None:
+        code = _process_stream(
+            stream,
+            label,
+            check=check,
+            diff=diff,
+            diff_format=diff_format,
+            jobs=worker_count,
+            cache=cache,
+            profiler=profiler,
+            sort_engine=sort_engine,
+            config=config,
+        )
+        if cache is not None:
+            cache.prune()
+        if profiler is not None:
+            typer.echo(profiler.report(), err=True)
+        raise typer.Exit(code=code)
+    if read_stdin:
+        if watch:
+            typer.echo("error: --watch requires files or directories", err=True)
+            raise typer.Exit(code=2)
+        if not files and sys.stdin.isatty():
             # Interactive terminal with no files -- show usage
             typer.echo("error: no input files provided", err=True)
             typer.echo("Usage: pypfmt [OPTIONS] [FILES]...", err=True)
             typer.echo("  or pipe input: cat pyproject.toml | pypfmt", err=True)
             raise typer.Exit(code=2)
-        # Non-TTY: check if stdin actually has data available
-        if not _stdin_has_data():
+        if not files and not _stdin_is_input():
             typer.echo("error: no input files provided", err=True)
+            typer.echo("  pass '-' to read stdin anyway", err=True)
             raise typer.Exit(code=2)
-        # Stdin mode (piped input available)
-        raise typer.Exit(code=_process_stdin(check=check, diff=diff))
+        code = _process_stdin(
+            label,
+            check=check,
+            diff=diff,
+            diff_format=diff_format,
+            client=client,
+            profiler=profiler,
+            sort_engine=sort_engine,
+            config=config,
+        )
+        if client is not None:
+            client.close()
+        if profiler is not None:
+            typer.echo(profiler.report(), err=True)
+        raise typer.Exit(code=code)
+
+    if from_index:
+        code = _process_index(
+            files or ["."],
+            exclude=exclude or [],
+            changed=(
+                _git_changed(changed_since, staged=staged) if git_filter else None
+            ),
+            check=check,
+            diff=diff,
+            diff_format=diff_format,
+            write=write_index,
+            jobs=worker_count,
+            cache=cache,
+            profiler=profiler,
+            sort_engine=sort_engine,
+            config=config,
+        )
+        if cache is not None:
+            cache.prune()
+        if profiler is not None:
+            typer.echo(profiler.report(), err=True)
+        raise typer.Exit(code=code)
 
     # File mode
+    if watch:
+        from pypfmt.watch import Watcher
+
+        watcher = Watcher(
+            files,
+            exclude=exclude or (),
+            cache=cache,
+            sort_engine=sort_engine,
+            config=config,
+        )
+        typer.echo("pypfmt: watching for changes (Ctrl-C to stop)", err=True)
+
+        def handle(result: FileResult) -> None:
+            if profiler is not None:
+                profiler.add(result.timings)
+            _process_file(result, check=check, diff=diff, diff_format=diff_format)
+
+        watcher.run(handle)
+        if cache is not None:
+            cache.prune()
+        if profiler is not None:
+            typer.echo(profiler.report(), err=True)
+        raise typer.Exit(code=0)
+
     exit_code = 0
-    for filepath in files:
-        code = _process_file(filepath, check=check, diff=diff)
-        exit_code = max(exit_code, code)
+    roots = files or ["."]
+    paths: Iterable[str]
+    if git_filter:
+        paths = list(
+            select(_git_changed(changed_since, staged=staged), roots, exclude or ())
+        )
+    # Plain file lists keep their length, so work splits evenly over workers.
+    elif not any(Path(path).is_dir() for path in roots):
+        paths = roots
+    else:
+        paths = discover(roots, exclude=exclude or ())
+    if client is not None:
+        results = _format_via_daemon(client, paths, cache)
+    else:
+        from pypfmt.engine import format_files
+
+        results = format_files(
+            paths,
+            jobs=worker_count,
+            cache=cache,
+            sort_engine=sort_engine,
+            config=config,
+        )
+    messages = Messages()
+    try:
+        for result in results:
+            if profiler is not None:
+                profiler.add(result.timings)
+            code = _process_file(
+                result,
+                check=check,
+                diff=diff,
+                diff_format=diff_format,
+                messages=messages,
+            )
+            exit_code = max(exit_code, code)
+    finally:
+        # Reported in one write, also when the run is interrupted.
+        messages.flush()
+    if client is not None:
+        client.close()
+    if cache is not None:
+        cache.prune()
+    if profiler is not None:
+        typer.echo(profiler.report(), err=True)
     raise typer.Exit(code=exit_code)
 
 
@@ -0,0 +1,169 @@
+"""Client for a running ``pypfmt --serve`` daemon.
+
+This module only depends on the standard library so that talking to a
+warm daemon does not pay for importing toml-sort, tomlkit or the
+formatting pipeline. See :mod:`pypfmt.server` for the protocol.
+
+The CLI writes what the daemon returns to disk, so whoever listens on
+the socket can rewrite the user's files. A socket is therefore only used
+when it and its directory belong to the current user and are closed to
+everyone else; see ``is_trusted``.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "PROTOCOL_VERSION",
+    "DaemonClient",
+    "DaemonError",
+    "is_private",
+    "is_trusted",
+    "socket_path",
+]
+
+import contextlib
+import json
+import os
+import socket
+import stat
+import tempfile
+from pathlib import Path
+from typing import Any
+
+PROTOCOL_VERSION = 1
+"""Bumped whenever requests or responses change incompatibly."""
+
+_CONNECT_TIMEOUT = 0.5  # seconds; a live daemon accepts immediately
+
+
+class DaemonError(RuntimeError):
+    """The daemon rejected a request or the connection broke."""
+
+
+def socket_path() -> Path:
+    """Return the socket the daemon listens on.
+
+    Honours ``PYPFMT_SOCKET``, then ``$XDG_RUNTIME_DIR/pypfmt.sock``, then
+    a socket in a per-user directory below the temporary directory. The
+    socket's directory must be private to the user; see ``is_trusted``.
+    """
+    if env_path := os.environ.get("PYPFMT_SOCKET"):
+        return Path(env_path)
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(runtime_dir) / "pypfmt.sock"
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return Path(tempfile.gettempdir()) / f"pypfmt-{uid}" / "pypfmt.sock"
+
+
+def is_private(info: os.stat_result) -> bool:
+    """Whether ``info`` belongs to the current user and nobody else can use it."""
+    return info.st_uid == os.getuid() and not stat.S_IMODE(info.st_mode) & 0o077
+
+
+def is_trusted(path: Path) -> bool:
+    """Whether ``path`` is a socket that only the current user can have made.
+
+    Both the socket and its directory must be owned by the current user
+    and grant no group or other permissions. Symlinks are not followed.
+    """
+    try:
+        directory = path.parent.lstat()
+        sock = path.lstat()
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(directory.st_mode)
+        and stat.S_ISSOCK(sock.st_mode)
+        and is_private(directory)
+        and is_private(sock)
+    )
+
+
+class DaemonClient:
+    """One connection to the daemon, carrying any number of requests."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        """Wrap an already connected socket."""
+        self._sock = sock
+        self._stream = sock.makefile("rwb")
+
+    @classmethod
+    def connect(
+        cls, path: Path | None = None, version: str | None = None
+    ) -> DaemonClient | None:
+        """Connect to a compatible daemon, if one is running.
+
+        Args:
+            path: Socket path, or ``None`` for :func:`socket_path`.
+            version: pypfmt version the daemon must report, so a daemon
+                started before an upgrade is not used. ``None`` skips
+                the check.
+
+        Returns:
+            A connected client, or ``None`` when no daemon answers, the
+            socket is not ``is_trusted`` or the daemon speaks a different
+            protocol or version.
+        """
+        if not hasattr(socket, "AF_UNIX"):  # pragma: no cover - Windows
+            return None
+        path = path or socket_path()
+        if not is_trusted(path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(_CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            sock.settimeout(None)
+            client = cls(sock)
+            hello = client.request({"op": "hello", "protocol": PROTOCOL_VERSION})
+        except (OSError, DaemonError):
+            sock.close()
+            return None
+        if hello.get("protocol") != PROTOCOL_VERSION or (
+            version is not None and hello.get("version") != version
+        ):
+            client.close()
+            return None
+        return client
+
+    def request(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Send one request and wait for its response.
+
+        Raises:
+            DaemonError: If the connection broke, the daemon sent something
+                other than a JSON object or it reported a protocol error.
+        """
+        try:
+            self._stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+            self._stream.flush()
+            line = self._stream.readline()
+        except OSError as exc:
+            raise DaemonError(str(exc)) from exc
+        if not line:
+            msg = "daemon closed the connection"
+            raise DaemonError(msg)
+        try:
+            response = json.loads(line)
+        except ValueError as exc:
+            msg = f"invalid response from daemon: {exc}"
+            raise DaemonError(msg) from exc
+        if not isinstance(response, dict):
+            msg = "invalid response from daemon: not an object"
+            raise DaemonError(msg)
+        if not response.get("ok"):
+            raise DaemonError(response.get("message", "request failed"))
+        return response
+
+    def close(self) -> None:
+        """Close the connection."""
+        with contextlib.suppress(OSError):
+            self._stream.close()
+            self._sock.close()
+
+    def __enter__(self) -> DaemonClient:
+        """Return the client itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the connection."""
+        self.close()
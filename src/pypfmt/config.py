@@ -2,25 +2,56 @@
 
 Hardcoded defaults plus optional user overrides from [tool.pypfmt].
 Override pattern modeled on ruff: extend-* adds to defaults, plain key replaces.
+
+Overrides can also be inherited from the directories above a file: each
+``pypfmt.toml`` (whose top level reads like ``[tool.pypfmt]``) and each
+``pyproject.toml`` with a ``[tool.pypfmt]`` table up to the repository
+root is a layer, applied outermost first, so extend-* keys extend the
+layers above them. ``inherited_config`` resolves each directory's chain
+of config files once, and parses each config file once per version: a
+parsed file is reused until its mtime or size changes, so long-running
+callers see edits without re-reading unchanged files.
+
+The default config objects are built once. ``merge_config`` starts from
+them and is memoized on the normalized ``[tool.pypfmt]`` table, so
+documents with the same section share one merged config, typed with a
+read-only mapping for the override table (it stays a plain dict so it
+can be pickled to worker processes); callers must not mutate it. The
+``get_*`` functions return fresh copies of the defaults instead, which
+callers may change freely.
 """
 
 from __future__ import annotations
 
 __all__ = [
+    "CONFIG_FILENAME",
     "TAPLO_OPTIONS",
     "MergedConfig",
     "check_config_conflict",
+    "clear_config_cache",
+    "config_files",
+    "detect_config_conflict",
+    "extract_config",
     "get_comment_config",
     "get_format_config",
     "get_sort_config",
+    "get_sort_engine",
     "get_sort_overrides",
+    "inherited_config",
     "load_config",
     "merge_config",
+    "read_config_file",
 ]
 
+import collections
+import copy
 import dataclasses
+import functools
 import os
+import stat
 import tomllib
+from collections.abc import Mapping
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
 
 from toml_sort.tomlsort import (
@@ -30,8 +61,10 @@ from toml_sort.tomlsort import (
     SortOverrideConfiguration,
 )
 
+from pypfmt.choices import SORT_ENGINES
+
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Mapping
+    from collections.abc import Hashable, Iterable, Sequence
 
 # Maps [tool.pypfmt] TOML keys to the config field they control.
 # Serves as documentation and reference for error messages.
@@ -75,20 +108,24 @@ def get_sort_config() -> SortConfiguration:
     Sub-table ordering (e.g., tool.ruff vs tool.pytest) is controlled
     by the first list on the PARENT table's override (e.g., "tool" override).
     This mirrors how toml-sort CLI's parse_sort_first decomposes dotted keys.
-    """
-    return SortConfiguration(
-        tables=True,
-        table_keys=True,
-        inline_tables=False,
-        inline_arrays=False,
-        ignore_case=False,
-        first=[
-            "project",
-            "build-system",
-            "dependency-groups",
-        ],
-    )
 
+    Each call returns a new copy.
+    """
+    return copy.deepcopy(_SORT_CONFIG)
+
+
+_SORT_CONFIG = SortConfiguration(
+    tables=True,
+    table_keys=True,
+    inline_tables=False,
+    inline_arrays=False,
+    ignore_case=False,
+    first=[
+        "project",
+        "build-system",
+        "dependency-groups",
+    ],
+)
 
 _SORT_OVERRIDES: dict[str, SortOverrideConfiguration] = {
     # -- Root-level table overrides --
@@ -211,21 +248,30 @@ def get_sort_overrides() -> dict[str, SortOverrideConfiguration]:
     - first list on "tool" override controls tool sub-table ordering
     - first lists on sub-tool overrides control sub-sub-table ordering
     - tool.tomlsort overrides explicitly preserve its own config section
+
+    Each call returns a new copy.
     """
-    return {
-        k: dataclasses.replace(v, first=list(v.first))
-        for k, v in _SORT_OVERRIDES.items()
-    }
+    return copy.deepcopy(_SORT_OVERRIDES)
+
+
+_COMMENT_CONFIG = CommentConfiguration(
+    header=True,
+    footer=True,
+    inline=True,
+    block=True,
+)
 
 
 def get_comment_config() -> CommentConfiguration:
-    """Return comment preservation configuration."""
-    return CommentConfiguration(
-        header=True,
-        footer=True,
-        inline=True,
-        block=True,
-    )
+    """Return comment preservation configuration (a new copy per call)."""
+    return copy.deepcopy(_COMMENT_CONFIG)
+
+
+_FORMAT_CONFIG = FormattingConfiguration(
+    spaces_before_inline_comment=2,
+    spaces_indent_inline_array=4,
+    trailing_comma_inline_array=True,
+)
 
 
 def get_format_config() -> FormattingConfiguration:
@@ -233,12 +279,10 @@ def get_format_config() -> FormattingConfiguration:
 
     spaces_indent_inline_array=4 matches taplo indent_string (4 spaces).
     trailing_comma_inline_array=True matches taplo array_trailing_comma=true.
+
+    Each call returns a new copy.
     """
-    return FormattingConfiguration(
-        spaces_before_inline_comment=2,
-        spaces_indent_inline_array=4,
-        trailing_comma_inline_array=True,
-    )
+    return copy.deepcopy(_FORMAT_CONFIG)
 
 
 TAPLO_OPTIONS: tuple[str, ...] = (
@@ -261,23 +305,154 @@ _CONFLICT_WARNING = (
 )
 
 
+def extract_config(data: Mapping[str, Any]) -> dict[str, object] | None:
+    """Extract ``[tool.pypfmt]`` from an already-parsed TOML document.
+
+    Returns the raw dict when the section exists, ``None`` when it doesn't.
+    """
+    return data.get("tool", {}).get("pypfmt", None)
+
+
 def load_config(text: str) -> dict[str, object] | None:
     """Extract ``[tool.pypfmt]`` from TOML text.
 
     Pure extraction -- no merging logic. Returns the raw dict when the
     section exists, ``None`` when it doesn't.
     """
-    data = tomllib.loads(text)
-    return data.get("tool", {}).get("pypfmt", None)
+    return extract_config(tomllib.loads(text))
 
 
-def check_config_conflict(text: str) -> str | None:
-    """Return a warning string if both tomlsort and pypfmt config exist.
+CONFIG_FILENAME = "pypfmt.toml"
+"""Standalone config file whose top-level keys are those of ``[tool.pypfmt]``."""
 
-    Returns ``None`` when there is no conflict or when the warning is
-    suppressed via the ``PPF_HIDE_CONFLICT_WARNING`` environment variable.
+# Config files with this name hold their settings in [tool.pypfmt].
+_PYPROJECT = "pyproject.toml"
+
+
+def read_config_file(path: str) -> dict[str, object]:
+    """Read pypfmt settings from a ``pypfmt.toml`` or a ``pyproject.toml``.
+
+    A ``pyproject.toml`` contributes its ``[tool.pypfmt]`` table (or no
+    settings); any other file is read as a whole.
+
+    Raises:
+        ValueError: If the file cannot be read or is not valid TOML.
+    """
+    file = Path(path)
+    try:
+        with file.open("rb") as handle:
+            data = tomllib.load(handle)
+    except OSError as exc:
+        msg = f"{path}: {exc.strerror or exc}"
+        raise ValueError(msg) from exc
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as exc:
+        msg = f"{path}: {exc}"
+        raise ValueError(msg) from exc
+    if file.name == _PYPROJECT:
+        return extract_config(data) or {}
+    return data
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_layer(
+    path: Path,
+    signature: tuple[int, int],  # noqa: ARG001
+) -> dict[str, object] | None:
+    """Read the config layer of ``path``.
+
+    ``signature`` is the file's ``(st_mtime_ns, st_size)``; it is only part
+    of the cache key, so an edited file is read again.
+    """
+    return read_config_file(str(path)) or None
+
+
+def _file_layer(path: Path) -> dict[str, object] | None:
+    """Read the config layer of one file, or ``None`` if it has none.
+
+    The parsed layer is reused until the file's mtime or size changes.
+
+    Raises:
+        ValueError: If the file exists but is not valid TOML.
+    """
+    try:
+        info = path.stat()
+    except OSError:
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    return _read_layer(path, (info.st_mtime_ns, info.st_size))
+
+
+def _own_files(directory: Path, skip_pyproject: bool) -> tuple[Path, ...]:
+    """Return the files in ``directory`` that may hold config layers."""
+    if skip_pyproject:
+        return (directory / CONFIG_FILENAME,)
+    return directory / CONFIG_FILENAME, directory / _PYPROJECT
+
+
+@functools.cache
+def _ancestor_files(directory: Path) -> tuple[Path, ...]:
+    """Return the config files of the directories strictly above ``directory``.
+
+    The walk stops at the repository root (a directory holding ``.git``)
+    or, outside a repository, at the filesystem root.
+    """
+    parent = directory.parent
+    if parent == directory or (directory / ".git").exists():
+        return ()
+    return _ancestor_files(parent) + _own_files(parent, skip_pyproject=False)
+
+
+def config_files(path: str) -> tuple[Path, ...]:
+    """Return the files a file may inherit config layers from.
+
+    Files come outermost first and include those that do not exist (yet),
+    so watchers can notice config files being created. The file's own
+    directory counts, apart from the file itself: a ``pyproject.toml`` is
+    layered over its directory's ``pypfmt.toml``. The chain is cached per
+    directory for the life of the process; ``clear_config_cache`` forgets
+    it, e.g. after a ``.git`` directory appeared.
+
+    Args:
+        path: File being formatted; a relative path or display label
+            such as ``"stdin"`` is taken relative to the working directory.
+    """
+    file = Path(path).resolve()
+    directory = file.parent
+    return _ancestor_files(directory) + _own_files(
+        directory, skip_pyproject=file.name == _PYPROJECT
+    )
+
+
+def inherited_config(path: str) -> tuple[Mapping[str, object], ...]:
+    """Return the config layers a file inherits from its directories.
+
+    Layers come outermost first, for ``merge_config``; see
+    ``config_files`` for which files count. Config files are re-read
+    when their mtime or size changes.
+
+    Args:
+        path: File being formatted; a relative path or display label
+            such as ``"stdin"`` is taken relative to the working directory.
+
+    Raises:
+        ValueError: If a config file on the way is not valid TOML.
+    """
+    layers = (_file_layer(file) for file in config_files(path))
+    return tuple(layer for layer in layers if layer is not None)
+
+
+def clear_config_cache() -> None:
+    """Forget the config files read and located by ``inherited_config``."""
+    _read_layer.cache_clear()
+    _ancestor_files.cache_clear()
+
+
+def detect_config_conflict(data: Mapping[str, Any]) -> str | None:
+    """Return a warning string if a parsed document has both configs.
+
+    Same rules as ``check_config_conflict``, without re-parsing the text.
     """
-    data = tomllib.loads(text)
     tool = data.get("tool", {})
     if (
         "tomlsort" in tool
@@ -288,6 +463,15 @@ def check_config_conflict(text: str) -> str | None:
     return None
 
 
+def check_config_conflict(text: str) -> str | None:
+    """Return a warning string if both tomlsort and pypfmt config exist.
+
+    Returns ``None`` when there is no conflict or when the warning is
+    suppressed via the ``PPF_HIDE_CONFLICT_WARNING`` environment variable.
+    """
+    return detect_config_conflict(tomllib.loads(text))
+
+
 def _merge_sort_config(
     default: SortConfiguration, user: Mapping[str, object]
 ) -> SortConfiguration:
@@ -296,9 +480,10 @@ def _merge_sort_config(
     if "sort-first" in user:
         replacements["first"] = list(cast("Iterable[str]", user["sort-first"]))
     elif "extend-sort-first" in user:
-        replacements["first"] = list(default.first) + list(
-            cast("Iterable[str]", user["extend-sort-first"])
-        )
+        replacements["first"] = [
+            *default.first,
+            *cast("Iterable[str]", user["extend-sort-first"]),
+        ]
     if "sort-tables" in user:
         replacements["tables"] = user["sort-tables"]
     if "sort-table-keys" in user:
@@ -313,8 +498,8 @@ def _merge_sort_config(
 
 
 def _merge_sort_overrides(
-    default: dict[str, SortOverrideConfiguration], user: Mapping[str, object]
-) -> dict[str, SortOverrideConfiguration]:
+    default: Mapping[str, SortOverrideConfiguration], user: Mapping[str, object]
+) -> Mapping[str, SortOverrideConfiguration]:
     """Apply user overrides to the per-table sort overrides."""
     if "overrides" in user:
         # Replace: start fresh from user dict only
@@ -378,31 +563,107 @@ def _merge_taplo_options(
     return default
 
 
+def get_sort_engine(
+    user: Mapping[str, object] | None, inherited: Sequence[Mapping[str, object]] = ()
+) -> str:
+    """Return the sort engine selected by ``sort-engine`` in ``user``.
+
+    Without a setting in ``user``, the innermost inherited layer that
+    sets ``sort-engine`` decides.
+
+    The engine is not part of ``MergedConfig``: every engine produces the
+    same output, so it must not change cache or fixed-point keys.
+
+    Raises:
+        ValueError: If ``sort-engine`` names an unknown engine.
+    """
+    engine = None
+    for layer in (*inherited, user or {}):
+        engine = layer.get("sort-engine", engine)
+    if engine is None:
+        return SORT_ENGINES[0]
+    if engine not in SORT_ENGINES:
+        msg = (
+            f"[tool.pypfmt] sort-engine: expected one of "
+            f"{', '.join(map(repr, SORT_ENGINES))}, got {engine!r}"
+        )
+        raise ValueError(msg)
+    return cast("str", engine)
+
+
 MergedConfig = tuple[
     SortConfiguration,
-    dict[str, SortOverrideConfiguration],
+    Mapping[str, SortOverrideConfiguration],
     CommentConfiguration,
     FormattingConfiguration,
     tuple[str, ...],
 ]
 
 
-def merge_config(user: Mapping[str, object]) -> MergedConfig:
+# Merged configs by normalized [tool.pypfmt] table, least recently used first.
+_MERGED: collections.OrderedDict[Hashable, MergedConfig] = collections.OrderedDict()
+_MAX_MERGED = 256
+
+
+def _normalize(value: object) -> Hashable:
+    """Return a hashable, type-tagged equivalent of a parsed TOML value.
+
+    Tagging every value with its type keeps ``true`` and ``1`` apart.
+    Table order is preserved because override patterns match in order.
+    """
+    if isinstance(value, Mapping):
+        items = cast("Mapping[str, object]", value).items()
+        return (dict, tuple((key, _normalize(item)) for key, item in items))
+    if isinstance(value, list | tuple):
+        return (list, tuple(_normalize(item) for item in value))
+    return (type(value), value)
+
+
+def merge_config(
+    user: Mapping[str, object], inherited: Sequence[Mapping[str, object]] = ()
+) -> MergedConfig:
     """Merge user overrides with hardcoded defaults.
 
     Takes the raw dict from ``load_config()`` and returns a 5-tuple of
     merged config objects. Defaults are never mutated -- new instances
     are created via ``dataclasses.replace()``.
+
+    ``inherited`` layers, outermost first (see ``inherited_config``), are
+    applied to the defaults before ``user``, each one as if the result so
+    far were the defaults: plain keys replace, extend-* keys extend.
+
+    Results are memoized by the normalized tables, so equal tables return
+    the same, shared config objects; callers must not mutate them.
+
+    Raises:
+        ValueError: If an override table has an unknown key.
     """
-    default_sort = get_sort_config()
-    default_overrides = get_sort_overrides()
-    default_comment = get_comment_config()
-    default_format = get_format_config()
-
-    return (
-        _merge_sort_config(default_sort, user),
-        _merge_sort_overrides(default_overrides, user),
-        _merge_comment_config(default_comment, user),
-        _merge_format_config(default_format, user),
-        _merge_taplo_options(TAPLO_OPTIONS, user),
-    )
+    layers = (*inherited, user)
+    key = _normalize(layers)
+    try:
+        merged = _MERGED.get(key)
+    except TypeError:  # a value TOML cannot produce; skip the memo
+        return _merge(layers)
+    if merged is None:
+        merged = _MERGED[key] = _merge(layers)
+        while len(_MERGED) > _MAX_MERGED:
+            _MERGED.popitem(last=False)
+    else:
+        _MERGED.move_to_end(key)
+    return merged
+
+
+def _merge(layers: Sequence[Mapping[str, object]]) -> MergedConfig:
+    """Apply ``layers`` in order, starting from the shared defaults."""
+    sort_cfg = _SORT_CONFIG
+    overrides: Mapping[str, SortOverrideConfiguration] = _SORT_OVERRIDES
+    comment_cfg = _COMMENT_CONFIG
+    format_cfg = _FORMAT_CONFIG
+    taplo_opts = TAPLO_OPTIONS
+    for user in layers:
+        sort_cfg = _merge_sort_config(sort_cfg, user)
+        overrides = _merge_sort_overrides(overrides, user)
+        comment_cfg = _merge_comment_config(comment_cfg, user)
+        format_cfg = _merge_format_config(format_cfg, user)
+        taplo_opts = _merge_taplo_options(taplo_opts, user)
+    return sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts
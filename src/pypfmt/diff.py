@@ -0,0 +1,409 @@
+"""Line diffs of formatting changes for ``--diff``.
+
+``difflib.SequenceMatcher`` looks for the longest matching block over and
+over, which gets slow on generated pyproject files with thousands of
+similar dependency lines. This module interns lines to integers and
+works on sub-problems until they are trivial:
+
+1. The common prefix and suffix are stripped.
+2. Lines that do not occur on the other side at all are set aside; they
+   can never match, and a reindented or rewritten block is then diffed in
+   linear time.
+3. Lines unique to both sides become patience diff anchors, which splits
+   sorted or reordered sections into small independent pieces.
+4. Only what is left goes through Myers' O(ND) algorithm, in its
+   linear-space form.
+5. Myers' cost grows with the number of edits, so dissimilar or highly
+   repetitive inputs get a fixed work budget per diff. Whatever is left
+   once the budget is spent goes to ``difflib.SequenceMatcher``, whose
+   junk heuristic keeps such inputs fast at the price of a less minimal
+   diff.
+
+The result is rendered as a unified diff in the layout
+``difflib.unified_diff`` uses, as a JSON object of hunks for machine
+consumers, or as a one-line change count. Renderers build a file's whole
+diff in memory, so callers can write it with a single call.
+"""
+
+from __future__ import annotations
+
+__all__ = ["diff_stat", "json_diff", "opcodes", "unified_diff"]
+
+import bisect
+import contextlib
+import json
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+Opcode = tuple[str, int, int, int, int]
+"""``(tag, i1, i2, j1, j2)`` as in ``difflib.SequenceMatcher.get_opcodes``."""
+
+# Widest change bar ``diff_stat`` draws.
+_STAT_WIDTH = 40
+
+# Diagonals visited plus lines compared by Myers' algorithm in one diff,
+# well under a tenth of a second; the rest is left to difflib.
+_MAX_WORK = 200_000
+
+
+def _middle(
+    a: Sequence[int],
+    alo: int,
+    ahi: int,
+    b: Sequence[int],
+    blo: int,
+    bhi: int,
+    budget: list[int],
+) -> tuple[int, int] | None:
+    """Find where a shortest edit path of the two ranges crosses its middle.
+
+    Both ranges must be at least two long and differ in their first and
+    last elements. Searches forward from the start and backward from the
+    end at once, one edit at a time, until the two frontiers overlap.
+    The work done is taken from ``budget``, a one-element list shared by
+    the whole diff.
+
+    Returns:
+        An absolute ``(x, y)`` split point, or ``None`` if the ranges
+        share nothing or the budget ran out first.
+    """
+    n, m = ahi - alo, bhi - blo
+    max_d = (n + m + 1) // 2
+    offset, size = max_d, 2 * max_d
+    forward = [-1] * size
+    backward = [-1] * size
+    forward[offset + 1] = backward[offset + 1] = 0
+    delta = n - m
+    odd = delta % 2 != 0
+    # Diagonals that ran off the grid are not extended again.
+    fstart = fend = bstart = bend = 0
+    work = 0
+    for d in range(max_d):
+        if work > budget[0]:
+            budget[0] = 0
+            return None
+        for k in range(-d + fstart, d + 1 - fend, 2):
+            index = offset + k
+            if k == -d or (k != d and forward[index - 1] < forward[index + 1]):
+                x = forward[index + 1]
+            else:
+                x = forward[index - 1] + 1
+            y = x - k
+            start = x
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            work += x - start + 1
+            forward[index] = x
+            if x > n:
+                fend += 2
+            elif y > m:
+                fstart += 2
+            elif odd:
+                other = offset + delta - k
+                if (
+                    0 <= other < size
+                    and backward[other] != -1
+                    and x >= n - backward[other]
+                ):
+                    budget[0] -= work
+                    return alo + x, blo + y
+        for k in range(-d + bstart, d + 1 - bend, 2):
+            index = offset + k
+            if k == -d or (k != d and backward[index - 1] < backward[index + 1]):
+                x = backward[index + 1]
+            else:
+                x = backward[index - 1] + 1
+            y = x - k
+            start = x
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            work += x - start + 1
+            backward[index] = x
+            if x > n:
+                bend += 2
+            elif y > m:
+                bstart += 2
+            elif not odd:
+                other = offset + delta - k
+                if 0 <= other < size and forward[other] != -1:
+                    fx = forward[other]
+                    if fx >= n - x:
+                        budget[0] -= work
+                        return alo + fx, blo + offset + fx - other
+    budget[0] -= work
+    return None
+
+
+def _anchors(
+    a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Return patience diff anchors of the two ranges.
+
+    Anchors are the lines that occur exactly once in each range, kept in
+    the longest order both ranges agree on.
+    """
+    seen: dict[int, int] = {}
+    for index in range(alo, ahi):
+        seen[a[index]] = -1 if a[index] in seen else index
+    # Line id -> (index in a, index in b), for lines unique on both sides.
+    common: dict[int, tuple[int, int]] = {}
+    counts: dict[int, int] = {}
+    for index in range(blo, bhi):
+        line = b[index]
+        if seen.get(line, -1) != -1:
+            counts[line] = counts.get(line, 0) + 1
+            common[line] = (seen[line], index)
+    candidates = sorted(pair for line, pair in common.items() if counts[line] == 1)
+    # Longest increasing run of b indices, by patience sorting.
+    tops: list[int] = []
+    links: list[int] = []
+    ends: list[int] = []
+    for position, (_, j) in enumerate(candidates):
+        pile = bisect.bisect_left(tops, j)
+        if pile == len(tops):
+            tops.append(j)
+            ends.append(position)
+        else:
+            tops[pile] = j
+            ends[pile] = position
+        links.append(ends[pile - 1] if pile else -1)
+    chain: list[tuple[int, int]] = []
+    position = ends[-1] if ends else -1
+    while position != -1:
+        chain.append(candidates[position])
+        position = links[position]
+    chain.reverse()
+    return chain
+
+
+def _difflib_blocks(
+    a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Return the equal pairs ``difflib.SequenceMatcher`` finds in the ranges."""
+    # Deferred: only diffs that exhaust the Myers budget need difflib.
+    from difflib import SequenceMatcher
+
+    matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi])
+    return [
+        (alo + i + offset, blo + j + offset)
+        for i, j, size in matcher.get_matching_blocks()
+        for offset in range(size)
+    ]
+
+
+def _matching_blocks(
+    a: Sequence[int], b: Sequence[int], budget: list[int] | None = None
+) -> list[tuple[int, int]]:
+    """Return the ``(i, j)`` pairs of equal lines the diff keeps.
+
+    ``budget`` is the Myers work left for the whole diff, as a one-element
+    list so recursive calls share it; ``None`` starts a new diff.
+    """
+    budget = [_MAX_WORK] if budget is None else budget
+    pairs: list[tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        # A single line differs from both ends of the other range, so it
+        # matches at most one line in between.
+        if ahi - alo == 1:
+            with contextlib.suppress(ValueError):
+                pairs.append((alo, b.index(a[alo], blo, bhi)))
+            continue
+        if bhi - blo == 1:
+            with contextlib.suppress(ValueError):
+                pairs.append((a.index(b[blo], alo, ahi), blo))
+            continue
+        # Lines missing from the other side can never match; diff the
+        # rest, which is often far shorter, and map the pairs back.
+        a_lines, b_lines = set(a[alo:ahi]), set(b[blo:bhi])
+        a_kept = [index for index in range(alo, ahi) if a[index] in b_lines]
+        b_kept = [index for index in range(blo, bhi) if b[index] in a_lines]
+        if len(a_kept) < ahi - alo or len(b_kept) < bhi - blo:
+            if a_kept and b_kept:
+                kept = _matching_blocks(
+                    [a[index] for index in a_kept],
+                    [b[index] for index in b_kept],
+                    budget,
+                )
+                pairs += [(a_kept[x], b_kept[y]) for x, y in kept]
+            continue
+        if anchors := _anchors(a, alo, ahi, b, blo, bhi):
+            pairs += anchors
+            starts = [(alo, blo)] + [(x + 1, y + 1) for x, y in anchors]
+            stops = [*anchors, (ahi, bhi)]
+            for (x, y), (u, v) in zip(starts, stops, strict=True):
+                stack.append((x, u, y, v))
+            continue
+        split = _middle(a, alo, ahi, b, blo, bhi, budget) if budget[0] else None
+        if split is not None:
+            x, y = split
+            stack.append((x, ahi, y, bhi))
+            stack.append((alo, x, blo, y))
+        elif not budget[0]:
+            pairs += _difflib_blocks(a, alo, ahi, b, blo, bhi)
+    pairs.sort()
+    return pairs
+
+
+def opcodes(a: Sequence[str], b: Sequence[str]) -> list[Opcode]:
+    """Describe how to turn lines ``a`` into lines ``b``.
+
+    Args:
+        a: Original lines.
+        b: New lines.
+
+    Returns:
+        ``equal``, ``replace``, ``delete`` and ``insert`` opcodes covering
+        both sequences, in the form ``difflib.SequenceMatcher.get_opcodes``
+        uses.
+    """
+    ids: dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    result: list[Opcode] = []
+    i = j = 0
+    for x, y in [*_matching_blocks(a_ids, b_ids), (len(a), len(b))]:
+        if i < x or j < y:
+            tag = "replace" if i < x and j < y else "delete" if i < x else "insert"
+            result.append((tag, i, x, j, y))
+        if x < len(a) or y < len(b):
+            if result and result[-1][0] == "equal":
+                tag, i1, _, j1, _ = result[-1]
+                result[-1] = (tag, i1, x + 1, j1, y + 1)
+            else:
+                result.append(("equal", x, x + 1, y, y + 1))
+        i, j = x + 1, y + 1
+    return result
+
+
+def _hunks(codes: list[Opcode], context: int) -> Iterator[list[Opcode]]:
+    """Group ``codes`` into hunks with ``context`` lines around changes.
+
+    Mirrors ``difflib.SequenceMatcher.get_grouped_opcodes``.
+    """
+    if not codes:
+        return
+    codes = list(codes)
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    span = context + context
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > span:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _range(start: int, stop: int) -> str:
+    """Format a hunk range like ``difflib.unified_diff``."""
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    if not length:
+        start -= 1
+    return f"{start + 1},{length}"
+
+
+def _lines(text: str) -> list[str]:
+    """Split ``text`` into lines, keeping their line breaks."""
+    return text.splitlines(keepends=True)
+
+
+def unified_diff(
+    original: str, formatted: str, filename: str, *, context: int = 3
+) -> list[str]:
+    """Return the unified diff between two texts, one string per line.
+
+    Args:
+        original: Text before formatting.
+        formatted: Text after formatting.
+        filename: Label for the ``a/`` and ``b/`` header paths.
+        context: Unchanged lines shown around each change.
+
+    Returns:
+        The diff's lines, each ending as its source line does; empty if
+        the texts are equal.
+    """
+    a, b = _lines(original), _lines(formatted)
+    out: list[str] = []
+    for hunk in _hunks(opcodes(a, b), context):
+        if not out:
+            out += [f"--- a/{filename}\n", f"+++ b/{filename}\n"]
+        first, last = hunk[0], hunk[-1]
+        old, new = _range(first[1], last[2]), _range(first[3], last[4])
+        out.append(f"@@ -{old} +{new} @@\n")
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal":
+                out += [f" {line}" for line in a[i1:i2]]
+                continue
+            out += [f"-{line}" for line in a[i1:i2]]
+            out += [f"+{line}" for line in b[j1:j2]]
+    return out
+
+
+def json_diff(original: str, formatted: str, filename: str) -> str:
+    """Return the diff as one line of JSON.
+
+    The object has ``path`` and ``hunks``; each hunk has the 1-based
+    ``old_start``/``new_start``, the ``old_lines``/``new_lines`` counts
+    and its ``lines``, each prefixed with `` ``, ``-`` or ``+`` as in a
+    unified diff and without the line break.
+    """
+    a, b = original.splitlines(), formatted.splitlines()
+    hunks = []
+    for hunk in _hunks(opcodes(_lines(original), _lines(formatted)), 3):
+        first, last = hunk[0], hunk[-1]
+        lines: list[str] = []
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal":
+                lines += [f" {line}" for line in a[i1:i2]]
+                continue
+            lines += [f"-{line}" for line in a[i1:i2]]
+            lines += [f"+{line}" for line in b[j1:j2]]
+        hunks.append(
+            {
+                "old_start": first[1] + 1,
+                "old_lines": last[2] - first[1],
+                "new_start": first[3] + 1,
+                "new_lines": last[4] - first[3],
+                "lines": lines,
+            }
+        )
+    return json.dumps({"path": filename, "hunks": hunks}) + "\n"
+
+
+def diff_stat(original: str, formatted: str, filename: str) -> str:
+    """Return a ``git diff --stat`` style line counting changed lines."""
+    added = removed = 0
+    for tag, i1, i2, j1, j2 in opcodes(_lines(original), _lines(formatted)):
+        if tag != "equal":
+            removed += i2 - i1
+            added += j2 - j1
+    total = added + removed
+    scale = min(1.0, _STAT_WIDTH / total) if total else 1.0
+    plus, minus = round(added * scale), round(removed * scale)
+    return f"{filename} | {total} {'+' * plus}{'-' * minus}\n"
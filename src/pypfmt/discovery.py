@@ -0,0 +1,287 @@
+"""Discover pyproject.toml files under directories.
+
+Directories are walked lazily in sorted order, so the file-mode engine
+can start formatting while the walk is still running. Heavy directories
+such as virtualenvs and ``node_modules`` are pruned before they are
+entered, and ``.gitignore`` files plus user ``--exclude`` patterns are
+honoured with gitignore semantics.
+"""
+
+from __future__ import annotations
+
+__all__ = ["DEFAULT_EXCLUDES", "PYPROJECT", "discover", "select"]
+
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+PYPROJECT = "pyproject.toml"
+
+DEFAULT_EXCLUDES: frozenset[str] = frozenset(
+    {
+        ".eggs",
+        ".git",
+        ".hg",
+        ".mypy_cache",
+        ".nox",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".svn",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "__pypackages__",
+        "build",
+        "dist",
+        "node_modules",
+        "site-packages",
+        "venv",
+    }
+)
+"""Directory names never descended into while walking."""
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) into a regex."""
+    parts: list[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+            continue
+        if pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("/.*")
+            index += 3
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and (end := pattern.find("]", index + 2)) != -1:
+            body = pattern[index + 1 : end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+class _IgnoreRule:
+    """One compiled gitignore pattern."""
+
+    def __init__(self, pattern: str) -> None:
+        self.negated = pattern.startswith("!")
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # A slash anywhere but the end anchors the pattern to its base dir.
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        self.regex = re.compile(f"{prefix}{_translate(pattern)}", re.DOTALL)
+
+    def matches(self, relpath: str, is_dir: bool) -> bool:
+        """Whether the rule applies to ``relpath`` (``/``-separated)."""
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.fullmatch(relpath) is not None
+
+
+class _IgnoreFile:
+    """Rules from one ignore source, relative to the directory it sits in."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.rules: list[_IgnoreRule] = []
+        for line in patterns:
+            stripped = line.rstrip(" ")
+            if not stripped or stripped.startswith("#"):
+                continue
+            self.rules.append(_IgnoreRule(stripped))
+
+    @classmethod
+    def load(cls, directory: str) -> _IgnoreFile | None:
+        """Read ``directory/.gitignore``, or return ``None`` if absent."""
+        try:
+            text = Path(directory, ".gitignore").read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        ignore = cls(text.splitlines())
+        return ignore if ignore.rules else None
+
+    def verdict(self, relpath: str, is_dir: bool) -> bool | None:
+        """Return whether the last matching rule ignores ``relpath``.
+
+        Returns ``None`` when no rule matches, so outer sources decide.
+        """
+        for rule in reversed(self.rules):
+            if rule.matches(relpath, is_dir):
+                return not rule.negated
+        return None
+
+
+# An ignore source paired with the ``/``-terminated path of the directory
+# being walked, relative to the directory the source applies from.
+_Scope = tuple[_IgnoreFile, str]
+
+
+def _is_ignored(name: str, is_dir: bool, scopes: Sequence[_Scope]) -> bool:
+    """Apply ignore sources, the innermost (last) taking precedence."""
+    for ignore, prefix in reversed(scopes):
+        verdict = ignore.verdict(prefix + name, is_dir)
+        if verdict is not None:
+            return verdict
+    return False
+
+
+def _ancestor_scopes(directory: str) -> list[_Scope]:
+    """Load ``.gitignore`` files above ``directory`` up to its repo root.
+
+    Returns nothing when ``directory`` is not inside a git work tree.
+    """
+    current = Path(directory).resolve()
+    if (current / ".git").exists():
+        return []
+    scopes: list[_Scope] = []
+    for parent in current.parents:
+        if (ignore := _IgnoreFile.load(str(parent))) is not None:
+            prefix = current.relative_to(parent).as_posix() + "/"
+            scopes.insert(0, (ignore, prefix))
+        if (parent / ".git").exists():
+            return scopes
+    return []
+
+
+def _walk(
+    directory: str,
+    scopes: list[_Scope],
+    gitignore: bool,
+    on_directory: Callable[[str], object] | None,
+) -> Iterator[str]:
+    """Yield pyproject.toml files below ``directory``, depth-first."""
+    if on_directory is not None:
+        on_directory(directory)
+    own = _IgnoreFile.load(directory) if gitignore else None
+    if own is not None:
+        scopes = [*scopes, (own, "")]
+    try:
+        with os.scandir(directory) as scan:
+            entries = sorted(scan, key=lambda entry: entry.name)
+    except OSError:
+        return
+    subdirs: list[os.DirEntry[str]] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir and entry.name in DEFAULT_EXCLUDES:
+            continue
+        if _is_ignored(entry.name, is_dir, scopes):
+            continue
+        if is_dir:
+            subdirs.append(entry)
+        elif entry.name == PYPROJECT:
+            yield entry.path
+    for subdir in subdirs:
+        nested = [(ignore, f"{prefix}{subdir.name}/") for ignore, prefix in scopes]
+        yield from _walk(subdir.path, nested, gitignore, on_directory)
+
+
+def discover(
+    paths: Iterable[str],
+    exclude: Sequence[str] = (),
+    *,
+    gitignore: bool = True,
+    on_directory: Callable[[str], object] | None = None,
+) -> Iterator[str]:
+    """Expand ``paths`` into the pyproject.toml files to format.
+
+    Files are yielded as given, even if they would be excluded, so
+    pre-commit and other callers that pass explicit paths are unaffected.
+    Directories are walked recursively and lazily.
+
+    Args:
+        paths: Files and directories from the command line.
+        exclude: Extra gitignore-style patterns, relative to each walked
+            directory.
+        gitignore: Whether to honour ``.gitignore`` files.
+        on_directory: Called with each directory just before it is
+            listed, so callers such as the watcher can tell later whether
+            a walk would still find the same files.
+
+    Yields:
+        Paths of files to format, in a deterministic order.
+    """
+    for path in paths:
+        if not Path(path).is_dir():
+            yield path
+            continue
+        scopes = _ancestor_scopes(path) if gitignore else []
+        if exclude:
+            scopes.append((_IgnoreFile(exclude), ""))
+        yield from _walk(path, scopes, gitignore, on_directory)
+
+
+def select(
+    candidates: Iterable[str], paths: Iterable[str], exclude: Sequence[str] = ()
+) -> Iterator[str]:
+    """Keep the ``candidates`` that ``discover(paths, exclude)`` would find.
+
+    Used with a list of files already known to be of interest, such as
+    those git reports as changed, so no directory is walked. A candidate
+    is kept if it is named in ``paths``, or if it is a ``pyproject.toml``
+    below one of their directories and neither its directories nor the
+    file match ``DEFAULT_EXCLUDES`` or ``exclude``. ``.gitignore`` files
+    are not consulted.
+
+    Args:
+        candidates: Paths relative to the working directory.
+        paths: Files and directories from the command line.
+        exclude: Extra gitignore-style patterns, relative to each
+            directory in ``paths``.
+
+    Yields:
+        The kept candidates, in their original order.
+    """
+    ignore = _IgnoreFile(exclude) if exclude else None
+    roots = [Path(path).resolve() for path in paths]
+    for candidate in candidates:
+        path = Path(candidate).resolve()
+        for root in roots:
+            if path == root:
+                yield candidate
+                break
+            if (
+                path.name == PYPROJECT
+                and path.is_relative_to(root)
+                and root.is_dir()
+                and _is_selected(path.relative_to(root).parts, ignore)
+            ):
+                yield candidate
+                break
+
+
+def _is_selected(parts: Sequence[str], ignore: _IgnoreFile | None) -> bool:
+    """Whether a walk would reach the file at ``parts`` below its root."""
+    if any(part in DEFAULT_EXCLUDES for part in parts[:-1]):
+        return False
+    if ignore is None:
+        return True
+    for depth in range(1, len(parts) + 1):
+        is_dir = depth < len(parts)
+        if ignore.verdict("/".join(parts[:depth]), is_dir):
+            return False
+    return True
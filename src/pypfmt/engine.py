@@ -0,0 +1,410 @@
+"""File-processing engine for the CLI file mode.
+
+Reads each input, resolves its ``[tool.pypfmt]`` config, layered over
+any config inherited from the directories above it, and runs the
+pipeline, either serially or across a process pool. Results are plain
+data so pool workers can hand them back to the parent process, which
+reports them in input order.
+
+``format_frames`` does the same for documents arriving on a stream, one
+task per document so results are not held back by batching.
+
+Every result carries the per-stage timings of its document, so the CLI
+can aggregate a ``--profile`` breakdown across worker processes.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "FileResult",
+    "format_chunk",
+    "format_file",
+    "format_files",
+    "format_frames",
+    "format_text",
+    "resolve_jobs",
+]
+
+import dataclasses
+import functools
+import itertools
+import os
+import time
+import tomllib
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from pypfmt.config import get_sort_engine, inherited_config
+from pypfmt.formatter import get_formatter
+from pypfmt.parallel import TASKS_PER_WORKER, chunked, map_ordered
+from pypfmt.pipeline import (
+    is_fixed_point,
+    parse_pyproject,
+    record_fixed_point,
+    sort_pyproject,
+    timed_stage,
+)
+from pypfmt.result import FileResult
+from pypfmt.sorter import sort_and_format_toml
+from pypfmt.timing import StageTiming
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from pypfmt.cache import FormatCache
+    from pypfmt.config import MergedConfig
+
+# Upper bound on files per task; each task spawns taplo once per distinct
+# set of taplo options, so larger chunks amortise more process start-up.
+_MAX_CHUNK_SIZE = 16
+
+
+@dataclasses.dataclass(frozen=True)
+class _Sorted:
+    """A document between the sort and format stages.
+
+    ``result`` is final when it carries an error, a cache hit or the
+    output of the fused engine; otherwise it still needs ``sorted_text``
+    run through taplo with ``taplo_options``. If the document turns out
+    to be formatted already, it is recorded as a fixed point under
+    ``config`` and ``cache_key``.
+    ``timings`` collects the document's stage timings so far.
+    """
+
+    result: FileResult
+    sorted_text: str | None = None
+    taplo_options: tuple[str, ...] | None = None
+    config: MergedConfig | None = None
+    cache_key: str | None = None
+    timings: list[StageTiming] = dataclasses.field(default_factory=list)
+
+
+def _sort_stage(
+    text: str,
+    path: str,
+    cache: FormatCache | None,
+    timings: list[StageTiming] | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> _Sorted:
+    """Parse ``text`` once, resolve its config, then sort it.
+
+    Documents found in ``cache`` skip sorting and formatting entirely,
+    as do documents the ``fused`` engine formats in the same pass.
+    Stage timings are appended to ``timings``, which already holds any
+    earlier stages of the document. ``sort_engine`` overrides the
+    document's ``sort-engine`` setting; ``config``, if given, is used
+    instead of the document's own and inherited config.
+    """
+    timings = [] if timings is None else timings
+
+    def on_stage(stage: str, seconds: float, nbytes: int) -> None:
+        timings.append(StageTiming(stage, seconds, nbytes))
+
+    try:
+        document = parse_pyproject(text, on_stage=on_stage)
+    except tomllib.TOMLDecodeError as exc:
+        return _Sorted(FileResult(path, text, error=str(exc)), timings=timings)
+
+    with timed_stage(on_stage, "config", text):
+        warning = document.conflict_warning
+        try:
+            if config is None:
+                inherited = inherited_config(path)
+                merged = document.merged_config(inherited)
+                engine = sort_engine or document.sort_engine(inherited)
+            else:
+                merged, engine = config, sort_engine or get_sort_engine(None)
+        except ValueError as exc:
+            result = FileResult(path, text, error=str(exc), warning=warning)
+            return _Sorted(result, timings=timings)
+
+    unchanged = FileResult(path, text, formatted=text, warning=warning)
+    if is_fixed_point(text, merged):
+        return _Sorted(unchanged, timings=timings)
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(text, merged)
+        if cache_key in cache:
+            record_fixed_point(text, merged)
+            return _Sorted(unchanged, timings=timings)
+
+    if merged is None:
+        sort_cfg = overrides = comment_cfg = format_cfg = taplo_opts = None
+    else:
+        sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts = merged
+    if engine == "fused":
+        with timed_stage(on_stage, "fused", text):
+            formatted = sort_and_format_toml(
+                text, sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts
+            )
+        if formatted is not None:
+            result = FileResult(path, text, formatted=formatted, warning=warning)
+            if not result.changed:
+                record_fixed_point(text, merged)
+                if cache is not None and cache_key is not None:
+                    cache.add(cache_key)
+            return _Sorted(result, timings=timings)
+    sorted_text = sort_pyproject(
+        document,
+        sort_config=sort_cfg,
+        sort_overrides=overrides,
+        comment_config=comment_cfg,
+        format_config=format_cfg,
+        on_stage=on_stage,
+        sort_engine=engine,
+    )
+    return _Sorted(
+        FileResult(path, text, warning=warning),
+        sorted_text,
+        taplo_opts,
+        merged,
+        cache_key,
+        timings,
+    )
+
+
+def _format_stage(
+    batch: Sequence[_Sorted], cache: FormatCache | None = None
+) -> list[FileResult]:
+    """Run every sorted document in ``batch`` through taplo.
+
+    Documents sharing the same taplo options are formatted together by a
+    single taplo process, whose duration is split evenly across them.
+    Documents that come back unchanged are recorded as fixed points in
+    memory and in ``cache``.
+    """
+    results = [item.result for item in batch]
+    groups: dict[tuple[str, ...] | None, list[int]] = {}
+    for index, item in enumerate(batch):
+        if item.sorted_text is not None:
+            groups.setdefault(item.taplo_options, []).append(index)
+
+    formatter = get_formatter()
+    for taplo_options, indices in groups.items():
+        texts = [cast("str", batch[index].sorted_text) for index in indices]
+        start = time.perf_counter()
+        formatted = formatter.format_many(texts, taplo_options)
+        share = (time.perf_counter() - start) / len(indices)
+        for index, text, output in zip(indices, texts, formatted, strict=True):
+            batch[index].timings.append(
+                StageTiming("format", share, len(text.encode("utf-8")))
+            )
+            results[index] = dataclasses.replace(results[index], formatted=output)
+            if results[index].changed:
+                continue
+            item = batch[index]
+            record_fixed_point(output, item.config)
+            if cache is not None and item.cache_key is not None:
+                cache.add(item.cache_key)
+    return [
+        dataclasses.replace(result, timings=tuple(item.timings))
+        for result, item in zip(results, batch, strict=True)
+    ]
+
+
+def format_text(
+    text: str,
+    path: str,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+    cache: FormatCache | None = None,
+) -> FileResult:
+    """Format already-read content, capturing expected errors as data.
+
+    Args:
+        text: Raw pyproject.toml content.
+        path: Path or display label used when reporting the result.
+        sort_engine: Sort engine overriding the document's ``sort-engine``
+            setting, or ``None`` to use that setting.
+        config: Merged config replacing the document's own and inherited
+            config, or ``None`` to resolve those.
+        cache: Cache of known-formatted documents, or ``None`` to disable.
+
+    Returns:
+        A ``FileResult`` carrying either the formatted text or an error.
+
+    Raises:
+        RuntimeError: If taplo binary is not found or formatting fails.
+    """
+    sorted_doc = _sort_stage(text, path, cache, sort_engine=sort_engine, config=config)
+    return _format_stage([sorted_doc], cache)[0]
+
+
+def _read_and_sort(
+    path: str,
+    cache: FormatCache | None,
+    sort_engine: str | None,
+    config: MergedConfig | None,
+) -> _Sorted:
+    """Read ``path`` and run it through the sort stage."""
+    start = time.perf_counter()
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return _Sorted(FileResult(path, error="file not found"))
+    except PermissionError:
+        return _Sorted(FileResult(path, error="permission denied"))
+    read = StageTiming("read", time.perf_counter() - start, len(text.encode("utf-8")))
+    return _sort_stage(text, path, cache, [read], sort_engine, config)
+
+
+def format_chunk(
+    paths: Sequence[str],
+    cache: FormatCache | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> list[FileResult]:
+    """Read and format a chunk of files, batching their taplo runs.
+
+    This is the unit of work submitted to pool workers, so it must stay
+    a picklable module-level function.
+
+    Args:
+        paths: Files to format.
+        cache: Cache of known-formatted documents, or ``None`` to disable.
+        sort_engine: Sort engine overriding each document's ``sort-engine``
+            setting, or ``None`` to use that setting.
+        config: Merged config replacing each document's own and inherited
+            config, or ``None`` to resolve those per document.
+    """
+    sorted_docs = [_read_and_sort(path, cache, sort_engine, config) for path in paths]
+    return _format_stage(sorted_docs, cache)
+
+
+def format_file(
+    path: str,
+    cache: FormatCache | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> FileResult:
+    """Read and format a single file."""
+    return format_chunk([path], cache, sort_engine, config)[0]
+
+
+def _chunk_sizes(items: Iterable[str], jobs: int) -> Iterator[int]:
+    """Choose chunk sizes that keep every worker busy.
+
+    Known-length inputs are split evenly over the workers. Lazy inputs,
+    such as a directory walk still in progress, start with single-file
+    chunks so the first results appear early, then grow to the maximum.
+    """
+    if isinstance(items, list | tuple):
+        per_task = -(-len(items) // (jobs * TASKS_PER_WORKER))
+        return itertools.repeat(max(1, min(_MAX_CHUNK_SIZE, per_task)))
+    window = jobs * TASKS_PER_WORKER
+    return (min(_MAX_CHUNK_SIZE, 2 ** (i // window)) for i in itertools.count())
+
+
+def format_files(
+    paths: Iterable[str],
+    jobs: int = 1,
+    cache: FormatCache | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> Iterator[FileResult]:
+    """Format ``paths``, yielding one ``FileResult`` per path in input order.
+
+    Files are processed in chunks so each chunk needs only one taplo
+    process per distinct set of taplo options.
+
+    Args:
+        paths: Files to format.
+        jobs: Number of worker processes. ``1`` formats in-process.
+        cache: Cache of known-formatted documents, or ``None`` to disable.
+        sort_engine: Sort engine overriding each document's ``sort-engine``
+            setting, or ``None`` to use that setting.
+        config: Merged config replacing each document's own and inherited
+            config, or ``None`` to resolve those per document. It is
+            resolved once by the caller and shipped to every worker.
+
+    Yields:
+        Results in the same order as ``paths``, regardless of which
+        worker finishes first.
+    """
+    if isinstance(paths, list | tuple):
+        jobs = max(1, min(jobs, len(paths)))
+    chunks = chunked(paths, _chunk_sizes(paths, jobs))
+    task = functools.partial(
+        format_chunk, cache=cache, sort_engine=sort_engine, config=config
+    )
+    for results in map_ordered(task, chunks, jobs):
+        yield from results
+
+
+def _format_frame(
+    frame: tuple[str, bytes],
+    cache: FormatCache | None,
+    sort_engine: str | None,
+    config: MergedConfig | None,
+) -> FileResult:
+    """Decode and format one labelled document of a stream."""
+    label, data = frame
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        # Keep the raw bytes, so the caller can pass the frame through.
+        original = data.decode("utf-8", "surrogateescape")
+        return FileResult(label, original, error="not valid UTF-8")
+    sorted_doc = _sort_stage(text, label, cache, sort_engine=sort_engine, config=config)
+    return _format_stage([sorted_doc], cache)[0]
+
+
+def format_frames(
+    frames: Iterable[tuple[str, bytes]],
+    jobs: int = 1,
+    cache: FormatCache | None = None,
+    sort_engine: str | None = None,
+    config: MergedConfig | None = None,
+) -> Iterator[FileResult]:
+    """Format a stream of labelled documents, yielding results in order.
+
+    Unlike ``format_files``, every document is its own task, so each
+    result is yielded as soon as it and all earlier ones are done, even
+    while ``frames`` waits for more input. With ``jobs > 1`` up to
+    ``jobs * TASKS_PER_WORKER`` documents are read ahead.
+
+    Args:
+        frames: ``(label, utf8_bytes)`` pairs, e.g. from
+            ``pypfmt.stream.read_frames``.
+        jobs: Number of worker processes. ``1`` formats in-process.
+        cache: Cache of known-formatted documents, or ``None`` to disable.
+        sort_engine: Sort engine overriding each document's ``sort-engine``
+            setting, or ``None`` to use that setting.
+        config: Merged config replacing each document's own and inherited
+            config, or ``None`` to resolve those per document.
+
+    Returns:
+        An iterator of one result per frame. A frame that is not UTF-8
+        gives an error whose ``original`` holds its bytes decoded with
+        ``surrogateescape``.
+    """
+    task = functools.partial(
+        _format_frame, cache=cache, sort_engine=sort_engine, config=config
+    )
+    return map_ordered(task, frames, jobs)
+
+
+def _available_cpus() -> int:
+    """Return the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1  # pragma: no cover
+
+
+def resolve_jobs(value: str) -> int:
+    """Parse a ``--jobs`` value: a positive integer or ``"auto"``.
+
+    Raises:
+        ValueError: If ``value`` is neither ``"auto"`` nor a positive integer.
+    """
+    if value == "auto":
+        return _available_cpus()
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        msg = f"expected a positive integer or 'auto', got {value!r}"
+        raise ValueError(msg)
+    return jobs
@@ -6,23 +6,233 @@ This is the second stage of the pipeline: format after sorting.
 
 from __future__ import annotations
 
-__all__ = ["format_toml"]
+__all__ = ["TaploFormatter", "format_toml", "get_formatter"]
 
+import contextlib
+import functools
 import shutil
 import subprocess
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 from pypfmt.config import TAPLO_OPTIONS
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+class TaploFormatter:
+    """Reusable taplo backend shared across a whole run.
+
+    The binary is resolved once, on first use. ``format`` pipes a single
+    document through ``taplo format -``; ``format_many`` formats a batch
+    of documents with one taplo process, amortising fork/exec over the
+    batch. taplo has no multi-document stdin mode, so batches go through
+    a private temporary directory and taplo's in-place file mode, which
+    shares the formatting code path with stdin mode. ``format_async``
+    is the non-blocking variant of ``format`` for asyncio callers.
+    """
+
+    def __init__(self, binary: str | None = None) -> None:
+        """Create a formatter for ``binary``, or for ``taplo`` on PATH."""
+        self._binary = binary
+
+    @property
+    def binary(self) -> str:
+        """Path to the taplo binary.
+
+        Raises:
+            RuntimeError: If taplo binary is not found.
+        """
+        if self._binary is None:
+            self._binary = shutil.which("taplo")
+            if self._binary is None:
+                msg = "taplo binary not found. Install via: pip install taplo"
+                raise RuntimeError(msg)
+        return self._binary
+
+    @property
+    def release(self) -> str | None:
+        """Version reported by ``taplo --version``, or ``None`` if unknown.
+
+        This is the binary that actually formats, which may differ from
+        the installed ``taplo`` distribution. Asked once per binary and
+        process.
+        """
+        try:
+            binary = self.binary
+        except RuntimeError:
+            return None
+        return _binary_release(binary)
+
+    def _command(self, options: tuple[str, ...], targets: Sequence[str]) -> list[str]:
+        """Build a ``taplo format`` command line."""
+        cmd: list[str] = [self.binary, "format", "--no-auto-config"]
+        for option in options:
+            cmd.extend(["-o", option])
+        cmd.extend(targets)
+        return cmd
+
+    def format(self, text: str, taplo_options: tuple[str, ...] | None = None) -> str:
+        """Format a single TOML document.
+
+        Args:
+            text: Valid TOML content as a string.
+            taplo_options: taplo -o key=value pairs, or None for defaults.
+
+        Returns:
+            The formatted TOML string.
+
+        Raises:
+            RuntimeError: If taplo binary is not found or formatting fails.
+        """
+        options = taplo_options if taplo_options is not None else TAPLO_OPTIONS
+        # taplo reads stdin and writes stdout as UTF-8 on every platform.
+        # Pin the subprocess encoding to UTF-8 so Python does not fall back to
+        # the locale code page (e.g. cp1252 on Windows), which would corrupt any
+        # non-ASCII bytes and make taplo reject the input.
+        result = subprocess.run(
+            self._command(options, ["-"]),
+            input=text,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=False,
+        )
+        if result.returncode != 0:
+            raise _failure(result.stdout, result.stderr)
+        return result.stdout
+
+    async def format_async(
+        self, text: str, taplo_options: tuple[str, ...] | None = None
+    ) -> str:
+        """Format a single TOML document without blocking the event loop.
+
+        If the awaiting task is cancelled, the taplo process is killed
+        before the cancellation propagates.
+
+        Args:
+            text: Valid TOML content as a string.
+            taplo_options: taplo -o key=value pairs, or None for defaults.
+
+        Returns:
+            The formatted TOML string, identical to ``format``.
+
+        Raises:
+            RuntimeError: If taplo binary is not found or formatting fails.
+        """
+        # Deferred: asyncio is costly to import and the CLI never needs it.
+        import asyncio
+
+        options = taplo_options if taplo_options is not None else TAPLO_OPTIONS
+        process = await asyncio.create_subprocess_exec(
+            *self._command(options, ["-"]),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await process.communicate(text.encode("utf-8"))
+        except asyncio.CancelledError:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await asyncio.shield(process.wait())
+            raise
+        # Decode like subprocess.run(text=True) does, newline translation
+        # included, so both paths return the same string.
+        out, err = (_decode(stream) for stream in (stdout, stderr))
+        if process.returncode != 0:
+            raise _failure(out, err)
+        return out
+
+    def format_many(
+        self,
+        texts: Sequence[str],
+        taplo_options: tuple[str, ...] | None = None,
+    ) -> list[str]:
+        """Format several TOML documents with a single taplo process.
+
+        Args:
+            texts: Valid TOML documents.
+            taplo_options: taplo -o key=value pairs applied to every
+                document, or None for defaults.
+
+        Returns:
+            The formatted documents, in the same order as ``texts``.
+
+        Raises:
+            RuntimeError: If taplo binary is not found or formatting fails.
+        """
+        if len(texts) <= 1:
+            return [self.format(text, taplo_options) for text in texts]
+        options = taplo_options if taplo_options is not None else TAPLO_OPTIONS
+
+        with tempfile.TemporaryDirectory(prefix="pypfmt-") as tmp:
+            paths = [Path(tmp) / f"{index}.toml" for index in range(len(texts))]
+            for path, text in zip(paths, texts, strict=True):
+                path.write_bytes(text.encode("utf-8"))
+            result = subprocess.run(
+                self._command(options, [str(path) for path in paths]),
+                capture_output=True,
+                check=False,
+            )
+            if result.returncode == 0:
+                return [path.read_text(encoding="utf-8") for path in paths]
+
+        # Retry one document at a time so the failure is attributed to the
+        # document that caused it, with taplo's own error message.
+        return [self.format(text, options) for text in texts]
+
+
+@functools.cache
+def _binary_release(binary: str) -> str | None:
+    """Return the version ``binary --version`` reports, e.g. ``"0.9.3"``."""
+    try:
+        result = subprocess.run(
+            [binary, "--version"], capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return None
+    words = result.stdout.split()
+    if result.returncode != 0 or not words:
+        return None
+    return words[-1]
+
+
+def _decode(data: bytes) -> str:
+    """Decode taplo output with universal newlines."""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _failure(stdout: str, stderr: str) -> RuntimeError:
+    """Build the error for a failed taplo run."""
+    # taplo reports parse errors on stderr, but some failures surface
+    # only on stdout, so include both to avoid an empty error message.
+    detail = stderr.strip() or stdout.strip() or "(no output)"
+    msg = f"taplo format failed: {detail}"
+    return RuntimeError(msg)
+
+
+_DEFAULT_FORMATTER = TaploFormatter()
+
+
+def get_formatter() -> TaploFormatter:
+    """Return the process-wide formatter used when none is passed."""
+    return _DEFAULT_FORMATTER
+
 
 def format_toml(
     text: str,
     taplo_options: tuple[str, ...] | None = None,
+    formatter: TaploFormatter | None = None,
 ) -> str:
     """Format a TOML string using taplo subprocess.
 
     Args:
         text: Valid TOML content as a string.
         taplo_options: taplo -o key=value pairs, or None for defaults.
+        formatter: taplo backend to use, or None for the shared default.
 
     Returns:
         The formatted TOML string with consistent whitespace,
@@ -31,34 +241,4 @@ def format_toml(
     Raises:
         RuntimeError: If taplo binary is not found or formatting fails.
     """
-    options = taplo_options if taplo_options is not None else TAPLO_OPTIONS
-
-    taplo_bin = shutil.which("taplo")
-    if taplo_bin is None:
-        msg = "taplo binary not found. Install via: pip install taplo"
-        raise RuntimeError(msg)
-
-    cmd: list[str] = [taplo_bin, "format", "--no-auto-config"]
-    for option in options:
-        cmd.extend(["-o", option])
-    cmd.append("-")
-
-    # taplo reads stdin and writes stdout as UTF-8 on every platform.
-    # Pin the subprocess encoding to UTF-8 so Python does not fall back to
-    # the locale code page (e.g. cp1252 on Windows), which would corrupt any
-    # non-ASCII bytes and make taplo reject the input.
-    result = subprocess.run(
-        cmd,
-        input=text,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        check=False,
-    )
-    if result.returncode != 0:
-        # taplo reports parse errors on stderr, but some failures surface
-        # only on stdout, so include both to avoid an empty error message.
-        detail = result.stderr.strip() or result.stdout.strip() or "(no output)"
-        msg = f"taplo format failed: {detail}"
-        raise RuntimeError(msg)
-    return result.stdout
+    return (formatter or _DEFAULT_FORMATTER).format(text, taplo_options)
@@ -0,0 +1,222 @@
+"""git plumbing for ``--changed-since``, ``--staged`` and ``--from-index``.
+
+A pull request in a large monorepo usually touches a handful of the
+pyproject.toml files, so checking only those avoids walking and
+formatting the rest. One ``git diff --name-only`` call answers the
+question for the whole tree.
+
+Pre-commit checks must see the staged content rather than the work
+tree. ``index_entries`` lists the index once, ``read_blobs`` streams
+any number of blobs through a single ``git cat-file --batch`` process
+instead of one ``git show`` per file, and ``write_blobs`` plus
+``update_index`` stage fixed content in two git calls without touching
+the work tree.
+
+Like ``pypfmt.client``, this module only uses the standard library.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "GitError",
+    "IndexEntry",
+    "changed_files",
+    "index_entries",
+    "read_blobs",
+    "update_index",
+    "write_blobs",
+]
+
+import dataclasses
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Index modes of regular files; symlinks and submodules are not documents.
+_FILE_MODES = frozenset({"100644", "100755"})
+
+
+class GitError(RuntimeError):
+    """git is missing, or a git command failed."""
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexEntry:
+    """A file staged in the index.
+
+    Attributes:
+        path: Path relative to the working directory.
+        mode: Octal file mode as git writes it, e.g. ``"100644"``.
+        oid: Object name of the staged blob.
+    """
+
+    path: str
+    mode: str
+    oid: str
+
+
+def _git(*args: str, data: bytes = b"") -> bytes:
+    """Run ``git *args`` in the working directory and return its stdout.
+
+    Args:
+        args: git's arguments.
+        data: Bytes to pipe to git's stdin.
+
+    Raises:
+        GitError: If git is not installed or exits non-zero.
+    """
+    try:
+        result = subprocess.run(
+            ["git", *args], input=data, capture_output=True, check=False
+        )
+    except FileNotFoundError as exc:
+        msg = "git not found on PATH"
+        raise GitError(msg) from exc
+    if result.returncode != 0:
+        lines = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        msg = lines[0] if lines else f"git {args[0]} exited with {result.returncode}"
+        raise GitError(msg)
+    return result.stdout
+
+
+def changed_files(since: str | None = None, *, staged: bool = False) -> list[str]:
+    """Return the files in the repository that git sees changed.
+
+    Deleted files are left out. Paths are relative to the working
+    directory, in git's order; files outside it start with ``..``, so
+    callers narrow the list down with ``pypfmt.discovery.select``.
+
+    Args:
+        since: Compare against the merge base of this revision and
+            ``HEAD``, so a branch only sees its own changes. Without it,
+            compare against ``HEAD`` (with ``staged``) or the index.
+        staged: Compare the index instead of the work tree, i.e. list
+            what the next commit would change.
+
+    Raises:
+        GitError: If git is missing, the working directory is not in a
+            repository or ``since`` is not a revision.
+    """
+    # git diff names files relative to the top-level directory.
+    top = os.fsdecode(_git("rev-parse", "--show-cdup").rstrip(b"\n"))
+    args = ["diff", "--name-only", "-z", "--diff-filter=d", "--no-relative"]
+    if staged:
+        args.append("--cached")
+    if since is not None:
+        if since.startswith("-"):
+            msg = f"invalid revision {since!r}"
+            raise GitError(msg)
+        args += ["--merge-base", since]
+    args.append("--")
+    output = _git(*args)
+    return [
+        os.path.relpath(Path(top, os.fsdecode(path)))
+        for path in output.split(b"\0")
+        if path
+    ]
+
+
+def index_entries(paths: Iterable[str] = ()) -> list[IndexEntry]:
+    """Return the regular files staged in the index.
+
+    Files with unresolved merge conflicts are left out.
+
+    Args:
+        paths: Only list files at or below these paths; all files below
+            the working directory if empty.
+
+    Raises:
+        GitError: If git is missing or the working directory is not in a
+            repository.
+    """
+    output = _git("ls-files", "--stage", "-z", "--", *paths)
+    entries: list[IndexEntry] = []
+    for record in output.split(b"\0"):
+        info, _, path = record.partition(b"\t")
+        if not path:
+            continue
+        mode, oid, stage = info.decode("ascii").split()
+        if stage == "0" and mode in _FILE_MODES:
+            entries.append(IndexEntry(os.fsdecode(path), mode, oid))
+    return entries
+
+
+def read_blobs(oids: Iterable[str]) -> Iterator[bytes]:
+    """Yield the contents of the blobs ``oids``, in order.
+
+    All blobs are read through one ``git cat-file --batch`` process. Each
+    is requested only when the previous one has been consumed, so callers
+    can format blobs as they arrive.
+
+    Raises:
+        GitError: If git is missing or an object does not exist.
+    """
+    try:
+        process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except FileNotFoundError as exc:
+        msg = "git not found on PATH"
+        raise GitError(msg) from exc
+    with process:
+        # Both pipes were requested above.
+        stdin = cast("IO[bytes]", process.stdin)
+        stdout = cast("IO[bytes]", process.stdout)
+        for oid in oids:
+            stdin.write(f"{oid}\n".encode("ascii"))
+            stdin.flush()
+            # "<oid> <type> <size>", or "<oid> missing".
+            header = stdout.readline().split()
+            if len(header) != 3 or not header[2].isdigit():
+                msg = f"cannot read object {oid}"
+                raise GitError(msg)
+            yield stdout.read(int(header[2]))
+            stdout.read(1)  # the newline after the content
+
+
+def write_blobs(contents: Iterable[bytes]) -> list[str]:
+    """Store ``contents`` in the object database and return their names.
+
+    The contents go to temporary files that a single ``git hash-object``
+    process stores, instead of one process per blob. Like ``--stdin``,
+    the bytes are stored as they are, without attribute-based filters.
+
+    Raises:
+        GitError: If git is missing or fails.
+    """
+    with tempfile.TemporaryDirectory(prefix="pypfmt-") as directory:
+        paths = []
+        for index, data in enumerate(contents):
+            path = Path(directory, str(index))
+            path.write_bytes(data)
+            paths.append(os.fsencode(path) + b"\n")
+        if not paths:
+            return []
+        output = _git(
+            "hash-object", "-w", "--no-filters", "--stdin-paths", data=b"".join(paths)
+        )
+    return output.decode("ascii").split()
+
+
+def update_index(entries: Iterable[IndexEntry]) -> None:
+    """Point the index at new blobs for ``entries``, in one git call.
+
+    The work tree is not touched.
+
+    Raises:
+        GitError: If git is missing or fails.
+    """
+    records = b"".join(
+        f"{entry.mode} {entry.oid}\t".encode("ascii") + os.fsencode(entry.path) + b"\0"
+        for entry in entries
+    )
+    if records:
+        _git("update-index", "-z", "--index-info", data=records)
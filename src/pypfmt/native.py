@@ -0,0 +1,739 @@
+"""Native sort engine for the common subset of pyproject.toml.
+
+toml-sort parses every document into a tomlkit tree, rebuilds a sorted
+tree and dumps it again; that round trip is most of the sort stage's
+cost. Most pyproject.toml files only use table headers, simple keys,
+strings, numbers, booleans, arrays and inline tables. For those,
+``sort_native`` reproduces toml-sort's output byte for byte from a single
+line-level pass, applying the same ``first`` lists, per-path overrides,
+array sorting and comment rules.
+
+Anything outside that subset -- dotted keys, escaped quoted keys,
+multi-line strings, dates, CRLF line endings, a table declared after one
+of its sub-tables, and the corners where toml-sort moves comments
+around arrays of tables -- makes ``sort_native`` return ``None`` so the
+caller falls back to toml-sort. ``tests/test_native.py`` checks both
+engines produce identical output.
+
+Comment handling mirrors toml-sort: a run of comment lines attaches to
+the key or table header that directly follows it, a blank line discards
+the run, comments at the very top form the header and comments left at
+the end form the footer.
+
+``format_native`` renders the same sorted tree straight into the layout
+taplo 0.9 gives toml-sort's output under the default ``TAPLO_OPTIONS``
+(the ``fused`` engine), so neither toml-sort's text nor taplo's parse
+is needed. Layout corners it does not model, such as an inline table
+holding an array that taplo would expand, also return ``None``.
+"""
+
+from __future__ import annotations
+
+__all__ = ["format_native", "sort_native"]
+
+import dataclasses
+import re
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from toml_sort.tomlsort import (
+        CommentConfiguration,
+        FormattingConfiguration,
+        SortConfiguration,
+    )
+
+    ConfigResolver = Callable[[tuple[str, ...] | None], SortConfiguration]
+
+_BARE_KEY = r"[A-Za-z0-9_-]+"
+_HEADER = re.compile(rf"(\[\[?)({_BARE_KEY}(?:\.{_BARE_KEY})*)(\]\]?)[ \t]*(#.*)?")
+# Quoted keys without escapes, so their name is the text between the quotes.
+_KEY = re.compile(rf"""[ \t]*({_BARE_KEY}|"[^"\\\n]*"|'[^'\n]*')[ \t]*=[ \t]*""")
+_SCALAR = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'  # basic string
+    r"|'[^'\n]*'"  # literal string
+    r"|true|false"
+    r"|[+-]?[0-9][0-9_]*(?:\.[0-9][0-9_]*)?(?:[eE][+-]?[0-9][0-9_]*)?"
+)
+_BLANK_RUN = re.compile(r"\n{3,}")
+# taplo's ``column_width`` and ``indent_string`` in the default TAPLO_OPTIONS.
+_COLUMN_WIDTH = 80
+_INDENT = "    "
+_SPACE = " \t"
+_ARRAY_SPACE = " \t\n"
+
+
+class _Unsupported(Exception):
+    """The document uses TOML the native engine does not handle."""
+
+
+@dataclasses.dataclass
+class _Item:
+    """One array element with its inline and preceding comments."""
+
+    value: _Value
+    comment: str | None = None
+    comments: list[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class _Array:
+    """An array; ``multiline`` if its source spans several lines."""
+
+    items: list[_Item]
+    multiline: bool
+
+
+@dataclasses.dataclass
+class _InlineTable:
+    """An inline table: key name to source key and value, in source order."""
+
+    entries: dict[str, tuple[str, _Value]]
+
+
+_Value = str | _Array | _InlineTable
+"""A scalar (kept as its source text), an array or an inline table."""
+
+
+@dataclasses.dataclass
+class _Entry:
+    """One ``key = value`` line and the comments attached to it."""
+
+    key: str
+    value: _Value
+    comment: str | None
+    comments: list[str]
+
+
+@dataclasses.dataclass
+class _Table:
+    """A table, or with ``elements`` an array of tables.
+
+    Implicit (super) tables exist only through their sub-tables.
+    """
+
+    explicit: bool = False
+    elements: list[_Table] | None = None
+    comment: str | None = None
+    comments: list[str] = dataclasses.field(default_factory=list)
+    entries: dict[str, _Entry] = dataclasses.field(default_factory=dict)
+    children: dict[str, _Table] = dataclasses.field(default_factory=dict)
+
+
+def _format_comment(comment: str) -> str:
+    """Normalize a comment exactly like toml-sort's ``format_comment``."""
+    return f"# {comment[1:].strip()}".strip()
+
+
+def _clean(text: str) -> str:
+    """Collapse blank-line runs and strip, like toml-sort's text cleaning."""
+    return _BLANK_RUN.sub("\n\n", text).strip()
+
+
+def _skip(text: str, pos: int, chars: str) -> int:
+    """Return the first position at or after ``pos`` not in ``chars``."""
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _key_name(key: str) -> str:
+    """Return the name of a bare or quoted key, which sorting compares."""
+    return key[1:-1] if key[0] in "\"'" else key
+
+
+def _comment(text: str, pos: int) -> tuple[str | None, int]:
+    """Parse a comment running from ``pos`` to the end of the line, if any."""
+    if not text.startswith("#", pos):
+        return None, pos
+    end = text.find("\n", pos)
+    end = len(text) if end == -1 else end
+    return text[pos:end], end
+
+
+def _value(text: str, pos: int, *, top: bool = False) -> tuple[_Value, int]:
+    """Parse the value at ``pos``; only ``top`` arrays may hold comments."""
+    if text.startswith("[", pos):
+        return _array(text, pos, comments=top)
+    if text.startswith("{", pos):
+        return _inline_table(text, pos)
+    match = _SCALAR.match(text, pos)
+    if match is None:
+        raise _Unsupported
+    return match.group(), match.end()
+
+
+def _array(text: str, pos: int, *, comments: bool) -> tuple[_Array, int]:
+    """Parse an array whose ``[`` is at ``pos``.
+
+    Own-line comments attach to the next element; a literal blank line
+    between two of them discards the earlier ones, and any left before
+    ``]`` are dropped. A comment after an element (before or after its
+    comma) stays with that element.
+    """
+    start = pos
+    items: list[_Item] = []
+    pending: list[str] = []
+    gap_start = pos = pos + 1
+    while True:
+        pos = _skip(text, pos, _ARRAY_SPACE)
+        if text.startswith("#", pos):
+            if not comments or "\n" not in text[gap_start:pos]:
+                raise _Unsupported  # nested, or on the line of the ``[``
+            if "\n\n" in text[gap_start:pos]:
+                pending = []
+            comment, pos = _comment(text, pos)
+            pending.append(_format_comment(cast("str", comment)))
+            gap_start = pos
+            continue
+        if text.startswith("]", pos):
+            break
+        value, pos = _value(text, pos)
+        item = _Item(value, comments=pending)
+        items.append(item)
+        pending = []
+        item.comment, pos = _comment(text, _skip(text, pos, _SPACE))
+        pos = _skip(text, pos, _ARRAY_SPACE)
+        if text.startswith(",", pos):
+            comment, pos = _comment(text, _skip(text, pos + 1, _SPACE))
+            if comment is not None:
+                if item.comment is not None or not comments:
+                    raise _Unsupported
+                item.comment = comment
+        elif not text.startswith("]", pos):
+            raise _Unsupported
+        if item.comment is not None and not comments:
+            raise _Unsupported
+        gap_start = pos
+    return _Array(items, "\n" in text[start:pos]), pos + 1
+
+
+def _inline_table(text: str, pos: int) -> tuple[_InlineTable, int]:
+    """Parse an inline table whose ``{`` is at ``pos``."""
+    entries: dict[str, tuple[str, _Value]] = {}
+    pos = _skip(text, pos + 1, _SPACE)
+    if text.startswith("}", pos):
+        return _InlineTable(entries), pos + 1
+    while True:
+        match = _KEY.match(text, pos)
+        if match is None:
+            raise _Unsupported
+        key = match.group(1)
+        value, pos = _value(text, match.end())
+        entries[_key_name(key)] = (key, value)
+        pos = _skip(text, pos, _SPACE)
+        if text.startswith("}", pos):
+            return _InlineTable(entries), pos + 1
+        if not text.startswith(",", pos):
+            raise _Unsupported
+        pos += 1
+
+
+def _line_end(text: str, pos: int) -> tuple[str | None, int]:
+    """Parse an optional trailing comment; return it and the next line."""
+    comment, pos = _comment(text, _skip(text, pos, _SPACE))
+    if pos < len(text) and text[pos] != "\n":
+        raise _Unsupported
+    return comment, pos + 1
+
+
+class _Parser:
+    """Build a ``_Table`` tree plus header and footer comments."""
+
+    def __init__(self, text: str, comment_config: CommentConfiguration) -> None:
+        self.text = text
+        self.comment_config = comment_config
+        self.root = _Table(explicit=True)
+        self.header: list[str] = []
+        self.footer: list[str] = []
+        # Array elements the previous header was inside.
+        self._open: list[_Table] = []
+        self._previous: list[str] = []
+        self._reopened = self._arrays = False
+
+    def parse(self) -> None:
+        """Parse the whole document."""
+        text = self.text
+        pos = 0
+        table = self.root
+        pending: list[str] = []
+        at_top = self.comment_config.header
+        while pos < len(text):
+            end = text.find("\n", pos)
+            end = len(text) if end == -1 else end
+            line = text[pos:end].strip(_SPACE)
+            if line.startswith("#"):
+                if at_top:
+                    self.header.append(_format_comment(line))
+                elif self.comment_config.block:
+                    pending.append(_format_comment(line))
+                pos = end + 1
+                continue
+            at_top = False
+            if not line:
+                pending = []
+                pos = end + 1
+            elif text.startswith("[", pos):
+                table, pos = self._header(pos, end, pending)
+                pending = []
+            else:
+                entry, pos = self._entry(pos)
+                entry.comments, pending = pending, []
+                table.entries[_key_name(entry.key)] = entry
+        if self.comment_config.footer:
+            self.footer = pending
+
+    def _header(self, pos: int, end: int, comments: list[str]) -> tuple[_Table, int]:
+        """Parse a ``[table]`` or ``[[array]]`` header line.
+
+        Returns the table that the following keys belong to.
+        """
+        match = _HEADER.fullmatch(self.text, pos, end)
+        if match is None or len(match.group(1)) != len(match.group(3)):
+            raise _Unsupported
+        names = match.group(2).split(".")
+        *parents, name = names
+        parent = self.root
+        open_elements = []
+        existing = 0  # leading segments naming tables that already exist
+        for index, segment in enumerate(parents):
+            if existing == index and segment in parent.children:
+                existing += 1
+            parent = parent.children.setdefault(segment, _Table())
+            if parent.elements is not None:
+                # A sub-table of the last element; tomlkit mangles these
+                # unless they directly follow the element.
+                parent = parent.elements[-1]
+                if not any(parent is element for element in self._open):
+                    raise _Unsupported
+                open_elements.append(parent)
+        if name in parent.entries:
+            raise _Unsupported
+        if existing == len(parents) and name in parent.children:
+            existing += 1
+        # tomlkit files tables reopened out of order around arrays of
+        # tables differently from toml-sort's assumptions.
+        self._reopened |= names[:existing] != self._previous[:existing]
+        self._arrays |= len(match.group(1)) == 2
+        if self._reopened and self._arrays:
+            raise _Unsupported
+        self._previous = names
+        if len(match.group(1)) == 1:
+            table = parent.children.setdefault(name, _Table())
+            if table.explicit or table.children or table.elements is not None:
+                raise _Unsupported  # redeclared, or declared after a sub-table
+        else:
+            # toml-sort moves or drops comments around arrays of tables in
+            # ways that depend on tomlkit's tree; leave those to toml-sort.
+            if comments or (parent.comments and not parent.entries):
+                raise _Unsupported
+            array = parent.children.setdefault(name, _Table(elements=[]))
+            if array.elements is None:
+                raise _Unsupported
+            table = _Table()
+            array.elements.append(table)
+            open_elements.append(table)
+        self._open = open_elements
+        table.explicit = True
+        table.comment = match.group(4)
+        table.comments = comments
+        return table, end + 1
+
+    def _entry(self, pos: int) -> tuple[_Entry, int]:
+        """Parse a ``key = value`` line, which may span a multi-line array."""
+        match = _KEY.match(self.text, pos)
+        if match is None:
+            raise _Unsupported
+        value, pos = _value(self.text, match.end(), top=True)
+        comment, pos = _line_end(self.text, pos)
+        return _Entry(match.group(1), value, comment, []), pos
+
+
+class _Renderer:
+    """Emit a parsed tree in toml-sort's order and layout."""
+
+    def __init__(
+        self,
+        resolve: ConfigResolver,
+        comment_config: CommentConfiguration,
+        format_config: FormattingConfiguration,
+    ) -> None:
+        self.resolve = resolve
+        self.comment_config = comment_config
+        self.format_config = format_config
+        self.ignore_case = resolve(None).ignore_case
+        self.out: list[str] = []
+
+    def _inline(self, comment: str | None) -> str:
+        """Render a trailing comment, or nothing if inline comments are off."""
+        if comment is None or not self.comment_config.inline:
+            return ""
+        spaces = " " * self.format_config.spaces_before_inline_comment
+        return f"{spaces}{_format_comment(comment)}"
+
+    def _header_comment(self, comment: str | None) -> str:
+        """Render the trailing comment of a table header."""
+        return self._inline(comment)
+
+    def _ordered(
+        self, names: list[str], config: SortConfiguration, enabled: bool
+    ) -> list[str]:
+        """Order keys like ``TomlSort.sort_keys``: by name, then ``first``."""
+        if not enabled:
+            return names
+        first: dict[str, int] = {}
+        for index, name in enumerate(config.first):
+            first.setdefault(name, index)
+        last = len(config.first)
+        names = sorted(names, key=str.lower if self.ignore_case else None)
+        return sorted(names, key=lambda name: first.get(name, last))
+
+    def value(self, value: _Value, path: tuple[str, ...], depth: int = 0) -> str:
+        """Render ``value`` like ``TomlSort.sort_item``."""
+        if isinstance(value, _Array):
+            return self._array(value, path, depth)
+        if isinstance(value, _InlineTable):
+            return self._inline_table(value, path, depth)
+        return value
+
+    def _inline_table(
+        self, table: _InlineTable, path: tuple[str, ...], depth: int
+    ) -> str:
+        """Render an inline table like ``TomlSort.sort_inline_table``."""
+        config = self.resolve(path)
+        pairs = []
+        for name in self._ordered(list(table.entries), config, config.inline_tables):
+            key, value = table.entries[name]
+            pairs.append(f"{key} = {self.value(value, (*path, name), depth)}")
+        return f"{{{', '.join(pairs)}}}"
+
+    def _items(
+        self, array: _Array, path: tuple[str, ...], depth: int
+    ) -> list[tuple[str, _Item]]:
+        """Return the elements of ``array`` in toml-sort's order.
+
+        Each element comes with its rendered text, which is what
+        toml-sort sorts by.
+        """
+        inner = depth + 1 if array.multiline else depth
+        items = [(self.value(item.value, path, inner), item) for item in array.items]
+        if self.resolve(path).inline_arrays:
+            if self.ignore_case:
+                items.sort(key=lambda pair: pair[0].lower())
+            else:
+                items.sort(key=lambda pair: pair[0])
+        return items
+
+    def _array(self, array: _Array, path: tuple[str, ...], depth: int) -> str:
+        """Render an array like ``TomlSort.sort_array``.
+
+        Elements are sorted by their rendered text, and own-line comments
+        move with the element they precede.
+        """
+        items = self._items(array, path, depth)
+        inner = depth + 1 if array.multiline else depth
+        if not array.multiline:
+            return f"[{', '.join(text for text, _ in items)}]"
+        size = self.format_config.spaces_indent_inline_array
+        indent = "\n" + " " * size * inner
+        last = len(items) - 1
+        trailing = self.format_config.trailing_comma_inline_array
+        parts = []
+        for index, (text, item) in enumerate(items):
+            if self.comment_config.block:
+                parts.extend(f"{indent}{comment}" for comment in item.comments)
+            comma = "," if index < last or trailing else ""
+            parts.append(f"{indent}{text}{comma}{self._inline(item.comment)}")
+        closing = " " * size * depth
+        return f"[{''.join(parts)}\n{closing}]"
+
+    def _entries(self, table: _Table, path: tuple[str, ...]) -> None:
+        """Render the ``key = value`` lines of ``table``."""
+        config = self.resolve(path or None)
+        for name in self._ordered(list(table.entries), config, config.table_keys):
+            entry = table.entries[name]
+            self.out.extend(f"{comment}\n" for comment in entry.comments)
+            value = self.value(entry.value, (*path, name))
+            self.out.append(f"{entry.key} = {value}{self._inline(entry.comment)}\n")
+
+    def table(
+        self,
+        table: _Table,
+        path: tuple[str, ...],
+        names: tuple[str, ...],
+        target: _Table,
+    ) -> None:
+        """Render the keys, then the sub-tables, of ``table``.
+
+        ``names`` is the table's full name, used in headers. ``path`` is
+        the key path configs are looked up by; toml-sort 0.24 restarts it
+        at the array's own name inside each element of an array of tables.
+
+        ``target`` is the table toml-sort adds a sub-table's attached
+        comments to when ``table`` is implicit. Comments added to an
+        implicit table make tomlkit print its header, which this engine
+        does not reproduce.
+        """
+        self._entries(table, path)
+        config = self.resolve(path or None)
+        out = self.out
+        previous: _Table | None = None
+        for name in self._ordered(list(table.children), config, config.tables):
+            child = table.children[name]
+            child_path = (*path, name)
+            child_names = (*names, name)
+            header = ".".join(child_names)
+            if table.explicit:
+                target = table
+            elif previous is not None:
+                target = table if previous.elements is not None else previous
+            if child.comments and not target.explicit:
+                raise _Unsupported
+            previous = child
+            if child.elements is not None:
+                for element in child.elements:
+                    suffix = self._header_comment(element.comment)
+                    out.append(f"\n[[{header}]]{suffix}\n")
+                    self.table(element, (name,), child_names, element)
+                continue
+            if child.explicit:
+                out.append("\n")
+                out.extend(f"{comment}\n" for comment in child.comments)
+                out.append(f"[{header}]{self._header_comment(child.comment)}\n")
+            self.table(child, child_path, child_names, target)
+
+
+class _TaploRenderer(_Renderer):
+    """Emit a parsed tree as toml-sort would, then taplo would format it.
+
+    The layout is taplo 0.9's under pypfmt's default ``TAPLO_OPTIONS``:
+    inline tables get inner spaces; arrays longer than the column width
+    expand, and then so do all arrays nested in them; multi-line arrays
+    are re-indented with a trailing comma, and expand their nested arrays
+    too once any of their rows is too long; and the trailing comments of
+    a run of consecutive rows are aligned one space past the longest row,
+    unless one of the rows spans several lines. Blank lines, own-line
+    comments and headers end a run. Widths count characters, including a
+    row's comma and aligned comment.
+    """
+
+    def _header_comment(self, comment: str | None) -> str:
+        """Render a header comment, which taplo never aligns."""
+        comment = self._comment(comment)
+        return "" if comment is None else f" {comment}"
+
+    def _comment(self, comment: str | None) -> str | None:
+        """Return the trailing comment toml-sort would keep, if any."""
+        if comment is None or not self.comment_config.inline:
+            return None
+        return _format_comment(comment)
+
+    def _align(self, rows: list[tuple[str, str | None]], lines: list[str]) -> None:
+        """Append a run of ``rows``, aligning their comments if possible."""
+        if any("\n" in text for text, _ in rows):
+            width = 0
+        else:
+            width = max((len(text) for text, _ in rows), default=0)
+        for text, comment in rows:
+            lines.append(text if comment is None else f"{text:<{width}} {comment}")
+        rows.clear()
+
+    def _layout(
+        self,
+        value: _Value,
+        path: tuple[str, ...],
+        level: int,
+        used: int,
+        *,
+        force: bool,
+    ) -> str:
+        """Lay out ``value`` on a row that has ``used`` other characters.
+
+        ``force`` expands every array, as taplo does inside an array that
+        was too long for one line.
+        """
+        if isinstance(value, _Array):
+            return self._layout_array(value, path, level, used, force=force)
+        if isinstance(value, _InlineTable):
+            text, nested = self._inline_text(value, path)
+            # taplo splits an inline table around arrays it expands.
+            if nested and (force or used + len(text) > _COLUMN_WIDTH):
+                raise _Unsupported
+            return text
+        return value
+
+    def _inline_text(self, value: _Value, path: tuple[str, ...]) -> tuple[str, bool]:
+        """Render ``value`` on one line; also report whether it holds arrays."""
+        if isinstance(value, _Array):
+            if value.multiline:
+                raise _Unsupported
+            texts = [
+                self._inline_text(item.value, path)[0]
+                for _, item in self._items(value, path, 0)
+            ]
+            return f"[{', '.join(texts)}]", True
+        if isinstance(value, _InlineTable):
+            config = self.resolve(path)
+            names = self._ordered(list(value.entries), config, config.inline_tables)
+            if not names:
+                return "{}", False
+            pairs = []
+            nested = False
+            for name in names:
+                key, item = value.entries[name]
+                text, has_array = self._inline_text(item, (*path, name))
+                nested |= has_array
+                pairs.append(f"{key} = {text}")
+            return f"{{ {', '.join(pairs)} }}", nested
+        return value, False
+
+    def _too_wide(
+        self, items: list[tuple[str, _Item]], path: tuple[str, ...], indent: str
+    ) -> bool:
+        """Whether a row of ``items``, each kept on one line, is too long.
+
+        Rows are measured with their comments aligned, run by run; one row
+        over the column width makes taplo expand every nested array.
+        """
+        run: list[tuple[int, str | None]] = []
+        runs = [run]
+        for _, item in items:
+            if self.comment_config.block and item.comments:
+                run = []
+                runs.append(run)
+            text, _ = self._inline_text(item.value, path)
+            run.append((len(indent) + len(text) + 1, self._comment(item.comment)))
+        for run in runs:
+            width = max((length for length, _ in run), default=0)
+            if any(width + _width(comment) > _COLUMN_WIDTH for _, comment in run):
+                return True
+        return False
+
+    def _layout_array(
+        self,
+        array: _Array,
+        path: tuple[str, ...],
+        level: int,
+        used: int,
+        *,
+        force: bool,
+    ) -> str:
+        """Lay out an array, expanding it if it does not fit on its row."""
+        items = self._items(array, path, level)
+        if not array.multiline and not force:
+            texts = [self._inline_text(item.value, path)[0] for _, item in items]
+            text = f"[{', '.join(texts)}]"
+            if used + len(text) <= _COLUMN_WIDTH:
+                return text
+            force = True
+        indent = _INDENT * (level + 1)
+        force = force or self._too_wide(items, path, indent)
+        lines = ["["]
+        rows: list[tuple[str, str | None]] = []
+        for _, item in items:
+            if self.comment_config.block and item.comments:
+                self._align(rows, lines)
+                lines.extend(f"{indent}{comment}" for comment in item.comments)
+            comment = self._comment(item.comment)
+            suffix = 1 + _width(comment)
+            text = self._layout(
+                item.value, path, level + 1, len(indent) + suffix, force=force
+            )
+            rows.append((f"{indent}{text},", comment))
+        self._align(rows, lines)
+        lines.append(f"{_INDENT * level}]")
+        return "\n".join(lines)
+
+    def _entries(self, table: _Table, path: tuple[str, ...]) -> None:
+        """Render the ``key = value`` lines of ``table`` in taplo's layout."""
+        config = self.resolve(path or None)
+        lines: list[str] = []
+        rows: list[tuple[str, str | None]] = []
+        for name in self._ordered(list(table.entries), config, config.table_keys):
+            entry = table.entries[name]
+            if entry.comments:
+                self._align(rows, lines)
+                lines.extend(entry.comments)
+            comment = self._comment(entry.comment)
+            prefix = f"{entry.key} = "
+            used = len(prefix) + _width(comment)
+            text = prefix + self._layout(
+                entry.value, (*path, name), 0, used, force=False
+            )
+            rows.append((text, comment))
+        self._align(rows, lines)
+        self.out.extend(f"{line}\n" for line in lines)
+
+
+def _width(comment: str | None) -> int:
+    """Return how many characters a trailing comment adds to its row."""
+    return 0 if comment is None else len(comment) + 1
+
+
+def _render(
+    renderer: _Renderer, text: str, comment_config: CommentConfiguration
+) -> str | None:
+    """Parse ``text`` and render it with ``renderer``, or return ``None``."""
+    if "\r" in text:
+        return None
+    parser = _Parser(_clean(text), comment_config)
+    try:
+        parser.parse()
+    except _Unsupported:
+        return None
+    renderer.out.extend(f"{comment}\n" for comment in parser.header)
+    renderer.out.append("\n")
+    try:
+        renderer.table(parser.root, (), (), parser.root)
+    except _Unsupported:
+        return None
+    if parser.footer:
+        renderer.out.append("\n")
+        renderer.out.extend(f"{comment}\n" for comment in parser.footer)
+    return _clean("".join(renderer.out)) + "\n"
+
+
+def sort_native(
+    text: str,
+    resolve: ConfigResolver,
+    comment_config: CommentConfiguration,
+    format_config: FormattingConfiguration,
+) -> str | None:
+    """Sort ``text`` like toml-sort, if it is within the supported subset.
+
+    Args:
+        text: Valid TOML content.
+        resolve: Returns the effective sort configuration for a key path,
+            or the global configuration for ``None``; normally
+            ``TomlSort.sort_config`` of a sorter built with the same
+            configs.
+        comment_config: Comment handling configuration.
+        format_config: Formatting configuration.
+
+    Returns:
+        The sorted document, byte-identical to toml-sort's, or ``None``
+        when the document is outside the supported subset.
+    """
+    renderer = _Renderer(resolve, comment_config, format_config)
+    return _render(renderer, text, comment_config)
+
+
+def format_native(
+    text: str,
+    resolve: ConfigResolver,
+    comment_config: CommentConfiguration,
+    format_config: FormattingConfiguration,
+) -> str | None:
+    """Sort and format ``text`` in one pass, if it is within the subset.
+
+    Takes the same arguments as ``sort_native``.
+
+    Returns:
+        What taplo 0.9 would make of toml-sort's output under the default
+        ``TAPLO_OPTIONS``, or ``None`` when the document is outside the
+        subset ``sort_native`` handles or uses a layout corner this pass
+        does not reproduce.
+    """
+    renderer = _TaploRenderer(resolve, comment_config, format_config)
+    return _render(renderer, text, comment_config)
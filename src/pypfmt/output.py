@@ -0,0 +1,99 @@
+"""Write formatted files back to disk.
+
+A file is replaced atomically: the new content goes to a temporary file
+in the same directory, which is then renamed over the original, so
+readers and concurrent pypfmt runs see either the old or the new file,
+never a truncated one. The replacement keeps the original's permission
+bits. Files that already hold exactly the new bytes are not touched at
+all, so their inode and modification time stay put and file watchers,
+build tools and network filesystems see no change.
+
+``Messages`` collects per-file status lines so a whole run reports them
+with one write instead of one per file.
+"""
+
+from __future__ import annotations
+
+__all__ = ["Messages", "write_file"]
+
+import contextlib
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import TextIO
+
+
+def _encode(text: str) -> bytes:
+    """Encode ``text`` as ``Path.write_text`` would, newlines included."""
+    if os.linesep != "\n":  # pragma: no cover - Windows
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+def write_file(path: str, text: str) -> bool:
+    """Atomically replace the contents of ``path`` with ``text``.
+
+    Symlinks are followed, so the link stays a link and its target is
+    replaced.
+
+    Args:
+        path: Existing file to overwrite.
+        text: New content, written as UTF-8.
+
+    Returns:
+        ``True`` if the file was replaced, ``False`` if it already held
+        exactly these bytes and was left alone.
+
+    Raises:
+        OSError: If the file cannot be read or replaced. The original is
+            then unchanged and no temporary file is left behind.
+    """
+    data = _encode(text)
+    target = Path(path).resolve()
+    with target.open("rb") as current:
+        mode = os.fstat(current.fileno()).st_mode
+        if current.read() == data:
+            return False
+    fd, name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    temp = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        temp.chmod(stat.S_IMODE(mode))
+        temp.replace(target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            temp.unlink()
+        raise
+    return True
+
+
+class Messages:
+    """Status lines buffered for a single write.
+
+    Lines are written by ``flush``, or at once when ``buffered`` is false,
+    as long-running modes need.
+    """
+
+    def __init__(self, *, buffered: bool = True, stream: TextIO | None = None) -> None:
+        """Create a buffer writing to ``stream``, stderr by default."""
+        self._buffered = buffered
+        self._stream = stream
+        self._lines: list[str] = []
+
+    def add(self, line: str) -> None:
+        """Queue ``line``; a newline is appended."""
+        self._lines.append(f"{line}\n")
+        if not self._buffered:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write and forget the queued lines."""
+        if not self._lines:
+            return
+        stream = self._stream or sys.stderr
+        stream.write("".join(self._lines))
+        stream.flush()
+        self._lines.clear()
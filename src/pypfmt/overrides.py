@@ -0,0 +1,104 @@
+"""Precompiled lookup of per-table sort overrides.
+
+toml-sort resolves the override for a table path by checking for an
+exact key and then running ``fnmatch`` against every pattern in order,
+and it does so several times for every table, key and array it sorts.
+With hundreds of ``[tool.pypfmt]`` overrides that linear scan dominates
+sorting.
+
+``OverrideIndex`` compiles an override mapping once: exact paths go in a
+dict and every pattern is joined into a single regular expression whose
+alternatives are tried in mapping order, so the first matching
+pattern wins exactly as in toml-sort. Resolved paths are memoized, so
+repeated lookups are a single dict hit however large the override set.
+Indexes are cached by the contents of their mapping, so every document
+with the same overrides reuses one index, and a caller mutating its own
+mapping simply gets a new one.
+"""
+
+from __future__ import annotations
+
+__all__ = ["OverrideIndex", "compile_overrides"]
+
+import collections
+import fnmatch
+import os
+import re
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from toml_sort.tomlsort import SortOverrideConfiguration
+
+# Compiled indexes by the contents of their override mapping, least recently
+# used first.
+_INDEXES: collections.OrderedDict[str, OverrideIndex] = collections.OrderedDict()
+_MAX_INDEXES = 64
+_MAX_RESOLVED = 4096
+
+
+class OverrideIndex:
+    """Constant-time override lookup with toml-sort's matching rules.
+
+    An exact path match wins; otherwise the first pattern, in mapping
+    order, that matches the path under ``fnmatch`` rules (including its
+    case folding on Windows) applies.
+    """
+
+    def __init__(self, overrides: Mapping[str, SortOverrideConfiguration]) -> None:
+        """Compile ``overrides``, a mapping of table paths or globs."""
+        # A copy, so later changes to the caller's mapping cannot make the
+        # exact paths disagree with the compiled patterns.
+        self.overrides = dict(overrides)
+        self._configs = list(overrides.values())
+        # One named group per pattern; which group matched names the pattern.
+        # fnmatch.translate only emits non-capturing groups.
+        self._regex = (
+            re.compile(
+                "|".join(
+                    f"(?P<_{index}>{fnmatch.translate(os.path.normcase(pattern))})"
+                    for index, pattern in enumerate(overrides)
+                )
+            )
+            if overrides
+            else None
+        )
+        self._resolved: dict[str, SortOverrideConfiguration | None] = {}
+
+    def lookup(self, path: str) -> SortOverrideConfiguration | None:
+        """Return the override for the dotted table ``path``, or ``None``."""
+        try:
+            return self._resolved[path]
+        except KeyError:
+            pass
+        override = self.overrides.get(path)
+        if override is None and self._regex is not None:
+            match = self._regex.match(os.path.normcase(path))
+            if match is not None:
+                override = self._configs[int(cast("str", match.lastgroup)[1:])]
+        if len(self._resolved) >= _MAX_RESOLVED:
+            self._resolved.clear()
+        self._resolved[path] = override
+        return override
+
+
+def compile_overrides(
+    overrides: Mapping[str, SortOverrideConfiguration],
+) -> OverrideIndex:
+    """Return the index for ``overrides``, compiling it on first use.
+
+    Indexes are cached by the mapping's contents, in order, since the
+    first matching pattern wins.
+    """
+    # SortOverrideConfiguration is an unhashable dataclass; its repr
+    # covers every field, whatever the toml-sort release.
+    key = repr(tuple(overrides.items()))
+    index = _INDEXES.get(key)
+    if index is None:
+        index = _INDEXES[key] = OverrideIndex(overrides)
+        while len(_INDEXES) > _MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    else:
+        _INDEXES.move_to_end(key)
+    return index
@@ -0,0 +1,74 @@
+"""Ordered fan-out helpers shared by the file engine and the batch API."""
+
+from __future__ import annotations
+
+__all__ = ["TASKS_PER_WORKER", "chunked", "imap_ordered", "map_ordered"]
+
+import collections
+import itertools
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor, Future
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+TASKS_PER_WORKER = 4
+"""Tasks kept in flight per worker.
+
+Bounds memory on huge inputs while keeping every worker busy between
+result hand-offs.
+"""
+
+
+def chunked(items: Iterable[_T], sizes: Iterator[int]) -> Iterator[list[_T]]:
+    """Split ``items`` lazily into lists sized by successive ``sizes``."""
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, next(sizes))):
+        yield chunk
+
+
+def imap_ordered(
+    executor: Executor,
+    fn: Callable[[_T], _R],
+    items: Iterable[_T],
+    window: int,
+) -> Iterator[_R]:
+    """Map ``fn`` over ``items`` on ``executor``, yielding in input order.
+
+    Unlike ``Executor.map`` the input is consumed lazily with at most
+    ``window`` tasks in flight, so results start flowing before a slow or
+    unbounded ``items`` iterable is exhausted.
+    """
+    pending: collections.deque[Future[_R]] = collections.deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        while pending and (len(pending) >= window or pending[0].done()):
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def map_ordered(
+    task: Callable[[_T], _R], items: Iterable[_T], jobs: int
+) -> Iterator[_R]:
+    """Run ``task`` over ``items`` on ``jobs`` processes, in input order.
+
+    With ``jobs`` of 1 or less ``task`` runs in this process. Otherwise a
+    process pool is started for the iteration and shut down, cancelling
+    what is still queued, once the iterator is exhausted or closed.
+    """
+    if jobs <= 1:
+        yield from map(task, items)
+        return
+
+    # Deferred: multiprocessing is costly to import and serial runs skip it.
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        yield from imap_ordered(executor, task, items, jobs * TASKS_PER_WORKER)
+    finally:
+        executor.shutdown(cancel_futures=True)
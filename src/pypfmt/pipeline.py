@@ -2,19 +2,73 @@
 
 Chains TOML validation, sorting, and formatting into a single
 str -> str transformation. This is the public API for pypfmt.
+
+Callers that also need the document's ``[tool.pypfmt]`` config parse it
+once with ``parse_pyproject`` and pass the result to every stage, so the
+text is only run through ``tomllib`` a single time.
+
+Documents the pipeline has returned unchanged are remembered by
+fingerprint, so formatting a known fixed point again with the same
+config short-circuits after validation.
+
+Every stage can report its duration and input size to an ``on_stage``
+hook; see ``pypfmt.timing``.
+
+With ``sort_engine="fused"``, documents the native engine handles are
+sorted and formatted in a single pass, without running taplo at all.
+
+``format_pyproject_async`` is the asyncio variant: it runs the CPU-bound
+stages on a worker thread and taplo as an asyncio subprocess, so it never
+blocks the event loop.
+
+``format_many`` formats whole workspaces: defaults are resolved once,
+documents are batched into shared taplo runs, and batches can fan out to
+a process pool.
 """
 
 from __future__ import annotations
 
-__all__ = ["format_pyproject"]
+__all__ = [
+    "STAGES",
+    "ParsedPyproject",
+    "Profile",
+    "StageHook",
+    "StageTiming",
+    "format_many",
+    "format_pyproject",
+    "format_pyproject_async",
+    "is_fixed_point",
+    "parse_pyproject",
+    "record_fixed_point",
+    "sort_pyproject",
+    "timed_stage",
+]
 
+import collections
+import dataclasses
+import functools
+import hashlib
+import itertools
+import os
 import tomllib
-from typing import TYPE_CHECKING
+import weakref
+from typing import TYPE_CHECKING, Any, Literal, cast, overload
 
-from pypfmt.formatter import format_toml
-from pypfmt.sorter import sort_toml
+from pypfmt.config import (
+    detect_config_conflict,
+    extract_config,
+    get_sort_engine,
+    merge_config,
+)
+from pypfmt.formatter import TaploFormatter, format_toml, get_formatter
+from pypfmt.parallel import chunked, map_ordered
+from pypfmt.sorter import sort_and_format_toml, sort_toml
+from pypfmt.timing import STAGES, Profile, StageHook, StageTiming, timed_stage
 
 if TYPE_CHECKING:
+    import asyncio
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
     from toml_sort.tomlsort import (
         CommentConfiguration,
         FormattingConfiguration,
@@ -22,14 +76,180 @@ if TYPE_CHECKING:
         SortOverrideConfiguration,
     )
 
+    from pypfmt.config import MergedConfig
+
+# Fingerprints of known fixed points, least recently used first.
+_FIXED_POINTS: collections.OrderedDict[bytes, None] = collections.OrderedDict()
+_MAX_FIXED_POINTS = 4096
+
+# Default limit on documents in flight per event loop in the async API.
+_ASYNC_LIMITS: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def _fingerprint(text: str, config: MergedConfig | None) -> bytes:
+    """Return a compact fingerprint of ``text`` under ``config``."""
+    digest = hashlib.blake2b(repr(config).encode("utf-8"), digest_size=16)
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+
+def is_fixed_point(text: str, config: MergedConfig | None = None) -> bool:
+    """Whether ``text`` is known to come back unchanged under ``config``.
+
+    Args:
+        text: Raw pyproject.toml content.
+        config: Merged config the document is formatted with, or ``None``
+            for the hardcoded defaults.
+    """
+    fingerprint = _fingerprint(text, config)
+    if fingerprint not in _FIXED_POINTS:
+        return False
+    _FIXED_POINTS.move_to_end(fingerprint)
+    return True
+
+
+def record_fixed_point(text: str, config: MergedConfig | None = None) -> None:
+    """Remember that the pipeline returned ``text`` unchanged under ``config``.
+
+    Only record documents whose output was observed to equal the input;
+    ``is_fixed_point`` answers must match what the pipeline would return.
+    """
+    fingerprint = _fingerprint(text, config)
+    _FIXED_POINTS[fingerprint] = None
+    _FIXED_POINTS.move_to_end(fingerprint)
+    while len(_FIXED_POINTS) > _MAX_FIXED_POINTS:
+        _FIXED_POINTS.popitem(last=False)
+
+
+@dataclasses.dataclass(frozen=True)
+class ParsedPyproject:
+    """A pyproject.toml document that has been validated and parsed once.
+
+    Attributes:
+        text: The raw TOML content.
+        data: The ``tomllib`` parse of ``text``.
+    """
+
+    text: str
+    data: dict[str, Any]
+
+    @property
+    def user_config(self) -> dict[str, object] | None:
+        """The raw ``[tool.pypfmt]`` table, or ``None`` when absent."""
+        return extract_config(self.data)
+
+    @property
+    def conflict_warning(self) -> str | None:
+        """Warning for coexisting ``[tool.tomlsort]`` and ``[tool.pypfmt]``."""
+        return detect_config_conflict(self.data)
+
+    def merged_config(
+        self, inherited: Sequence[Mapping[str, object]] = ()
+    ) -> MergedConfig | None:
+        """Merge ``[tool.pypfmt]`` with the defaults.
+
+        Args:
+            inherited: Config layers from the directories above the
+                document, outermost first; see ``inherited_config``.
+
+        Returns:
+            The merged config, or ``None`` when neither the document nor
+            ``inherited`` has any settings and the defaults apply.
+
+        Raises:
+            ValueError: If ``[tool.pypfmt]`` contains an invalid override.
+        """
+        user_config = self.user_config
+        if user_config is None and not inherited:
+            return None
+        return merge_config(user_config or {}, inherited)
+
+    def sort_engine(self, inherited: Sequence[Mapping[str, object]] = ()) -> str:
+        """Return the sort engine selected by ``[tool.pypfmt] sort-engine``.
+
+        Raises:
+            ValueError: If ``sort-engine`` names an unknown engine.
+        """
+        return get_sort_engine(self.user_config, inherited)
+
+
+def parse_pyproject(text: str, on_stage: StageHook | None = None) -> ParsedPyproject:
+    """Validate and parse ``text`` for use by the rest of the pipeline.
+
+    Args:
+        text: Raw pyproject.toml content.
+        on_stage: Hook receiving the ``parse`` stage timing, or None.
+
+    Raises:
+        tomllib.TOMLDecodeError: If the input is not valid TOML.
+    """
+    with timed_stage(on_stage, "parse", text):
+        return ParsedPyproject(text, tomllib.loads(text))
+
+
+def sort_pyproject(
+    text: str | ParsedPyproject,
+    sort_config: SortConfiguration | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
+    comment_config: CommentConfiguration | None = None,
+    format_config: FormattingConfiguration | None = None,
+    on_stage: StageHook | None = None,
+    sort_engine: str = "toml-sort",
+) -> str:
+    """Run the validate and sort stages of the pipeline.
+
+    Callers that format many documents use this to collect sorted text
+    and hand it to ``TaploFormatter.format_many`` in one batch.
+
+    Args:
+        text: Raw pyproject.toml content, or a ``ParsedPyproject`` that
+            has already been validated.
+        sort_config: Global sort configuration, or None for defaults.
+        sort_overrides: Per-table sort overrides, or None for defaults.
+        comment_config: Comment handling configuration, or None for defaults.
+        format_config: Formatting configuration, or None for defaults.
+        on_stage: Hook receiving per-stage timings, or None.
+        sort_engine: ``"toml-sort"``, ``"native"`` or ``"fused"``; see
+            ``sort_toml``.
+
+    Returns:
+        The sorted, not yet formatted, TOML string.
+
+    Raises:
+        tomllib.TOMLDecodeError: If the input is not valid TOML.
+    """
+    # Validate input -- let TOMLDecodeError propagate naturally
+    document = (
+        text
+        if isinstance(text, ParsedPyproject)
+        else parse_pyproject(text, on_stage=on_stage)
+    )
+
+    # Stage 1: Sort tables and keys
+    with timed_stage(on_stage, "sort", document.text):
+        return sort_toml(
+            document.text,
+            sort_config=sort_config,
+            sort_overrides=sort_overrides,
+            comment_config=comment_config,
+            format_config=format_config,
+            engine=sort_engine,
+        )
+
 
 def format_pyproject(
-    text: str,
+    text: str | ParsedPyproject,
     sort_config: SortConfiguration | None = None,
-    sort_overrides: dict[str, SortOverrideConfiguration] | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
     comment_config: CommentConfiguration | None = None,
     format_config: FormattingConfiguration | None = None,
     taplo_options: tuple[str, ...] | None = None,
+    formatter: TaploFormatter | None = None,
+    on_stage: StageHook | None = None,
+    sort_engine: str = "toml-sort",
 ) -> str:
     """Format a pyproject.toml string through the full pipeline.
 
@@ -39,12 +259,20 @@ def format_pyproject(
     When config parameters are ``None``, hardcoded defaults are used.
 
     Args:
-        text: Raw pyproject.toml content as a string.
+        text: Raw pyproject.toml content, or a ``ParsedPyproject`` that
+            has already been validated.
         sort_config: Global sort configuration, or None for defaults.
         sort_overrides: Per-table sort overrides, or None for defaults.
         comment_config: Comment handling configuration, or None for defaults.
         format_config: Formatting configuration, or None for defaults.
         taplo_options: taplo -o key=value pairs, or None for defaults.
+        formatter: taplo backend to reuse, or None for the shared default.
+        on_stage: Hook receiving ``(stage, seconds, nbytes)`` after each
+            stage, e.g. a ``Profile``; None disables timing.
+        sort_engine: ``"toml-sort"``, ``"native"`` or ``"fused"``; all
+            produce the same output. ``"fused"`` sorts and formats in one
+            pass when it can (see ``sort_and_format_toml``) and otherwise
+            behaves like ``"native"``.
 
     Returns:
         The sorted and formatted TOML string.
@@ -53,17 +281,344 @@ def format_pyproject(
         tomllib.TOMLDecodeError: If the input is not valid TOML.
         RuntimeError: If taplo binary is not found or formatting fails.
     """
-    # Validate input -- let TOMLDecodeError propagate naturally
-    tomllib.loads(text)
+    document = (
+        text
+        if isinstance(text, ParsedPyproject)
+        else parse_pyproject(text, on_stage=on_stage)
+    )
+    parts = (sort_config, sort_overrides, comment_config, format_config, taplo_options)
+    config = (
+        None if all(part is None for part in parts) else cast("MergedConfig", parts)
+    )
+    if is_fixed_point(document.text, config):
+        return document.text
 
-    # Stage 1: Sort tables and keys
-    sorted_text = sort_toml(
-        text,
-        sort_config=sort_config,
-        sort_overrides=sort_overrides,
-        comment_config=comment_config,
-        format_config=format_config,
+    result = None
+    if sort_engine == "fused" and formatter is None:
+        with timed_stage(on_stage, "fused", document.text):
+            result = sort_and_format_toml(
+                document.text,
+                sort_config=sort_config,
+                sort_overrides=sort_overrides,
+                comment_config=comment_config,
+                format_config=format_config,
+                taplo_options=taplo_options,
+            )
+    if result is None:
+        sorted_text = sort_pyproject(
+            document,
+            sort_config=sort_config,
+            sort_overrides=sort_overrides,
+            comment_config=comment_config,
+            format_config=format_config,
+            on_stage=on_stage,
+            sort_engine=sort_engine,
+        )
+
+        # Stage 2: Format whitespace and style
+        with timed_stage(on_stage, "format", sorted_text):
+            result = format_toml(
+                sorted_text, taplo_options=taplo_options, formatter=formatter
+            )
+    if result == document.text:
+        record_fixed_point(result, config)
+    return result
+
+
+def _async_limit() -> asyncio.Semaphore:
+    """Return the running loop's default semaphore, one slot per CPU."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    if (limit := _ASYNC_LIMITS.get(loop)) is None:
+        limit = _ASYNC_LIMITS[loop] = asyncio.Semaphore(os.cpu_count() or 1)
+    return limit
+
+
+async def format_pyproject_async(
+    text: str | ParsedPyproject,
+    sort_config: SortConfiguration | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
+    comment_config: CommentConfiguration | None = None,
+    format_config: FormattingConfiguration | None = None,
+    taplo_options: tuple[str, ...] | None = None,
+    formatter: TaploFormatter | None = None,
+    on_stage: StageHook | None = None,
+    limit: asyncio.Semaphore | None = None,
+) -> str:
+    """Format a pyproject.toml string without blocking the event loop.
+
+    Produces exactly what ``format_pyproject`` does. Parsing and sorting
+    run in the default executor's worker threads and taplo runs as an
+    asyncio subprocess. Cancelling the awaiting task kills a running
+    taplo process; a sort already under way finishes in its thread and
+    its result is discarded.
+
+    Args:
+        text: Raw pyproject.toml content, or a ``ParsedPyproject`` that
+            has already been validated.
+        sort_config: Global sort configuration, or None for defaults.
+        sort_overrides: Per-table sort overrides, or None for defaults.
+        comment_config: Comment handling configuration, or None for defaults.
+        format_config: Formatting configuration, or None for defaults.
+        taplo_options: taplo -o key=value pairs, or None for defaults.
+        formatter: taplo backend to reuse, or None for the shared default.
+        on_stage: Hook receiving ``(stage, seconds, nbytes)`` after each
+            stage, or None. It may be called from a worker thread.
+        limit: Semaphore bounding how many documents are formatted at
+            once, or None for a per-event-loop default of one per CPU.
+
+    Returns:
+        The sorted and formatted TOML string.
+
+    Raises:
+        tomllib.TOMLDecodeError: If the input is not valid TOML.
+        RuntimeError: If taplo binary is not found or formatting fails.
+    """
+    # Deferred: asyncio is costly to import and only async callers need it.
+    import asyncio
+
+    async with limit or _async_limit():
+        document = (
+            text
+            if isinstance(text, ParsedPyproject)
+            else await asyncio.to_thread(parse_pyproject, text, on_stage)
+        )
+        parts = (
+            sort_config,
+            sort_overrides,
+            comment_config,
+            format_config,
+            taplo_options,
+        )
+        # The fixed-point memo is only touched from the event loop thread.
+        config = _config_key(parts)
+        if is_fixed_point(document.text, config):
+            return document.text
+
+        sorted_text = await asyncio.to_thread(
+            sort_pyproject,
+            document,
+            sort_config=sort_config,
+            sort_overrides=sort_overrides,
+            comment_config=comment_config,
+            format_config=format_config,
+            on_stage=on_stage,
+        )
+        with timed_stage(on_stage, "format", sorted_text):
+            result = await (formatter or get_formatter()).format_async(
+                sorted_text, taplo_options
+            )
+    if result == document.text:
+        record_fixed_point(result, config)
+    return result
+
+
+def _config_key(parts: tuple[object, ...]) -> MergedConfig | None:
+    """Return the fixed-point key for explicit config ``parts``."""
+    return None if all(part is None for part in parts) else cast("MergedConfig", parts)
+
+
+def _format_batch(
+    documents: list[str | ParsedPyproject],
+    config: MergedConfig | None,
+    resolved: MergedConfig,
+    formatter: TaploFormatter,
+    timed: bool,
+) -> tuple[list[str | Exception], list[StageTiming]]:
+    """Format one batch of documents with a single taplo run.
+
+    This is the unit of work submitted to pool workers, so it must stay a
+    picklable module-level function. Failures are returned in place of
+    the document's output rather than raised, so one bad document does
+    not lose the rest of the batch.
+
+    Args:
+        documents: Raw or parsed documents.
+        config: The caller's config parts, keying the fixed-point memo.
+        resolved: The same config with defaults filled in.
+        formatter: taplo backend.
+        timed: Whether to collect stage timings.
+
+    Returns:
+        The outputs (formatted text or exception) in input order, and
+        the stage timings of the whole batch.
+    """
+    timings: list[StageTiming] = []
+    on_stage = (lambda *timing: timings.append(StageTiming(*timing))) if timed else None
+    sort_cfg, overrides, comment_cfg, format_cfg, taplo_opts = resolved
+
+    outputs: list[str | Exception] = []
+    pending: list[tuple[int, str, str]] = []  # (index, original, sorted)
+    for document in documents:
+        try:
+            if not isinstance(document, ParsedPyproject):
+                document = parse_pyproject(document, on_stage=on_stage)
+            if is_fixed_point(document.text, config):
+                outputs.append(document.text)
+                continue
+            sorted_text = sort_pyproject(
+                document,
+                sort_config=sort_cfg,
+                sort_overrides=overrides,
+                comment_config=comment_cfg,
+                format_config=format_cfg,
+                on_stage=on_stage,
+            )
+        except Exception as exc:  # handed back to the caller
+            outputs.append(exc)
+            continue
+        pending.append((len(outputs), document.text, sorted_text))
+        outputs.append("")  # placeholder until the taplo run below
+
+    if not pending:
+        return outputs, timings
+    sorted_texts = [sorted_text for _, _, sorted_text in pending]
+    with timed_stage(on_stage, "format", "".join(sorted_texts)):
+        try:
+            formatted: list[str | Exception] = list(
+                formatter.format_many(sorted_texts, taplo_opts)
+            )
+        except RuntimeError:
+            # Attribute the failure to the document(s) that caused it.
+            formatted = []
+            for sorted_text in sorted_texts:
+                try:
+                    formatted.append(formatter.format(sorted_text, taplo_opts))
+                except RuntimeError as exc:
+                    formatted.append(exc)
+    for (index, original, _), output in zip(pending, formatted, strict=True):
+        outputs[index] = output
+        if output == original:
+            record_fixed_point(original, config)
+    return outputs, timings
+
+
+@overload
+def format_many(
+    texts: Iterable[str | ParsedPyproject],
+    sort_config: SortConfiguration | None = ...,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = ...,
+    comment_config: CommentConfiguration | None = ...,
+    format_config: FormattingConfiguration | None = ...,
+    taplo_options: tuple[str, ...] | None = ...,
+    formatter: TaploFormatter | None = ...,
+    *,
+    jobs: int = ...,
+    batch_size: int = ...,
+    return_exceptions: Literal[False] = ...,
+    on_stage: StageHook | None = ...,
+) -> Iterator[str]: ...
+
+
+@overload
+def format_many(
+    texts: Iterable[str | ParsedPyproject],
+    sort_config: SortConfiguration | None = ...,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = ...,
+    comment_config: CommentConfiguration | None = ...,
+    format_config: FormattingConfiguration | None = ...,
+    taplo_options: tuple[str, ...] | None = ...,
+    formatter: TaploFormatter | None = ...,
+    *,
+    jobs: int = ...,
+    batch_size: int = ...,
+    return_exceptions: Literal[True],
+    on_stage: StageHook | None = ...,
+) -> Iterator[str | Exception]: ...
+
+
+def format_many(
+    texts: Iterable[str | ParsedPyproject],
+    sort_config: SortConfiguration | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
+    comment_config: CommentConfiguration | None = None,
+    format_config: FormattingConfiguration | None = None,
+    taplo_options: tuple[str, ...] | None = None,
+    formatter: TaploFormatter | None = None,
+    *,
+    jobs: int = 1,
+    batch_size: int = 16,
+    return_exceptions: bool = False,
+    on_stage: StageHook | None = None,
+) -> Iterator[str] | Iterator[str | Exception]:
+    """Format many pyproject.toml documents with one shared configuration.
+
+    Equivalent to calling ``format_pyproject`` on each document, but the
+    default configs are resolved once for the whole call, documents are
+    formatted in batches of ``batch_size`` with one taplo process per
+    batch, and batches can run on a pool of worker processes. ``texts``
+    is consumed lazily, so results start flowing before it is exhausted.
+
+    Args:
+        texts: Raw pyproject.toml contents, or ``ParsedPyproject``
+            documents that have already been validated.
+        sort_config: Global sort configuration, or None for defaults.
+        sort_overrides: Per-table sort overrides, or None for defaults.
+        comment_config: Comment handling configuration, or None for defaults.
+        format_config: Formatting configuration, or None for defaults.
+        taplo_options: taplo -o key=value pairs, or None for defaults.
+        formatter: taplo backend to reuse, or None for the shared default.
+        jobs: Number of worker processes. ``1`` formats in-process.
+        batch_size: Documents per taplo run (and per pool task).
+        return_exceptions: Yield a document's exception in place of its
+            output instead of raising it.
+        on_stage: Hook receiving per-stage timings, or None. With
+            ``jobs > 1`` it is called in this process once each batch
+            completes.
+
+    Yields:
+        Formatted documents (or exceptions), in the order of ``texts``.
+
+    Raises:
+        tomllib.TOMLDecodeError: If a document is not valid TOML, unless
+            ``return_exceptions`` is set. Earlier documents have already
+            been yielded.
+        RuntimeError: If taplo is not found or fails on a document,
+            unless ``return_exceptions`` is set.
+        ValueError: If ``jobs`` or ``batch_size`` is less than 1.
+    """
+    if jobs < 1 or batch_size < 1:
+        msg = "jobs and batch_size must be at least 1"
+        raise ValueError(msg)
+    parts = (sort_config, sort_overrides, comment_config, format_config, taplo_options)
+    defaults = merge_config({})
+    resolved: MergedConfig = (
+        sort_config or defaults[0],
+        sort_overrides or defaults[1],
+        comment_config or defaults[2],
+        format_config or defaults[3],
+        cast("tuple[str, ...]", taplo_options),
     )
+    task = functools.partial(
+        _format_batch,
+        config=_config_key(parts),
+        resolved=resolved,
+        formatter=formatter or get_formatter(),
+        timed=on_stage is not None,
+    )
+    batches = chunked(texts, itertools.repeat(batch_size))
+    return _drain(task, batches, jobs, return_exceptions, on_stage)
+
 
-    # Stage 2: Format whitespace and style
-    return format_toml(sorted_text, taplo_options=taplo_options)
+def _drain(
+    task: functools.partial[tuple[list[str | Exception], list[StageTiming]]],
+    batches: Iterator[list[str | ParsedPyproject]],
+    jobs: int,
+    return_exceptions: bool,
+    on_stage: StageHook | None,
+) -> Iterator[str | Exception]:
+    """Run ``task`` over ``batches`` and yield the outputs in order."""
+    results = map_ordered(task, batches, jobs)
+    try:
+        for outputs, timings in results:
+            if on_stage is not None:
+                for timing in timings:
+                    on_stage(*timing)
+            for output in outputs:
+                if isinstance(output, Exception) and not return_exceptions:
+                    raise output
+                yield output
+    finally:
+        # Shuts the pool down even when an exception or the caller stops us.
+        results.close()
@@ -0,0 +1,42 @@
+"""Per-file formatting result shared by the engine and its callers.
+
+Kept free of pipeline imports so the CLI can turn daemon responses into
+results without loading toml-sort.
+"""
+
+from __future__ import annotations
+
+__all__ = ["FileResult"]
+
+import dataclasses
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pypfmt.timing import StageTiming
+
+
+@dataclasses.dataclass(frozen=True)
+class FileResult:
+    """Outcome of running one input through the pipeline.
+
+    Attributes:
+        path: Filesystem path or display label (e.g. ``"stdin"``).
+        original: Content as read, or ``None`` if it could not be read.
+        formatted: Pipeline output, or ``None`` when ``error`` is set.
+        error: Message for the ``error: <path>: ...`` line, if any.
+        warning: Config conflict warning to report before anything else.
+        timings: Stage timings of the document, in pipeline order. Not
+            part of equality, so results compare by outcome only.
+    """
+
+    path: str
+    original: str | None = None
+    formatted: str | None = None
+    error: str | None = None
+    warning: str | None = None
+    timings: tuple[StageTiming, ...] = dataclasses.field(default=(), compare=False)
+
+    @property
+    def changed(self) -> bool:
+        """Whether formatting produced different content."""
+        return self.formatted is not None and self.formatted != self.original
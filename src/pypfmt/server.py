@@ -0,0 +1,276 @@
+"""Long-running formatting daemon on a local Unix socket.
+
+Started with ``pypfmt --serve``. The daemon keeps the interpreter, the
+imported pipeline, merged configs, known fixed points and the taplo
+backend warm, so editor integrations and hooks pay only for a socket
+round trip per document instead of a full interpreter start.
+
+The protocol is JSON lines: each request is one JSON object on its own
+line and is answered by exactly one JSON object line. A connection may
+carry any number of requests. Every response has ``"ok"``; when it is
+false, ``"message"`` explains the protocol error.
+
+``{"op": "hello", "protocol": 1}``
+    Handshake. Answers with ``protocol``, the daemon's pypfmt
+    ``version`` and its ``pid``. Clients should not use a daemon whose
+    protocol or version differs from their own.
+
+``{"op": "format" | "check" | "diff", "path": ..., "text": ...}``
+    Format ``text``, or the file at ``path`` when ``text`` is omitted.
+    The pypfmt CLI always sends ``text`` it read itself. Set
+    ``"hide_conflict_warning": true`` to suppress the
+    ``[tool.tomlsort]``/``[tool.pypfmt]`` conflict warning, as
+    ``PPF_HIDE_CONFLICT_WARNING`` does for the client; the daemon's own
+    environment does not matter.
+    ``path`` is always required and labels the result. Answers with
+    ``path``, ``changed``, ``error`` and ``warning``; ``format`` adds
+    ``formatted`` (plus ``original`` when the file was read from disk)
+    and ``diff`` adds the ``diff``, in the request's ``diff_format``:
+    ``"unified"`` (the default), ``"json"`` or ``"stat"``, rendered as
+    ``pypfmt --diff-format`` does. The daemon never writes files.
+
+This module needs Unix domain sockets and cannot be imported on Windows.
+"""
+
+from __future__ import annotations
+
+__all__ = ["DaemonServer", "handle_request", "serve"]
+
+import contextlib
+import json
+import os
+import socketserver
+import stat
+import threading
+from typing import TYPE_CHECKING, Any
+
+from pypfmt import __version__
+from pypfmt.choices import DIFF_FORMATS
+from pypfmt.client import PROTOCOL_VERSION, DaemonClient, is_private, socket_path
+from pypfmt.diff import diff_stat, json_diff, unified_diff
+from pypfmt.engine import format_file, format_text
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from pypfmt.cache import FormatCache
+    from pypfmt.engine import FileResult
+
+_FORMAT_OPS = frozenset({"format", "check", "diff"})
+
+_HIDE_WARNING_ENV = "PPF_HIDE_CONFLICT_WARNING"
+
+
+@contextlib.contextmanager
+def _conflict_warnings(hide: bool) -> Iterator[None]:
+    """Apply a request's ``hide_conflict_warning`` for its duration.
+
+    The pipeline reads the setting from the environment. Requests are
+    dispatched one at a time, so swapping it per request is safe.
+    """
+    saved = os.environ.get(_HIDE_WARNING_ENV)
+    if hide:
+        os.environ[_HIDE_WARNING_ENV] = "1"
+    else:
+        os.environ.pop(_HIDE_WARNING_ENV, None)
+    try:
+        yield
+    finally:
+        if saved is None:
+            os.environ.pop(_HIDE_WARNING_ENV, None)
+        else:
+            os.environ[_HIDE_WARNING_ENV] = saved
+
+
+def _render_diff(original: str, formatted: str, filename: str, diff_format: str) -> str:
+    """Return the uncolored diff the CLI prints for ``diff_format``."""
+    if diff_format == "json":
+        return json_diff(original, formatted, filename)
+    if diff_format == "stat":
+        return diff_stat(original, formatted, filename)
+    return "".join(unified_diff(original, formatted, filename))
+
+
+def _format_response(
+    op: str, result: FileResult, read: bool, diff_format: str = "unified"
+) -> dict[str, Any]:
+    """Serialise ``result`` for a format, check or diff request."""
+    response: dict[str, Any] = {
+        "ok": True,
+        "path": result.path,
+        "changed": result.changed,
+        "error": result.error,
+        "warning": result.warning,
+    }
+    if op == "format":
+        response["formatted"] = result.formatted
+        if read:
+            response["original"] = result.original
+    elif op == "diff":
+        response["diff"] = (
+            _render_diff(
+                result.original or "", result.formatted or "", result.path, diff_format
+            )
+            if result.changed
+            else ""
+        )
+    return response
+
+
+def handle_request(
+    request: dict[str, Any], cache: FormatCache | None = None
+) -> dict[str, Any]:
+    """Answer one protocol request.
+
+    Args:
+        request: Decoded request object.
+        cache: Cache of known-formatted documents used for requests
+            that name a file on disk, or ``None`` to disable.
+
+    Returns:
+        The response object.
+    """
+    op = request.get("op")
+    if op == "hello":
+        return {
+            "ok": True,
+            "protocol": PROTOCOL_VERSION,
+            "version": __version__,
+            "pid": os.getpid(),
+        }
+    if op not in _FORMAT_OPS:
+        return {"ok": False, "message": f"unknown op: {op!r}"}
+    path = request.get("path")
+    text = request.get("text")
+    hide = request.get("hide_conflict_warning", False)
+    if not isinstance(path, str) or not isinstance(text, str | None):
+        return {"ok": False, "message": "'path' and 'text' must be strings"}
+    if not isinstance(hide, bool):
+        return {"ok": False, "message": "'hide_conflict_warning' must be a boolean"}
+    diff_format = request.get("diff_format", "unified")
+    if diff_format not in DIFF_FORMATS:
+        return {"ok": False, "message": f"unknown diff_format: {diff_format!r}"}
+    try:
+        with _conflict_warnings(hide):
+            result = (
+                format_file(path, cache)
+                if text is None
+                else format_text(text, path, cache=cache)
+            )
+    except RuntimeError as exc:
+        return {"ok": False, "message": str(exc)}
+    return _format_response(op, result, read=text is None, diff_format=diff_format)
+
+
+def _check_directory(directory: Path) -> None:
+    """Create ``directory`` private to the current user, or check it is.
+
+    Raises:
+        RuntimeError: If ``directory`` exists but is not a directory owned
+            by the current user and closed to everyone else.
+    """
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    with contextlib.suppress(FileExistsError):
+        directory.mkdir(mode=0o700)
+    info = directory.lstat()
+    if not (stat.S_ISDIR(info.st_mode) and is_private(info)):
+        msg = (
+            f"{directory} must be a directory owned by the current user "
+            "with no group or other permissions (chmod 700)"
+        )
+        raise RuntimeError(msg)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve the requests of one connection in order."""
+
+    server: DaemonServer
+
+    def handle(self) -> None:
+        """Answer request lines until the client disconnects."""
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "message": "invalid JSON"}
+            else:
+                if isinstance(request, dict):
+                    response = self.server.dispatch(request)
+                else:
+                    response = {"ok": False, "message": "request must be an object"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded socket server sharing one warm pipeline.
+
+    Connections are handled concurrently so one idle editor connection
+    cannot starve others, but requests are dispatched one at a time
+    because the in-process memo tables are not thread-safe.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: Path, cache: FormatCache | None = None) -> None:
+        """Bind to ``path``, replacing a stale socket left by a dead daemon.
+
+        The socket's directory is created private to the current user if
+        missing; clients refuse sockets anyone else could have planted.
+
+        Raises:
+            RuntimeError: If another daemon is already listening on ``path``,
+                the directory is not private to the current user or
+                ``path`` belongs to another user.
+        """
+        _check_directory(path.parent)
+        try:
+            existing = path.lstat()
+        except FileNotFoundError:
+            pass
+        else:
+            if existing.st_uid != os.getuid():
+                msg = f"{path} belongs to another user"
+                raise RuntimeError(msg)
+            if (client := DaemonClient.connect(path)) is not None:
+                client.close()
+                msg = f"a pypfmt daemon is already listening on {path}"
+                raise RuntimeError(msg)
+            path.unlink()
+        self.path = path
+        self.cache = cache
+        self._lock = threading.Lock()
+        old_umask = os.umask(0o077)  # the socket is private to this user
+        try:
+            super().__init__(str(path), _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer ``request`` while holding the pipeline lock."""
+        with self._lock:
+            return handle_request(request, self.cache)
+
+    def server_close(self) -> None:
+        """Stop listening and remove the socket file."""
+        super().server_close()
+        with contextlib.suppress(OSError):
+            self.path.unlink()
+
+
+def serve(path: Path | None = None, cache: FormatCache | None = None) -> None:
+    """Run the daemon in the foreground until interrupted.
+
+    Args:
+        path: Socket path, or ``None`` for the default location.
+        cache: Cache of known-formatted documents, or ``None`` to disable.
+
+    Raises:
+        RuntimeError: If another daemon is already running.
+    """
+    with (
+        DaemonServer(path or socket_path(), cache) as server,
+        contextlib.suppress(KeyboardInterrupt),
+    ):
+        server.serve_forever()
@@ -2,17 +2,40 @@
 
 Wraps TomlSort with configuration to produce a sorted TOML string.
 This is the first stage of the pipeline: sort tables and keys.
+
+toml-sort looks up the sort override of a table path for every table,
+key and array it visits. ``_IndexedTomlSort`` answers those lookups from
+a precompiled ``OverrideIndex`` and memoizes the merged per-path config,
+instead of scanning every override pattern and rebuilding the merged
+config with ``dataclasses.asdict`` on each call.
+
+With ``engine="native"``, documents within the subset handled by
+``pypfmt.native`` are sorted without building a tomlkit tree at all;
+the same sorter still supplies the per-path configs, and anything
+outside the subset falls back to toml-sort. The native engine mirrors
+toml-sort 0.24's output, so other toml-sort releases always take the
+toml-sort path.
+
+``sort_and_format_toml`` goes one step further for the ``fused`` engine:
+it emits the sorted tree directly in taplo's layout, skipping toml-sort's
+serialisation and taplo's re-parse. It only answers for the default taplo
+options and when the taplo binary that would format is release 0.9, whose
+output it reproduces; callers run the two stages as usual whenever it
+returns ``None``.
 """
 
 from __future__ import annotations
 
-__all__ = ["sort_toml"]
+__all__ = ["sort_and_format_toml", "sort_toml"]
 
-from typing import TYPE_CHECKING
+import functools
+from typing import TYPE_CHECKING, Any, cast
 
 from toml_sort import TomlSort
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from toml_sort.tomlsort import (
         CommentConfiguration,
         FormattingConfiguration,
@@ -20,20 +43,99 @@ if TYPE_CHECKING:
         SortOverrideConfiguration,
     )
 
-from pypfmt.config import (
-    get_comment_config,
-    get_format_config,
-    get_sort_config,
-    get_sort_overrides,
-)
+from pypfmt.config import TAPLO_OPTIONS, merge_config
+from pypfmt.formatter import get_formatter
+from pypfmt.native import format_native, sort_native
+from pypfmt.overrides import compile_overrides
+
+
+def _path_string(keys: Any) -> str:
+    """Return the dotted path toml-sort matches overrides against.
+
+    toml-sort 0.24 passes ``TomlSortKeys``; later releases pass a tuple
+    of key strings.
+    """
+    if isinstance(keys, tuple):
+        return ".".join(keys)
+    return cast("str", keys.as_string())
+
+
+class _IndexedTomlSort(TomlSort):
+    """TomlSort with indexed override lookup and memoized path configs."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Create the sorter; arguments are passed through to TomlSort."""
+        super().__init__(*args, **kwargs)
+        self._override_index = compile_overrides(self.sort_config_overrides)
+        self._path_configs: dict[str | None, SortConfiguration] = {}
+
+    def _find_config_override(self, keys: Any) -> SortOverrideConfiguration | None:
+        """Return the override for ``keys`` from the compiled index."""
+        if keys is None:
+            return None
+        return self._override_index.lookup(_path_string(keys))
+
+    def sort_config(self, keys: Any = None) -> SortConfiguration:
+        """Return the merged config for ``keys``, computed once per path."""
+        # The root (None) and a key named "" share the path string "".
+        path = None if keys is None else _path_string(keys)
+        config = self._path_configs.get(path)
+        if config is None:
+            config = self._path_configs[path] = super().sort_config(keys)
+        return config
+
+
+@functools.cache
+def _is_release(dist: str, prefix: str) -> bool:
+    """Whether the installed ``dist`` is a release the native engine mirrors."""
+    # Deferred: only runs once a document asks for the native engine.
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version(dist).startswith(prefix)
+    except PackageNotFoundError:
+        return False
+
+
+def _taplo_is_release(prefix: str) -> bool:
+    """Whether the taplo binary on PATH is a release the fused pass mirrors.
+
+    The binary can differ from the installed ``taplo`` distribution, and
+    it is the binary's output the fused pass has to match.
+    """
+    release = get_formatter().release
+    return release is not None and release.startswith(prefix)
+
+
+def _sorter(
+    text: str,
+    sort_config: SortConfiguration | None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None,
+    comment_config: CommentConfiguration | None,
+    format_config: FormattingConfiguration | None,
+) -> _IndexedTomlSort:
+    """Build the sorter for ``text``, filling in defaults for ``None``."""
+    defaults = merge_config({})
+    return _IndexedTomlSort(
+        input_toml=text,
+        sort_config=sort_config or defaults[0],
+        comment_config=comment_config or defaults[2],
+        format_config=format_config or defaults[3],
+        # TomlSort only reads the overrides, so a read-only mapping is fine.
+        sort_config_overrides=cast(
+            "dict[str, SortOverrideConfiguration]",
+            sort_overrides or defaults[1],
+        ),
+    )
 
 
 def sort_toml(
     text: str,
     sort_config: SortConfiguration | None = None,
-    sort_overrides: dict[str, SortOverrideConfiguration] | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
     comment_config: CommentConfiguration | None = None,
     format_config: FormattingConfiguration | None = None,
+    engine: str = "toml-sort",
 ) -> str:
     """Sort a TOML string using toml-sort.
 
@@ -45,16 +147,53 @@ def sort_toml(
         sort_overrides: Per-table sort overrides, or None for defaults.
         comment_config: Comment handling configuration, or None for defaults.
         format_config: Formatting configuration, or None for defaults.
+        engine: ``"toml-sort"``, or ``"native"`` (or ``"fused"``) to try
+            the line-level engine of ``pypfmt.native`` first. Both produce
+            identical output.
 
     Returns:
         The sorted TOML string with tables and keys reordered
         according to the configuration.
     """
-    sorter = TomlSort(
-        input_toml=text,
-        sort_config=sort_config or get_sort_config(),
-        comment_config=comment_config or get_comment_config(),
-        format_config=format_config or get_format_config(),
-        sort_config_overrides=sort_overrides or get_sort_overrides(),
-    )
+    sorter = _sorter(text, sort_config, sort_overrides, comment_config, format_config)
+    if engine in {"native", "fused"} and _is_release("toml-sort", "0.24."):
+        native = sort_native(
+            text, sorter.sort_config, sorter.comment_config, sorter.format_config
+        )
+        if native is not None:
+            return native
     return sorter.sorted()
+
+
+def sort_and_format_toml(
+    text: str,
+    sort_config: SortConfiguration | None = None,
+    sort_overrides: Mapping[str, SortOverrideConfiguration] | None = None,
+    comment_config: CommentConfiguration | None = None,
+    format_config: FormattingConfiguration | None = None,
+    taplo_options: tuple[str, ...] | None = None,
+) -> str | None:
+    """Sort and format a TOML string in one pass, without taplo.
+
+    Args:
+        text: Valid TOML content as a string.
+        sort_config: Global sort configuration, or None for defaults.
+        sort_overrides: Per-table sort overrides, or None for defaults.
+        comment_config: Comment handling configuration, or None for defaults.
+        format_config: Formatting configuration, or None for defaults.
+        taplo_options: taplo -o key=value pairs, or None for defaults.
+
+    Returns:
+        What ``format_toml(sort_toml(...), taplo_options)`` would return,
+        or ``None`` when the document, the taplo options, the installed
+        toml-sort release or the taplo binary's release are outside what
+        the fused pass reproduces.
+    """
+    if taplo_options not in (None, TAPLO_OPTIONS):
+        return None
+    if not (_is_release("toml-sort", "0.24.") and _taplo_is_release("0.9.")):
+        return None
+    sorter = _sorter(text, sort_config, sort_overrides, comment_config, format_config)
+    return format_native(
+        text, sorter.sort_config, sorter.comment_config, sorter.format_config
+    )
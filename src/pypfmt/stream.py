@@ -0,0 +1,106 @@
+"""Framed document streams for ``--stream``.
+
+A stream carries any number of pyproject documents over one pipe, so bulk
+tools can keep a single pypfmt process busy instead of starting one per
+document. Two framings are supported, the same in both directions:
+
+``nul``
+    Each document is followed by a NUL byte. Valid TOML never contains a
+    raw NUL, so no escaping is needed. The NUL after the last document
+    may be omitted.
+
+``length``
+    Each document is preceded by its size in bytes, as ASCII decimal
+    digits, and a newline.
+
+Frames are read incrementally, so memory stays bounded by the largest
+document rather than the whole stream. Like ``pypfmt.client``, this
+module only uses the standard library.
+"""
+
+from __future__ import annotations
+
+__all__ = ["FRAMINGS", "read_frames", "write_frame"]
+
+from typing import TYPE_CHECKING, BinaryIO
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+FRAMINGS = ("nul", "length")
+"""Framing names accepted by ``--stream``."""
+
+_CHUNK_SIZE = 64 * 1024
+
+# Longest accepted ``length`` header, newline included.
+_MAX_HEADER = 21
+
+
+def _read_chunk(stream: BinaryIO) -> bytes:
+    """Read whatever is available, without waiting for a full chunk."""
+    read1 = getattr(stream, "read1", None)
+    return read1(_CHUNK_SIZE) if read1 is not None else stream.read(_CHUNK_SIZE)
+
+
+def _read_nul_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield the NUL-terminated documents of ``stream``."""
+    buffer = bytearray()
+    while chunk := _read_chunk(stream):
+        # Only the new chunk can hold the next terminator.
+        start = len(buffer)
+        buffer += chunk
+        while (end := buffer.find(b"\0", start)) != -1:
+            yield bytes(buffer[:end])
+            del buffer[: end + 1]
+            start = 0
+    if buffer:
+        yield bytes(buffer)
+
+
+def _read_length_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield the length-prefixed documents of ``stream``.
+
+    Raises:
+        ValueError: If a header is malformed or a document is truncated.
+    """
+    while header := stream.readline(_MAX_HEADER):
+        digits = header.removesuffix(b"\n")
+        if digits == header or not digits.isdigit():
+            msg = f"invalid frame header {header[:20]!r}"
+            raise ValueError(msg)
+        size = int(digits)
+        data = stream.read(size)
+        if len(data) != size:
+            msg = f"truncated frame: expected {size} bytes, got {len(data)}"
+            raise ValueError(msg)
+        yield data
+
+
+def read_frames(stream: BinaryIO, framing: str) -> Iterator[bytes]:
+    """Yield the documents framed in ``stream`` as they arrive.
+
+    Args:
+        stream: Binary input, e.g. ``sys.stdin.buffer``.
+        framing: One of ``FRAMINGS``.
+
+    Raises:
+        ValueError: If a ``length`` frame is malformed or truncated.
+    """
+    if framing == "nul":
+        return _read_nul_frames(stream)
+    return _read_length_frames(stream)
+
+
+def write_frame(stream: BinaryIO, data: bytes, framing: str) -> None:
+    """Write one framed document to ``stream`` and flush it.
+
+    Args:
+        stream: Binary output, e.g. ``sys.stdout.buffer``.
+        data: The document's bytes.
+        framing: One of ``FRAMINGS``.
+    """
+    if framing == "nul":
+        stream.write(data + b"\0")
+    else:
+        stream.write(b"%d\n%s" % (len(data), data))
+    stream.flush()
@@ -0,0 +1,124 @@
+"""Per-stage timing of the formatting pipeline.
+
+Pipeline functions accept an optional ``on_stage`` hook that is called
+once per stage with the stage name, the wall-clock seconds it took and
+the size in bytes of the stage's input. ``Profile`` is a ready-made hook
+that aggregates those calls into a per-stage breakdown.
+
+The stages, in pipeline order, are listed in ``STAGES``. The ``sort``
+stage covers toml-sort's tree build and sort together, because both
+happen inside ``TomlSort.sorted()``. The ``fused`` stage is the single
+sort-and-format pass of the fused engine; documents it handles skip
+``sort`` and ``format``. When the engine formats a batch of documents
+with one taplo process, the batch's time is split evenly across its
+documents.
+
+This module has no pipeline dependencies, so results carrying timings
+can be handled without importing toml-sort.
+"""
+
+from __future__ import annotations
+
+__all__ = ["STAGES", "Profile", "StageHook", "StageStats", "StageTiming", "timed_stage"]
+
+import contextlib
+import dataclasses
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+STAGES = ("read", "parse", "config", "fused", "sort", "format")
+"""Stage names in pipeline order."""
+
+StageHook = Callable[[str, float, int], None]
+"""Signature of ``on_stage`` hooks: ``(stage, seconds, nbytes) -> None``."""
+
+
+class StageTiming(NamedTuple):
+    """Duration and input size of one stage for one document."""
+
+    stage: str
+    seconds: float
+    nbytes: int
+
+
+@contextlib.contextmanager
+def timed_stage(hook: StageHook | None, stage: str, text: str) -> Iterator[None]:
+    """Report the duration of the ``with`` body to ``hook`` as ``stage``.
+
+    Does nothing, not even read the clock, when ``hook`` is ``None``.
+
+    Args:
+        hook: Receives ``(stage, seconds, nbytes)``, or ``None``.
+        stage: Stage name, normally one of ``STAGES``.
+        text: The stage's input; its UTF-8 size is reported.
+    """
+    if hook is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hook(stage, time.perf_counter() - start, len(text.encode("utf-8")))
+
+
+@dataclasses.dataclass
+class StageStats:
+    """Totals for one stage across a run."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    nbytes: int = 0
+
+
+class Profile:
+    """Aggregate stage timings, e.g. across every file of a CLI run.
+
+    A ``Profile`` is itself an ``on_stage`` hook, so it can be passed
+    directly to ``format_pyproject``; timings already collected on
+    results are folded in with ``add``.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty profile."""
+        self.stages: dict[str, StageStats] = {}
+        self.documents = 0
+
+    def __call__(self, stage: str, seconds: float, nbytes: int) -> None:
+        """Record one stage run."""
+        stats = self.stages.setdefault(stage, StageStats())
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.nbytes += nbytes
+
+    def add(self, timings: Iterable[StageTiming]) -> None:
+        """Record the stage timings of one document."""
+        self.documents += 1
+        for timing in timings:
+            self(*timing)
+
+    def report(self) -> str:
+        """Render the per-stage breakdown as a plain-text table."""
+        order = [stage for stage in STAGES if stage in self.stages]
+        order += sorted(set(self.stages) - set(STAGES))
+        total = sum(stats.seconds for stats in self.stages.values())
+        lines = [
+            f"profile: {self.documents} document(s)",
+            f"{'stage':<8} {'calls':>6} {'total ms':>10} {'mean ms':>9} "
+            f"{'MB/s':>8} {'share':>6}",
+        ]
+        for stage in order:
+            stats = self.stages[stage]
+            mean = stats.seconds / stats.calls if stats.calls else 0.0
+            rate = stats.nbytes / stats.seconds / 1e6 if stats.seconds else 0.0
+            share = stats.seconds / total if total else 0.0
+            lines.append(
+                f"{stage:<8} {stats.calls:>6} {stats.seconds * 1000:>10.2f} "
+                f"{mean * 1000:>9.3f} {rate:>8.2f} {share:>6.1%}"
+            )
+        lines.append(f"{'total':<8} {'':>6} {total * 1000:>10.2f}")
+        return "\n".join(lines)
@@ -6,7 +6,10 @@
 # ///
 """Compute the version number and store it in the `__version__` variable.
 
-Based on <https://github.com/maresb/hatch-vcs-footgun-example>.
+Based on <https://github.com/maresb/hatch-vcs-footgun-example>, but
+installed package metadata is preferred: importing hatchling costs more
+than the rest of CLI startup, so it is only consulted when pypfmt runs
+from a source tree that was never installed.
 """
 
 import pathlib
@@ -38,7 +41,7 @@ def _get_hatch_version() -> str | None:
     return str(metadata.core.version or metadata.hatch.version.cached)
 
 
-def _get_importlib_metadata_version() -> str:
+def _get_importlib_metadata_version() -> str | None:
     """Compute the version number using importlib.metadata.
 
     This is the official Pythonic way to get the version number of an installed
@@ -47,11 +50,14 @@ def _get_importlib_metadata_version() -> str:
     then the version number will not be updated.
 
     Returns:
-        Version string from package metadata.
+        Version string from package metadata, or None if pypfmt is not installed.
     """
-    from importlib.metadata import version
+    from importlib.metadata import PackageNotFoundError, version
 
-    return version(__package__ or __name__)
+    try:
+        return version(__package__ or __name__)
+    except PackageNotFoundError:
+        return None
 
 
-__version__ = _get_hatch_version() or _get_importlib_metadata_version()
+__version__ = _get_importlib_metadata_version() or _get_hatch_version() or "0+unknown"
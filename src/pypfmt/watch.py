@@ -0,0 +1,230 @@
+"""Watch pyproject.toml files and reformat them as they change.
+
+The watcher polls instead of relying on platform notification APIs, so
+it behaves the same in containers, on network mounts and on every OS.
+Each tick costs one ``stat`` per watched file and per config file they
+inherit from; content is only read and hashed when the stat signature
+moves, and only files whose content hash changed go through the pipeline,
+together with the files inheriting from a changed config file. Directories
+are walked again only when one of them changed. The interpreter, config
+and taplo backend stay warm between events, so a save is picked up within
+one poll interval.
+"""
+
+from __future__ import annotations
+
+__all__ = ["POLL_INTERVAL", "RESCAN_INTERVAL", "Watcher"]
+
+import hashlib
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from pypfmt.config import clear_config_cache, config_files
+from pypfmt.discovery import discover
+from pypfmt.engine import format_files
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Sequence
+
+    from pypfmt.cache import FormatCache
+    from pypfmt.config import MergedConfig
+    from pypfmt.engine import FileResult
+
+POLL_INTERVAL = 0.05
+"""Seconds between stat sweeps of the watched files."""
+
+RESCAN_INTERVAL = 1.0
+"""Seconds between stat sweeps of the walked directories."""
+
+
+class _Stamp(NamedTuple):
+    """What the watcher last saw of a file."""
+
+    signature: tuple[int, int]  # (st_mtime_ns, st_size)
+    digest: bytes
+
+
+def _signature(path: str) -> tuple[int, int] | None:
+    """Return the stat signature of ``path``, or ``None`` if unreadable."""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _stamp(path: str) -> _Stamp | None:
+    """Stat and hash ``path``, or return ``None`` if it cannot be read."""
+    signature = _signature(path)
+    if signature is None:
+        return None
+    try:
+        digest = hashlib.blake2b(Path(path).read_bytes(), digest_size=16).digest()
+    except OSError:
+        return None
+    return _Stamp(signature, digest)
+
+
+class Watcher:
+    """Incremental reformatter for a fixed set of paths.
+
+    The directories walked for ``paths`` are stat-ed every
+    ``rescan_interval`` seconds and walked again when one of them
+    changed, so files created later are picked up and deleted files are
+    dropped. Explicit file paths are watched even while they are missing.
+    Unless ``config`` is given, the files each watched file inherits
+    config from are watched too, and an edit to one re-runs its
+    dependents.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        *,
+        exclude: Sequence[str] = (),
+        cache: FormatCache | None = None,
+        sort_engine: str | None = None,
+        config: MergedConfig | None = None,
+        rescan_interval: float = RESCAN_INTERVAL,
+    ) -> None:
+        """Create a watcher; nothing is read until the first ``poll``."""
+        self._paths = list(paths)
+        self._exclude = exclude
+        self._cache = cache
+        self._sort_engine = sort_engine
+        self._config = config
+        self._rescan_interval = rescan_interval
+        self._stamps: dict[str, _Stamp | None] = {}
+        self._directories: dict[str, tuple[int, int] | None] | None = None
+        self._configs: dict[str, _Stamp | None] = {}
+        self._dependents: dict[str, list[str]] = {}
+        self._next_scan = 0.0
+
+    def _tree_moved(self) -> bool:
+        """Whether a walked directory changed since it was walked."""
+        if self._directories is None:
+            return True
+        return any(
+            _signature(directory) != signature
+            for directory, signature in self._directories.items()
+        )
+
+    def _rescan(self) -> None:
+        """Refresh the set of watched files from ``paths``."""
+        directories: dict[str, tuple[int, int] | None] = {}
+
+        def visit(directory: str) -> None:
+            # Stat before listing, so entries added meanwhile move it.
+            directories[directory] = _signature(directory)
+
+        found = dict.fromkeys(discover(self._paths, self._exclude, on_directory=visit))
+        self._directories = directories
+        self._stamps = {path: self._stamps.get(path) for path in found}
+        if self._config is None:
+            # A new .git directory can cut inheritance chains short.
+            clear_config_cache()
+            self._track_configs()
+
+    def _track_configs(self) -> None:
+        """Map the config files of the watched files to their dependents."""
+        dependents: dict[str, list[str]] = {}
+        for path in self._stamps:
+            for file in config_files(path):
+                dependents.setdefault(str(file), []).append(path)
+        self._configs = {
+            file: self._configs[file] if file in self._configs else _stamp(file)
+            for file in dependents
+        }
+        self._dependents = dependents
+
+    def _configs_changed(self) -> list[str]:
+        """Return the dependents of config files changed since the last poll."""
+        changed: list[str] = []
+        for file, previous in self._configs.items():
+            signature = _signature(file)
+            if signature is None:
+                if previous is not None:
+                    self._configs[file] = None
+                    changed.extend(self._dependents[file])
+                continue
+            if previous is not None and previous.signature == signature:
+                continue
+            current = _stamp(file)
+            if current is None:
+                continue
+            self._configs[file] = current
+            if previous is None or previous.digest != current.digest:
+                changed.extend(self._dependents[file])
+        return changed
+
+    def _changed(self) -> list[str]:
+        """Return the files whose content differs from the last poll."""
+        changed: list[str] = []
+        for path, previous in self._stamps.items():
+            signature = _signature(path)
+            if signature is None:
+                # Missing: forget it so a re-created file is formatted.
+                self._stamps[path] = None
+                continue
+            if previous is not None and previous.signature == signature:
+                continue
+            current = _stamp(path)
+            if current is None:
+                continue
+            self._stamps[path] = current
+            # A touch or an identical rewrite moves mtime but not content.
+            if previous is None or previous.digest != current.digest:
+                changed.append(path)
+        return changed
+
+    def poll(self) -> Iterator[FileResult]:
+        """Format every file that changed since the previous poll.
+
+        The first poll formats all watched files. After each result is
+        consumed the file is stamped again, so writes made by the
+        consumer (fix mode) do not trigger another round, also not for
+        files inheriting from it.
+
+        Yields:
+            One result per changed file.
+        """
+        now = time.monotonic()
+        if now >= self._next_scan:
+            if self._tree_moved():
+                self._rescan()
+            self._next_scan = now + self._rescan_interval
+        changed = dict.fromkeys(self._changed())
+        for path in self._configs_changed():
+            # Missing dependents wait until they are created again.
+            if self._stamps.get(path) is not None:
+                changed[path] = None
+        results = format_files(
+            list(changed),
+            cache=self._cache,
+            sort_engine=self._sort_engine,
+            config=self._config,
+        )
+        for result in results:
+            yield result
+            self._stamps[result.path] = _stamp(result.path)
+            resolved = str(Path(result.path).resolve())
+            if resolved in self._configs:
+                self._configs[resolved] = _stamp(resolved)
+
+    def run(
+        self,
+        handle: Callable[[FileResult], object],
+        interval: float = POLL_INTERVAL,
+    ) -> None:
+        """Poll until interrupted, passing every result to ``handle``.
+
+        Returns normally on ``KeyboardInterrupt`` (Ctrl-C).
+        """
+        try:
+            while True:
+                for result in self.poll():
+                    handle(result)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            return
@@ -1,9 +1,11 @@
 """Pytest configuration and fixtures."""
 
+import collections
 from pathlib import Path
 
 import pytest
 
+from pypfmt.config import clear_config_cache
 from pypfmt.pipeline import format_pyproject
 
 _UNFORMATTED_TOML = '[project]\nname="test"\n'
@@ -20,6 +22,24 @@ def formatted_toml() -> str:
     return format_pyproject(_UNFORMATTED_TOML)
 
 
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep the CLI format cache out of the user's cache directory."""
+    monkeypatch.setenv("PYPFMT_CACHE_DIR", str(tmp_path / "pypfmt-cache"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_daemon_socket(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Never talk to a pypfmt daemon the developer may have running."""
+    monkeypatch.setenv("PYPFMT_SOCKET", str(tmp_path / "pypfmt.sock"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_fixed_points(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Start every test without fixed points remembered by earlier tests."""
+    monkeypatch.setattr("pypfmt.pipeline._FIXED_POINTS", collections.OrderedDict())
+
+
 @pytest.fixture
 def fixtures_dir() -> Path:
     """Return the path to the test fixtures directory."""
@@ -36,3 +56,9 @@ def before_toml(fixtures_dir: Path) -> str:
 def after_toml(fixtures_dir: Path) -> str:
     """Read and return the after.toml (golden file) fixture content."""
     return (fixtures_dir / "after.toml").read_text()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_config_cache() -> None:
+    """Start every test without config files remembered by earlier tests."""
+    clear_config_cache()
@@ -0,0 +1,206 @@
+"""Tests for the on-disk format cache."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from typer.testing import CliRunner
+
+from pypfmt.cache import FormatCache, _tool_versions, default_cache_dir
+from pypfmt.cli import app
+from pypfmt.config import merge_config
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+# -- FormatCache ---------------------------------------------------------------
+
+
+def test_key_depends_on_content_and_config(tmp_path: Path) -> None:
+    """Different content or merged config yields a different key."""
+    cache = FormatCache(tmp_path)
+    base = cache.key("a = 1\n", None)
+
+    assert cache.key("a = 1\n", None) == base
+    assert cache.key("a = 2\n", None) != base
+    assert cache.key("a = 1\n", merge_config({"sort-tables": False})) != base
+
+
+def test_key_follows_the_taplo_binary(tmp_path: Path, mocker: MockerFixture) -> None:
+    """A taplo binary upgraded outside pip invalidates earlier keys."""
+    cache = FormatCache(tmp_path)
+    release = mocker.patch("pypfmt.formatter._binary_release", return_value="0.9.3")
+    try:
+        _tool_versions.cache_clear()
+        before = cache.key("a = 1\n", None)
+        release.return_value = "0.10.0"
+        _tool_versions.cache_clear()
+
+        assert cache.key("a = 1\n", None) != before
+    finally:
+        _tool_versions.cache_clear()
+
+
+def test_key_follows_pypfmt_code_and_tomlkit(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Changed pypfmt modules or another tomlkit release invalidate keys."""
+    cache = FormatCache(tmp_path)
+    fingerprint = mocker.patch("pypfmt.cache._package_fingerprint", return_value="a")
+    version = mocker.patch("importlib.metadata.version", return_value="1.0")
+    try:
+        _tool_versions.cache_clear()
+        before = cache.key("a = 1\n", None)
+        fingerprint.return_value = "b"
+        _tool_versions.cache_clear()
+        after_code = cache.key("a = 1\n", None)
+        version.side_effect = lambda dist: "2.0" if dist == "tomlkit" else "1.0"
+        _tool_versions.cache_clear()
+        after_tomlkit = cache.key("a = 1\n", None)
+    finally:
+        _tool_versions.cache_clear()
+
+    assert len({before, after_code, after_tomlkit}) == 3
+
+
+def test_add_and_contains(tmp_path: Path) -> None:
+    """Added keys are reported as present; unknown keys are not."""
+    cache = FormatCache(tmp_path)
+    key = cache.key("a = 1\n", None)
+
+    assert key not in cache
+    cache.add(key)
+    assert key in cache
+
+
+def test_prune_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Pruning keeps the newest max_entries markers."""
+    cache = FormatCache(tmp_path, max_entries=2)
+    keys = [cache.key(f"a = {index}\n", None) for index in range(3)]
+    for age, key in zip((300, 200, 100), keys, strict=True):
+        cache.add(key)
+        marker = tmp_path / key[:2] / key
+        os.utime(marker, (marker.stat().st_atime, marker.stat().st_mtime - age))
+
+    cache.prune()
+
+    assert [key in cache for key in keys] == [False, True, True]
+
+
+def test_prune_waits_for_enough_additions(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """The shards are scanned only once prune_every markers were added."""
+    cache = FormatCache(tmp_path, max_entries=20)
+    scan = mocker.spy(cache, "_markers")
+    keys = [cache.key(f"a = {index}\n", None) for index in range(3)]
+    cache.add(keys[0])
+    cache.add(keys[0])
+
+    cache.prune()
+    assert scan.call_count == 0
+
+    cache.add(keys[1])
+    cache.prune()
+    assert scan.call_count == 1
+
+    cache.add(keys[2])
+    cache.prune()
+    assert scan.call_count == 1
+
+
+def test_unwritable_cache_is_a_miss(tmp_path: Path) -> None:
+    """A cache directory that cannot be created degrades to misses."""
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = FormatCache(blocker / "cache")
+    key = cache.key("a = 1\n", None)
+
+    cache.add(key)
+
+    assert key not in cache
+
+
+def test_default_cache_dir_honours_env(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """PYPFMT_CACHE_DIR overrides the platform cache location."""
+    monkeypatch.setenv("PYPFMT_CACHE_DIR", str(tmp_path))
+    assert default_cache_dir() == tmp_path
+
+
+# -- CLI integration -----------------------------------------------------------
+
+
+def test_cli_check_skips_pipeline_for_cached_file(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """A second --check run answers from the cache without sorting."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    cache_dir = tmp_path / "cache"
+    first = runner.invoke(
+        app, ["--check", "--cache-dir", str(cache_dir), str(filepath)]
+    )
+    assert first.exit_code == 0
+    sort = mocker.patch("pypfmt.engine.sort_pyproject")
+
+    result = runner.invoke(
+        app, ["--check", "--cache-dir", str(cache_dir), str(filepath)]
+    )
+
+    assert result.exit_code == 0
+    sort.assert_not_called()
+
+
+def test_cli_cache_hits_do_not_scan_cache(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """A run that only hits the cache never lists its markers."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    cache_dir = tmp_path / "cache"
+    args = ["--check", "--cache-dir", str(cache_dir), str(filepath)]
+    assert runner.invoke(app, args).exit_code == 0
+    scan = mocker.patch.object(FormatCache, "_markers")
+
+    result = runner.invoke(app, args)
+
+    assert result.exit_code == 0
+    scan.assert_not_called()
+
+
+def test_cli_no_cache_runs_pipeline(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """--no-cache ignores entries recorded by earlier runs."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    cache = FormatCache(default_cache_dir())
+    cache.add(cache.key(formatted_toml, None))
+    sort = mocker.patch("pypfmt.engine.sort_pyproject", return_value=formatted_toml)
+
+    result = runner.invoke(app, ["--check", "--no-cache", str(filepath)])
+
+    assert result.exit_code == 0
+    sort.assert_called_once()
+
+
+def test_cli_unformatted_file_is_never_cached(tmp_path: Path) -> None:
+    """Files that need changes keep failing --check on every run."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    first = runner.invoke(app, ["--check", str(filepath)])
+    second = runner.invoke(app, ["--check", str(filepath)])
+
+    assert first.exit_code == second.exit_code == 1
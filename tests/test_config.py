@@ -4,19 +4,33 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from typer.testing import CliRunner
+
+from pypfmt import config as config_module
+from pypfmt.cli import app
 from pypfmt.config import (
     TAPLO_OPTIONS,
     check_config_conflict,
+    detect_config_conflict,
+    extract_config,
     get_comment_config,
     get_format_config,
     get_sort_config,
+    get_sort_engine,
     get_sort_overrides,
+    inherited_config,
     load_config,
     merge_config,
 )
+from pypfmt.engine import format_file, format_files
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     import pytest
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
 
 
 # -- load_config tests --------------------------------------------------------
@@ -42,6 +56,13 @@ def test_load_config_empty_section() -> None:
     assert result == {}
 
 
+def test_extract_config_from_parsed_data() -> None:
+    """extract_config reads [tool.pypfmt] from an already-parsed document."""
+    data = {"tool": {"pypfmt": {"sort-tables": False}}}
+    assert extract_config(data) == {"sort-tables": False}
+    assert extract_config({"project": {"name": "test"}}) is None
+
+
 # -- check_config_conflict tests ----------------------------------------------
 
 
@@ -60,6 +81,12 @@ def test_check_conflict_both_present() -> None:
     assert "[tool.pypfmt]" in result
 
 
+def test_detect_conflict_from_parsed_data() -> None:
+    """detect_config_conflict applies the same rules to parsed data."""
+    assert detect_config_conflict({"tool": {"tomlsort": {}, "pypfmt": {}}})
+    assert detect_config_conflict({"tool": {"pypfmt": {}}}) is None
+
+
 def test_check_conflict_suppressed(monkeypatch: pytest.MonkeyPatch) -> None:
     """PPF_HIDE_CONFLICT_WARNING=1 suppresses the warning."""
     monkeypatch.setenv("PPF_HIDE_CONFLICT_WARNING", "1")
@@ -248,3 +275,190 @@ def test_config_affects_pipeline_output() -> None:
     custom_project_pos = custom_result.index("[project]")
     custom_build_pos = custom_result.index("[build-system]")
     assert custom_build_pos < custom_project_pos
+
+
+# -- Shared defaults and memoized merging ------------------------------------
+
+
+def test_getters_return_copies() -> None:
+    """Mutating what a getter returned does not change the defaults."""
+    get_sort_config().first.append("mutated")
+    get_sort_overrides()["project"].first.clear()
+    get_sort_overrides().clear()
+    get_format_config().spaces_indent_inline_array = 0
+
+    assert "mutated" not in get_sort_config().first
+    assert get_sort_overrides()["project"].first[0] == "name"
+    assert get_format_config().spaces_indent_inline_array == 4
+    assert merge_config({})[0].first == get_sort_config().first
+
+
+def test_merge_empty_dict_reuses_defaults() -> None:
+    """Sections that change nothing resolve to the shared default objects."""
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config({})
+    again = merge_config({"taplo-options": []})
+
+    assert (sort_cfg, overrides, comment_cfg, format_cfg) == (
+        get_sort_config(),
+        get_sort_overrides(),
+        get_comment_config(),
+        get_format_config(),
+    )
+    assert again[0] is sort_cfg
+    assert again[1] is overrides
+    assert again[2] is comment_cfg
+    assert again[3] is format_cfg
+
+
+def test_merge_config_is_memoized_by_value() -> None:
+    """Equal [tool.pypfmt] tables share one merged config."""
+    first = merge_config({"extend-overrides": {"tool.x": {"first": ["a"]}}})
+    second = merge_config({"extend-overrides": {"tool.x": {"first": ["a"]}}})
+
+    assert first is second
+    assert merge_config({"extend-overrides": {"tool.x": {"first": ["b"]}}}) != first
+
+
+def test_merge_config_memo_distinguishes_types() -> None:
+    """``true`` and ``1`` are different settings despite comparing equal."""
+    _, _, _, as_bool, _ = merge_config({"spaces-before-inline-comment": True})
+    _, _, _, as_int, _ = merge_config({"spaces-before-inline-comment": 1})
+
+    assert as_bool.spaces_before_inline_comment is True
+    assert as_int.spaces_before_inline_comment == 1
+    assert as_int.spaces_before_inline_comment is not True
+
+
+# -- Inherited config ----------------------------------------------------------
+
+
+def _monorepo(root: Path) -> Path:
+    """Lay out a repository with config at the root and in ``libs/``."""
+    (root / ".git").mkdir(parents=True)
+    (root / "pyproject.toml").write_text(
+        '[tool.pypfmt]\nextend-sort-first = ["root"]\nsort-engine = "native"\n'
+    )
+    (root / "libs" / "pkg").mkdir(parents=True)
+    (root / "libs" / "pypfmt.toml").write_text('extend-sort-first = ["libs"]\n')
+    # Outside the repository: never read.
+    (root.parent / "pypfmt.toml").write_text("not toml")
+    return root / "libs" / "pkg" / "pyproject.toml"
+
+
+def test_merge_config_layers_extend_each_other() -> None:
+    """Each layer extends the result of the layers above it."""
+    inherited = [{"extend-sort-first": ["a"]}, {"sort-table-keys": False}]
+
+    sort_cfg, *_ = merge_config({"extend-sort-first": ["b"]}, inherited)
+
+    assert tuple(sort_cfg.first[-2:]) == ("a", "b")
+    assert sort_cfg.table_keys is False
+    replaced, *_ = merge_config({"sort-first": ["c"]}, inherited)
+    assert tuple(replaced.first) == ("c",)
+
+
+def test_inherited_config_stops_at_repository_root(tmp_path: Path) -> None:
+    """Ancestors up to the repository root apply, outermost first."""
+    target = _monorepo(tmp_path / "repo")
+
+    layers = inherited_config(str(target))
+
+    assert [layer.get("extend-sort-first") for layer in layers] == [
+        ["root"],
+        ["libs"],
+    ]
+    assert get_sort_engine({}, layers) == "native"
+    # The root pyproject.toml does not inherit from itself.
+    assert inherited_config(str(tmp_path / "repo" / "pyproject.toml")) == ()
+
+
+def test_inherited_config_follows_edits(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Unchanged config files are parsed once; edited ones are re-read."""
+    target = _monorepo(tmp_path / "repo")
+    read = mocker.spy(config_module, "read_config_file")
+    before = inherited_config(str(target))
+    assert inherited_config(str(target.with_name("other.toml"))) == before
+    assert read.call_count == 2
+
+    (tmp_path / "repo" / "libs" / "pypfmt.toml").write_text("")
+
+    assert len(inherited_config(str(target))) == 1
+    assert read.call_count == 3
+
+
+def test_inherited_config_applies_to_files(tmp_path: Path) -> None:
+    """A package is formatted with its ancestors' settings."""
+    target = _monorepo(tmp_path / "repo")
+    (tmp_path / "repo" / "libs" / "pypfmt.toml").write_text("sort-table-keys = false\n")
+    target.write_text("[tool.x]\nb = 1\na = 2\n")
+
+    assert format_file(str(target)).formatted == "[tool.x]\nb = 1\na = 2\n"
+
+
+def test_broken_inherited_config_is_reported(tmp_path: Path) -> None:
+    """Invalid TOML in an ancestor config is an error for the file."""
+    target = _monorepo(tmp_path / "repo")
+    (tmp_path / "repo" / "libs" / "pypfmt.toml").write_text("x = ")
+    target.write_text("")
+
+    result = format_file(str(target))
+
+    assert result.error is not None
+    assert "pypfmt.toml" in result.error
+
+
+# -- Explicit --config ---------------------------------------------------------
+
+_KEEP_ORDER = "[tool.x]\nb = 1\na = 2\n"
+
+
+def test_explicit_config_replaces_file_config(tmp_path: Path) -> None:
+    """--config wins over the file's own [tool.pypfmt], in every worker."""
+    config = tmp_path / "policy.toml"
+    config.write_text("sort-table-keys = false\n")
+    own = "[tool.pypfmt]\nsort-table-keys = true\n\n"
+    paths = []
+    for name in ("a.toml", "b.toml"):
+        (tmp_path / name).write_text(_KEEP_ORDER + own)
+        paths.append(str(tmp_path / name))
+
+    result = runner.invoke(
+        app, ["--no-cache", "-j", "2", "--config", str(config), *paths]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "b.toml").read_text().endswith(_KEEP_ORDER)
+
+
+def test_explicit_config_from_pyproject(tmp_path: Path) -> None:
+    """A pyproject.toml given to --config contributes its [tool.pypfmt]."""
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "x"\n\n[tool.pypfmt]\nsort-table-keys = false\n'
+    )
+
+    result = runner.invoke(
+        app,
+        ["--no-cache", "--config", str(tmp_path / "pyproject.toml"), "-"],
+        input=_KEEP_ORDER,
+    )
+
+    assert result.stdout == _KEEP_ORDER
+
+
+def test_explicit_config_is_merged_once() -> None:
+    """The engine uses the given config as is, without resolving any."""
+    merged = merge_config({"sort-table-keys": False})
+
+    results = list(format_files(["missing.toml"], config=merged))
+
+    assert results[0].error == "file not found"
+
+
+def test_explicit_config_errors(tmp_path: Path) -> None:
+    """Unreadable or invalid config files are usage errors."""
+    broken = tmp_path / "pypfmt.toml"
+    broken.write_text('sort-engine = "fastest"\n')
+
+    for path in (broken, tmp_path / "absent.toml"):
+        result = runner.invoke(app, ["--config", str(path), "-"], input="")
+        assert result.exit_code == 2
@@ -0,0 +1,179 @@
+"""Tests for the diff engine and ``--diff-format``."""
+
+from __future__ import annotations
+
+import difflib
+import itertools
+import json
+import random
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from typer.testing import CliRunner
+
+from pypfmt.cli import app
+from pypfmt.diff import diff_stat, json_diff, opcodes, unified_diff
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+_LINES = st.lists(st.sampled_from(["a\n", "b\n", "c\n", "]\n", "\n"]), max_size=30)
+
+
+def _apply(a: list[str], b: list[str]) -> list[str]:
+    """Rebuild ``b`` from ``a`` with the opcodes between them."""
+    out: list[str] = []
+    for tag, i1, i2, j1, j2 in opcodes(a, b):
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out += a[i1:i2]
+        else:
+            out += b[j1:j2]
+    return out
+
+
+# -- Engine --------------------------------------------------------------------
+
+
+@settings(max_examples=300)
+@given(a=_LINES, b=_LINES)
+def test_opcodes_rebuild_the_new_lines(a: list[str], b: list[str]) -> None:
+    """Opcodes cover both sides contiguously and rebuild ``b``."""
+    codes = opcodes(a, b)
+
+    assert _apply(a, b) == b
+    if codes:
+        assert codes[0][1] == codes[0][3] == 0
+        assert (codes[-1][2], codes[-1][4]) == (len(a), len(b))
+    for previous, code in itertools.pairwise(codes):
+        assert previous[2] == code[1]
+        assert previous[4] == code[3]
+        assert previous[0] != code[0] or code[0] != "equal"
+
+
+def test_reindented_block_is_one_replace() -> None:
+    """Blocks sharing no lines become a single replace, quickly."""
+    a = [f"  item{index}\n" for index in range(5000)]
+    b = [f"    item{index}\n" for index in range(5000)]
+
+    assert opcodes(a, b) == [("replace", 0, 5000, 0, 5000)]
+
+
+def test_dissimilar_inputs_finish_in_bounded_time() -> None:
+    """Edit-heavy diffs stop refining once the Myers budget is spent."""
+    rng = random.Random(0)
+    a = [f"line{rng.randrange(50)}\n" for _ in range(20_000)]
+    b = [f"line{rng.randrange(50)}\n" for _ in range(20_000)]
+
+    start = time.perf_counter()
+    codes = opcodes(a, b)
+
+    assert time.perf_counter() - start < 5
+    assert _apply(a, b) == b
+    assert (codes[-1][2], codes[-1][4]) == (len(a), len(b))
+
+
+def test_exhausted_budget_falls_back_to_difflib(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ranges left over once the budget is spent still diff correctly."""
+    monkeypatch.setattr("pypfmt.diff._MAX_WORK", 10)
+    a = [f"x{index % 7}\n" for index in range(300)]
+    b = [f"x{index % 5}\n" for index in range(300)]
+
+    codes = opcodes(a, b)
+
+    assert _apply(a, b) == b
+    assert any(code[0] == "equal" for code in codes)
+
+
+@pytest.mark.parametrize(
+    ("original", "formatted"),
+    [
+        ("a\nb\nc\n", "a\nB\nc\n"),
+        ("a\nb\n", "a\nb\nc\n"),
+        ("x\n" + "same\n" * 10 + "y\n", "X\n" + "same\n" * 10 + "Y\n"),
+        ("a\nb", "a\nb\n"),
+    ],
+)
+def test_unified_diff_matches_difflib(original: str, formatted: str) -> None:
+    """Simple changes render exactly as ``difflib.unified_diff`` does."""
+    expected = difflib.unified_diff(
+        original.splitlines(keepends=True),
+        formatted.splitlines(keepends=True),
+        fromfile="a/f.toml",
+        tofile="b/f.toml",
+    )
+
+    assert unified_diff(original, formatted, "f.toml") == list(expected)
+
+
+def test_unified_diff_of_equal_texts_is_empty() -> None:
+    """No changes, no headers."""
+    assert unified_diff("a\n", "a\n", "f.toml") == []
+
+
+def test_json_diff() -> None:
+    """Hunks carry 1-based ranges and unterminated lines."""
+    data = json.loads(json_diff("a\nb\n", "a\nc\n", "f.toml"))
+
+    assert data == {
+        "path": "f.toml",
+        "hunks": [
+            {
+                "old_start": 1,
+                "old_lines": 2,
+                "new_start": 1,
+                "new_lines": 2,
+                "lines": [" a", "-b", "+c"],
+            }
+        ],
+    }
+
+
+def test_diff_stat_scales_wide_changes() -> None:
+    """Counts are exact; the bar is capped in width."""
+    assert diff_stat("a\nb\n", "a\nc\nd\n", "f.toml") == "f.toml | 3 ++-\n"
+    line = diff_stat("", "x\n" * 100, "f.toml")
+    assert line == f"f.toml | 100 {'+' * 40}\n"
+
+
+# -- CLI -----------------------------------------------------------------------
+
+
+def test_cli_diff_format_implies_diff(tmp_path: Path) -> None:
+    """--diff-format prints a diff without writing the file."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--no-cache", "--diff-format", "json", str(filepath)])
+
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["path"] == str(filepath)
+    assert filepath.read_text() == UNFORMATTED_TOML
+
+
+def test_cli_diff_format_stat_stdin() -> None:
+    """Stat output names stdin by its label."""
+    result = runner.invoke(
+        app,
+        ["--no-cache", "--check", "--diff-format", "stat", "--stdin-filename", "x"],
+        input=UNFORMATTED_TOML,
+    )
+
+    assert result.exit_code == 1
+    assert result.stdout.startswith("x | ")
+
+
+def test_cli_diff_format_rejects_unknown() -> None:
+    """Unknown formats are a usage error."""
+    result = runner.invoke(app, ["--diff-format", "html"], input=UNFORMATTED_TOML)
+
+    assert result.exit_code == 2
@@ -0,0 +1,141 @@
+"""Tests for recursive pyproject.toml discovery."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from typer.testing import CliRunner
+
+from pypfmt.cli import app
+from pypfmt.discovery import discover
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+runner = CliRunner()
+
+
+def _make(root: Path, *relpaths: str) -> None:
+    """Create empty files (and their parent directories) under ``root``."""
+    for relpath in relpaths:
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+def _found(root: Path, **kwargs: object) -> list[str]:
+    """Return discovered paths relative to ``root``, as posix strings."""
+    return [
+        path.removeprefix(str(root) + "/")
+        for path in discover([str(root)], **kwargs)  # type: ignore[arg-type]
+    ]
+
+
+def test_discover_walks_tree_in_sorted_order(tmp_path: Path) -> None:
+    """Nested pyproject.toml files are found depth-first, sorted by name."""
+    _make(
+        tmp_path,
+        "pyproject.toml",
+        "b/pyproject.toml",
+        "a/pyproject.toml",
+        "a/x/pyproject.toml",
+        "a/setup.cfg",
+    )
+
+    assert _found(tmp_path) == [
+        "pyproject.toml",
+        "a/pyproject.toml",
+        "a/x/pyproject.toml",
+        "b/pyproject.toml",
+    ]
+
+
+def test_discover_prunes_heavy_directories(tmp_path: Path) -> None:
+    """Virtualenvs, node_modules and build output are never entered."""
+    _make(
+        tmp_path,
+        ".venv/lib/pyproject.toml",
+        "node_modules/pkg/pyproject.toml",
+        "build/pyproject.toml",
+        "src/pyproject.toml",
+    )
+
+    assert _found(tmp_path) == ["src/pyproject.toml"]
+
+
+def test_discover_honours_gitignore(tmp_path: Path) -> None:
+    """Root and nested .gitignore files apply, including negations."""
+    _make(
+        tmp_path,
+        "generated/pyproject.toml",
+        "vendor/a/pyproject.toml",
+        "vendor/keep/pyproject.toml",
+        "pkg/tmp/pyproject.toml",
+        "pkg/pyproject.toml",
+    )
+    (tmp_path / ".gitignore").write_text(
+        "# comment\ngenerated/\nvendor/*\n!vendor/keep\n"
+    )
+    (tmp_path / "pkg" / ".gitignore").write_text("/tmp\n")
+
+    assert _found(tmp_path) == ["pkg/pyproject.toml", "vendor/keep/pyproject.toml"]
+
+
+def test_discover_applies_ancestor_gitignore_inside_repo(tmp_path: Path) -> None:
+    """Walking a subdirectory still honours .gitignore up to the repo root."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("services/legacy/\n")
+    _make(
+        tmp_path,
+        "services/legacy/pyproject.toml",
+        "services/api/pyproject.toml",
+    )
+
+    found = list(discover([str(tmp_path / "services")]))
+
+    assert found == [str(tmp_path / "services" / "api" / "pyproject.toml")]
+
+
+def test_discover_gitignore_can_be_disabled(tmp_path: Path) -> None:
+    """gitignore=False walks ignored directories too."""
+    _make(tmp_path, "generated/pyproject.toml")
+    (tmp_path / ".gitignore").write_text("generated/\n")
+
+    assert _found(tmp_path, gitignore=False) == ["generated/pyproject.toml"]
+
+
+def test_discover_exclude_patterns(tmp_path: Path) -> None:
+    """--exclude patterns use gitignore syntax relative to the walked dir."""
+    _make(
+        tmp_path,
+        "examples/demo/pyproject.toml",
+        "libs/old/pyproject.toml",
+        "libs/new/pyproject.toml",
+    )
+
+    found = _found(tmp_path, exclude=["examples", "libs/o*"])
+
+    assert found == ["libs/new/pyproject.toml"]
+
+
+def test_discover_yields_explicit_files_unchanged(tmp_path: Path) -> None:
+    """Explicit file arguments bypass discovery and exclusion."""
+    _make(tmp_path, "build/pyproject.toml")
+    explicit = str(tmp_path / "build" / "pyproject.toml")
+
+    assert list(discover([explicit, "missing.toml"], exclude=["build"])) == [
+        explicit,
+        "missing.toml",
+    ]
+
+
+def test_cli_formats_directory(tmp_path: Path) -> None:
+    """pypfmt <dir> formats every discovered pyproject.toml."""
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "pyproject.toml").write_text('[project]\nname="x"\n')
+
+    result = runner.invoke(app, ["--check", str(tmp_path)])
+
+    assert result.exit_code == 1
+    assert result.stderr.count("not properly formatted") == 2
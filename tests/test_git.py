@@ -0,0 +1,239 @@
+"""Tests for git integration (changed-file selection and index mode)."""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from pypfmt.cli import app
+from pypfmt.discovery import select
+from pypfmt.git import (
+    GitError,
+    changed_files,
+    index_entries,
+    read_blobs,
+    write_blobs,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+def _git(root: Path, *args: str) -> None:
+    """Run git in ``root`` with a throwaway identity."""
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A repository with two committed packages, checked out on a branch."""
+    for package in ("a", "b", "gone"):
+        (tmp_path / package).mkdir()
+        (tmp_path / package / "pyproject.toml").write_text(UNFORMATTED_TOML)
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    _git(tmp_path, "checkout", "-q", "-b", "feature")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_changed_since_covers_commits_and_work_tree(repo: Path) -> None:
+    """Committed and uncommitted changes count; deletions do not."""
+    (repo / "a" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# a\n")
+    _git(repo, "commit", "-q", "-am", "a")
+    (repo / "b" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# b\n")
+    (repo / "gone" / "pyproject.toml").unlink()
+
+    assert changed_files("main") == ["a/pyproject.toml", "b/pyproject.toml"]
+
+
+def test_staged_ignores_unstaged_edits(repo: Path) -> None:
+    """Only what the next commit would change is listed."""
+    (repo / "a" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# a\n")
+    (repo / "b" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# b\n")
+    _git(repo, "add", "b")
+
+    assert changed_files(staged=True) == ["b/pyproject.toml"]
+
+
+def test_paths_are_relative_to_the_working_directory(
+    repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Changes outside the working directory are reported with ``..``."""
+    (repo / "a" / "pyproject.toml").write_text("")
+    (repo / "b" / "pyproject.toml").write_text("")
+    monkeypatch.chdir(repo / "a")
+
+    assert changed_files("HEAD") == ["pyproject.toml", "../b/pyproject.toml"]
+
+
+def test_cli_selects_changes_outside_the_working_directory(
+    repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only ``.`` is checked by default; other paths can reach further."""
+    (repo / "a" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# a\n")
+    (repo / "b" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# b\n")
+    monkeypatch.chdir(repo / "a")
+
+    here = runner.invoke(app, ["--no-cache", "--check", "--changed-since", "main"])
+    both = runner.invoke(
+        app, ["--no-cache", "--check", "--changed-since", "main", ".", "../b"]
+    )
+
+    assert here.stderr == "error: pyproject.toml: not properly formatted\n"
+    assert both.stderr.splitlines() == [
+        "error: pyproject.toml: not properly formatted",
+        "error: ../b/pyproject.toml: not properly formatted",
+    ]
+
+
+@pytest.mark.parametrize("since", ["no-such-ref", "--output=x"])
+def test_bad_revision(repo: Path, since: str) -> None:
+    """Unknown revisions, and options posing as one, are errors."""
+    with pytest.raises(GitError):
+        changed_files(since)
+
+    assert not (repo / "x").exists()
+
+
+def test_select_matches_discovery(tmp_path: Path) -> None:
+    """Selection honours roots, default excludes and --exclude patterns."""
+    for relpath in ("a/pyproject.toml", "examples/x/pyproject.toml", "b/c.toml"):
+        (tmp_path / relpath).parent.mkdir(parents=True, exist_ok=True)
+    candidates = [
+        str(tmp_path / "a" / "pyproject.toml"),
+        str(tmp_path / "build" / "pyproject.toml"),
+        str(tmp_path / "examples" / "x" / "pyproject.toml"),
+        str(tmp_path / "b" / "c.toml"),
+        "/elsewhere/pyproject.toml",
+    ]
+
+    kept = select(candidates, [str(tmp_path)], ["examples/"])
+
+    assert list(kept) == [candidates[0]]
+    assert list(select(candidates, [candidates[3]])) == [candidates[3]]
+
+
+def test_cli_checks_only_changed_files(repo: Path) -> None:
+    """Unchanged packages are not looked at, even though unformatted."""
+    (repo / "b" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# b\n")
+
+    result = runner.invoke(app, ["--no-cache", "--check", "--changed-since", "main"])
+
+    assert result.exit_code == 1
+    assert result.stderr == "error: b/pyproject.toml: not properly formatted\n"
+
+
+def test_cli_nothing_changed(repo: Path) -> None:
+    """No changes means nothing to check."""
+    result = runner.invoke(app, ["--no-cache", "--check", "--staged", "."])
+
+    assert result.exit_code == 0
+    assert result.stderr == ""
+
+
+def test_cli_git_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Outside a repository the run stops with a usage error."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+
+    result = runner.invoke(app, ["--staged"])
+
+    assert result.exit_code == 2
+    assert result.stderr.startswith("error: git: ")
+
+
+def test_cli_rejects_stdin(repo: Path) -> None:
+    """Git selection picks files, so it cannot read stdin."""
+    result = runner.invoke(app, ["--staged", "-"], input=UNFORMATTED_TOML)
+
+    assert result.exit_code == 2
+
+
+# -- Index ---------------------------------------------------------------------
+
+
+def _staged(path: str) -> str:
+    """Return the staged content of ``path``."""
+    return subprocess.run(
+        ["git", "show", f":{path}"], capture_output=True, check=True, text=True
+    ).stdout
+
+
+def test_blobs_stream_through_one_process(repo: Path) -> None:
+    """Index entries list regular files; their blobs come back in order."""
+    entries = index_entries(["a", "b"])
+
+    assert [entry.path for entry in entries] == ["a/pyproject.toml", "b/pyproject.toml"]
+    assert entries[0].mode == "100644"
+    blobs = read_blobs([entries[1].oid, entries[0].oid])
+    assert list(blobs) == [UNFORMATTED_TOML.encode()] * 2
+    with pytest.raises(GitError, match="cannot read object"):
+        list(read_blobs(["0" * 40]))
+
+
+def test_blobs_are_written_by_one_process(repo: Path, mocker: MockerFixture) -> None:
+    """Any number of blobs is stored by a single git call, bytes as given."""
+    contents = [b"a = 1\r\n", b"", "é = 2\n".encode()]
+    run = mocker.spy(subprocess, "run")
+
+    oids = write_blobs(contents)
+
+    assert run.call_count == 1
+    assert list(read_blobs(oids)) == contents
+    assert write_blobs([]) == []
+
+
+def test_cli_from_index_checks_staged_content(repo: Path, formatted_toml: str) -> None:
+    """The staged blob is checked, whatever the work tree holds."""
+    (repo / "a" / "pyproject.toml").write_text(formatted_toml)
+    (repo / "b" / "pyproject.toml").write_text(formatted_toml)
+    _git(repo, "add", "b")
+
+    result = runner.invoke(app, ["--no-cache", "--from-index", "--check", "a", "b"])
+
+    assert result.exit_code == 1
+    assert result.stderr == "error: a/pyproject.toml: not properly formatted\n"
+
+
+def test_cli_write_index_leaves_work_tree(repo: Path, formatted_toml: str) -> None:
+    """Fixed blobs are staged; the work tree and other paths are untouched."""
+    (repo / "a" / "pyproject.toml").write_text(UNFORMATTED_TOML + "# wip\n")
+
+    result = runner.invoke(
+        app, ["--no-cache", "--write-index", "--changed-since", "HEAD", "."]
+    )
+
+    assert result.exit_code == 0
+    assert result.stderr == "a/pyproject.toml: reformatted in index\n"
+    assert _staged("a/pyproject.toml") == formatted_toml
+    assert _staged("b/pyproject.toml") == UNFORMATTED_TOML
+    assert (repo / "a" / "pyproject.toml").read_text() == UNFORMATTED_TOML + "# wip\n"
+
+
+@pytest.mark.parametrize(
+    "args", [["--from-index"], ["--write-index", "--check"], ["--from-index", "-"]]
+)
+def test_cli_index_usage_errors(repo: Path, args: list[str]) -> None:
+    """Index mode needs a mode of its own and cannot read stdin."""
+    result = runner.invoke(app, args, input="")
+
+    assert result.exit_code == 2
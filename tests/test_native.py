@@ -0,0 +1,415 @@
+"""Differential tests for the native and fused engines against toml-sort/taplo."""
+
+from __future__ import annotations
+
+import tomllib
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from hypothesis import assume, given, settings
+from hypothesis import strategies as st
+from toml_sort import TomlSort
+from tomlkit.exceptions import TOMLKitError
+from typer.testing import CliRunner
+
+from pypfmt.cli import app
+from pypfmt.config import get_sort_engine, merge_config
+from pypfmt.engine import format_text
+from pypfmt.formatter import TaploFormatter, format_toml
+from pypfmt.native import sort_native
+from pypfmt.pipeline import Profile, format_pyproject, parse_pyproject
+from pypfmt.sorter import _IndexedTomlSort, sort_and_format_toml, sort_toml
+
+if TYPE_CHECKING:
+    import random
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+CONFIGS: list[dict[str, Any]] = [
+    {},
+    {"sort-table-keys": False},
+    {"comments-header": False, "comments-footer": False},
+    {"comments-inline": False, "comments-block": False},
+    {"sort-first": ["b", "x", "a"]},
+    {
+        "extend-overrides": {
+            "tool.*": {"inline_arrays": True, "first": ["b", "a"]},
+            "*": {"first": ["z_1"]},
+        }
+    },
+    {
+        "extend-overrides": {"*": {"inline_tables": True, "inline_arrays": True}},
+        "sort-first": ["z_1", "B"],
+    },
+]
+
+TYPICAL = """\
+# Project metadata.
+
+[project]
+version = "1.0"
+name = "demo"
+dependencies = ["requests>=2", 'tomli; python_version < "3.11"', "click"]
+optional-dependencies = { test = ["pytest", "hypothesis"], docs = ["mkdocs"] }
+
+[tool.ruff]
+line-length = 88
+
+[tool.ruff.lint]
+select = ["E", "F"]  # errors only
+ignore = [
+    # Line length is taplo's job.
+    "E501",
+    "D",
+]
+
+[[tool.hatch.envs.test.matrix]]
+python = ["3.12", "3.11"]
+
+[build-system]
+requires = ["hatchling"]
+build-backend = "hatchling.build"
+
+# Trailing notes.
+"""
+
+# -- Random documents ------------------------------------------------------------
+
+KEYS = ["a", "b", "B", '"q k"', "'lit k'", "name", "version", "x-y", "z_1", "1"]
+TABLES = ["project", "tool", "ruff", "lint", "hatch", "envs", "x", "A", "b"]
+SCALARS = ['"s"', "'lit'", '"a,b]#"', '"Q"', '"q"', "1", "+2", "3.5", "true", '""']
+# Long enough to push rows past taplo's column width.
+SCALARS += ['"' + "x" * 40 + '"', '"' + "é" * 66 + '"']
+COMMENTS = ["#c", "# c ", "#   spaced  ", "#", "# [a]"]
+
+
+def _space(rng: random.Random) -> str:
+    return rng.choice(["", "", " ", "\t"])
+
+
+def _extra(rng: random.Random, lines: list[str]) -> None:
+    """Append a few comment or blank lines."""
+    for _ in range(rng.choice([0, 0, 1, 2])):
+        lines.append(rng.choice([*COMMENTS, "", " "]))
+
+
+def _inline_table(rng: random.Random, depth: int) -> str:
+    keys = rng.sample(KEYS, rng.randrange(4))
+    pairs = [f"{key} = {_value(rng, depth + 1)}" for key in keys]
+    return "{" + ", ".join(pairs) + "}"
+
+
+def _value(rng: random.Random, depth: int = 0) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        return rng.choice(SCALARS)
+    if kind < 0.55 and depth < 2:
+        return _inline_table(rng, depth)
+    items = [
+        _value(rng, depth + 1)
+        if depth < 1 and rng.random() < 0.2
+        else rng.choice(SCALARS)
+        for _ in range(rng.randrange(5))
+    ]
+    if depth or rng.random() < 0.4:
+        return "[" + ", ".join(items) + "]"
+    out = "["
+    for index, item in enumerate(items):
+        for _ in range(rng.choice([0, 0, 1, 2])):
+            out += rng.choice(["\n", "\n\n"]) + _space(rng) + rng.choice(COMMENTS)
+        out += f"\n{_space(rng)}{item}"
+        if index < len(items) - 1 or rng.random() < 0.5:
+            out += ","
+        if rng.random() < 0.3:
+            out += " " + rng.choice(COMMENTS)
+    return out + rng.choice(["\n]", "]"])
+
+
+def _body(rng: random.Random, lines: list[str]) -> None:
+    for key in dict.fromkeys(rng.choice(KEYS) for _ in range(rng.randrange(5))):
+        _extra(rng, lines)
+        line = f"{_space(rng)}{key}{_space(rng)}={_space(rng)}{_value(rng)}"
+        if rng.random() < 0.3:
+            line += " " + rng.choice(COMMENTS)
+        lines.append(line)
+
+
+def _document(rng: random.Random) -> str:
+    """Build a random document from the constructs the engine handles."""
+    lines: list[str] = []
+    _extra(rng, lines)
+    _body(rng, lines)
+    declared: list[tuple[str, ...]] = []
+    for _ in range(rng.randrange(6)):
+        if declared and rng.random() < 0.3:
+            path = (*rng.choice(declared), rng.choice(TABLES))
+        else:
+            path = tuple(rng.choice(TABLES) for _ in range(rng.choice([1, 1, 2, 3])))
+        declared.append(path)
+        header = "[" + ".".join(path) + "]"
+        if rng.random() < 0.25:
+            header = f"[{header}]"
+        if rng.random() < 0.2:
+            header += " " + rng.choice(COMMENTS)
+        _extra(rng, lines)
+        lines.append(header)
+        _body(rng, lines)
+    _extra(rng, lines)
+    return "\n".join(lines) + rng.choice(["", "\n"])
+
+
+def _toml_sort(text: str, config: dict[str, Any]) -> str:
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(config)
+    return TomlSort(
+        text,
+        comment_config=comment_cfg,
+        sort_config=sort_cfg,
+        format_config=format_cfg,
+        sort_config_overrides=dict(overrides),
+    ).sorted()
+
+
+def _native(text: str, config: dict[str, Any]) -> str | None:
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(config)
+    sorter = _IndexedTomlSort(
+        text,
+        comment_config=comment_cfg,
+        sort_config=sort_cfg,
+        format_config=format_cfg,
+        sort_config_overrides=dict(overrides),
+    )
+    return sort_native(text, sorter.sort_config, comment_cfg, format_cfg)
+
+
+# -- Differential tests ----------------------------------------------------------
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_typical_document_matches_toml_sort(config: dict[str, Any]) -> None:
+    """A typical document takes the native path and sorts byte-identically."""
+    assert _native(TYPICAL, config) == _toml_sort(TYPICAL, config)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_fixtures_match_toml_sort(
+    before_toml: str, after_toml: str, config: dict[str, Any]
+) -> None:
+    """The fixtures sort identically, natively or through the fallback."""
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(config)
+    for text in (before_toml, after_toml):
+        native = sort_toml(
+            text, sort_cfg, overrides, comment_cfg, format_cfg, engine="native"
+        )
+        assert native == _toml_sort(text, config)
+
+
+@given(st.randoms(use_true_random=False), st.sampled_from(CONFIGS))
+@settings(max_examples=300, deadline=None)
+def test_random_documents_match_toml_sort(
+    rng: random.Random, config: dict[str, Any]
+) -> None:
+    """Whenever the native engine answers, toml-sort agrees byte for byte."""
+    text = _document(rng)
+    try:
+        tomllib.loads(text)
+        expected = _toml_sort(text, config)
+    except (tomllib.TOMLDecodeError, TOMLKitError, ValueError):
+        # Invalid TOML, or valid TOML that toml-sort itself rejects.
+        assume(False)
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(config)
+
+    native = sort_toml(
+        text, sort_cfg, overrides, comment_cfg, format_cfg, engine="native"
+    )
+
+    assert native == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '[a]\r\nb = "c"\r\n',
+        "a.b = 1\n",
+        'a = """\nb\n"""\n',
+        "a = 1979-05-27\n",
+        '"\\u00e9" = 1\n',
+        "a = [ # first\n  1,\n]\n",
+        "[a.b]\nc = 1\n[a]\nd = 2\n",
+        "a = 1\n# about b\n[[b]]\nc = 1\n",
+    ],
+    ids=[
+        "crlf",
+        "dotted-key",
+        "multiline-string",
+        "date",
+        "escaped-key",
+        "comment-after-bracket",
+        "table-after-sub-table",
+        "commented-array-of-tables",
+    ],
+)
+def test_unsupported_documents_fall_back(text: str) -> None:
+    """Documents outside the subset are sorted by toml-sort instead."""
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config({})
+
+    assert _native(text, {}) is None
+    assert sort_toml(
+        text, sort_cfg, overrides, comment_cfg, format_cfg, engine="native"
+    ) == _toml_sort(text, {})
+
+
+def test_native_engine_skips_toml_sort_rendering(mocker: MockerFixture) -> None:
+    """Supported documents never reach ``TomlSort.sorted``."""
+    sorted_ = mocker.patch.object(TomlSort, "sorted")
+
+    format_pyproject(TYPICAL, sort_engine="native")
+
+    sorted_.assert_not_called()
+
+
+# -- Fused sort and format -------------------------------------------------------
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_fused_typical_document_matches_taplo(config: dict[str, Any]) -> None:
+    """The fused pass gives taplo's formatting of toml-sort's output."""
+    merged = merge_config(config)
+
+    assert sort_and_format_toml(TYPICAL, *merged) == format_toml(
+        _toml_sort(TYPICAL, config)
+    )
+
+
+@given(st.randoms(use_true_random=False), st.sampled_from(CONFIGS))
+@settings(max_examples=100, deadline=None)
+def test_fused_random_documents_match_taplo(
+    rng: random.Random, config: dict[str, Any]
+) -> None:
+    """Whenever the fused pass answers, sorting then taplo agrees."""
+    text = _document(rng)
+    try:
+        tomllib.loads(text)
+        expected = _toml_sort(text, config)
+    except (tomllib.TOMLDecodeError, TOMLKitError, ValueError):
+        assume(False)
+
+    fused = sort_and_format_toml(text, *merge_config(config))
+
+    assume(fused is not None)
+    assert fused == format_toml(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'a = [1, "' + "x" * 80 + '"]\n',
+        'a = [\n  [1],\n  "' + "x" * 80 + '",\n]\n',
+        'a = [\n  "x", # note\n  [[1], "' + "x" * 66 + '"],\n]\n',
+        'a = "x" # note\nlonger-key = "' + "x" * 50 + '"  # other\n\nb = 1 # c\n',
+        "a = [\n  1, # one\n  2,\n] # a\nbb = 1 # b\n",
+        'a = [[1, 2], ["' + "x" * 70 + '"]]\n',
+    ],
+    ids=[
+        "long-array",
+        "long-sibling",
+        "aligned-comment-too-long",
+        "aligned-comments",
+        "unaligned-multi-line-run",
+        "nested-expansion",
+    ],
+)
+def test_fused_layout_matches_taplo(text: str) -> None:
+    """Expansion and comment alignment follow taplo's rules."""
+    assert sort_and_format_toml(text) == format_toml(_toml_sort(text, {}))
+
+
+def test_fused_engine_skips_taplo(mocker: MockerFixture) -> None:
+    """Supported documents are formatted without running taplo."""
+    format_ = mocker.patch.object(TaploFormatter, "format")
+    format_many = mocker.patch.object(TaploFormatter, "format_many")
+    profile = Profile()
+    expected = sort_and_format_toml(TYPICAL)
+
+    assert format_pyproject(TYPICAL, on_stage=profile, sort_engine="fused") == (
+        expected
+    )
+    assert format_text(TYPICAL, "p", sort_engine="fused").formatted == expected
+    format_.assert_not_called()
+    format_many.assert_not_called()
+    assert set(profile.stages) == {"parse", "fused"}
+
+
+def test_fused_engine_falls_back(before_toml: str, after_toml: str) -> None:
+    """Custom taplo options and unsupported documents still run taplo."""
+    options = ("column_width=100",)
+
+    assert sort_and_format_toml(TYPICAL, taplo_options=options) is None
+    assert format_pyproject(
+        TYPICAL, taplo_options=options, sort_engine="fused"
+    ) == format_toml(_toml_sort(TYPICAL, {}), options)
+    assert sort_and_format_toml(before_toml) is None
+    assert format_pyproject(before_toml, sort_engine="fused") == after_toml
+
+
+def test_fused_engine_follows_the_taplo_binary(mocker: MockerFixture) -> None:
+    """Another taplo release on PATH disables the fused pass."""
+    release = mocker.patch("pypfmt.formatter._binary_release", return_value="0.10.0")
+
+    assert sort_and_format_toml(TYPICAL) is None
+    release.return_value = "0.9.3"
+    assert sort_and_format_toml(TYPICAL) is not None
+
+
+# -- Selecting the engine --------------------------------------------------------
+
+
+def test_get_sort_engine() -> None:
+    """The setting defaults to toml-sort and accepts every engine name."""
+    assert get_sort_engine(None) == "toml-sort"
+    assert get_sort_engine({"sort-engine": "native"}) == "native"
+    assert get_sort_engine({"sort-engine": "fused"}) == "fused"
+    with pytest.raises(ValueError, match="sort-engine"):
+        get_sort_engine({"sort-engine": "fast"})
+
+
+def test_document_selects_engine(mocker: MockerFixture) -> None:
+    """``[tool.pypfmt] sort-engine`` picks the engine for that document."""
+    sort_native_ = mocker.patch("pypfmt.sorter.sort_native", return_value=None)
+    text = '[project]\nname = "x"\n\n[tool.pypfmt]\nsort-engine = "native"\n'
+
+    assert parse_pyproject(text).sort_engine() == "native"
+    assert format_text(text, "p").error is None
+    sort_native_.assert_called_once()
+
+
+def test_invalid_engine_is_reported() -> None:
+    """An unknown ``sort-engine`` is a per-file error, not a crash."""
+    result = format_text('[tool.pypfmt]\nsort-engine = "fast"\n', "p")
+
+    assert result.error is not None
+    assert "sort-engine" in result.error
+
+
+def test_cli_sort_engine_flag(
+    tmp_path: Path, before_toml: str, after_toml: str, mocker: MockerFixture
+) -> None:
+    """``--sort-engine`` overrides the config and yields the same output."""
+    path = tmp_path / "pyproject.toml"
+    path.write_text(before_toml)
+    sort_native_ = mocker.patch("pypfmt.sorter.sort_native", wraps=sort_native)
+
+    result = runner.invoke(app, ["--no-cache", "--sort-engine", "native", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert path.read_text() == after_toml
+    sort_native_.assert_called_once()
+
+
+def test_cli_rejects_unknown_engine(tmp_path: Path) -> None:
+    """An unknown ``--sort-engine`` is a usage error."""
+    result = runner.invoke(app, ["--sort-engine", "fast", str(tmp_path)])
+
+    assert result.exit_code == 2
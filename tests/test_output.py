@@ -0,0 +1,123 @@
+"""Tests for atomic write-back and batched status messages."""
+
+from __future__ import annotations
+
+import io
+import stat
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from pypfmt.cli import app
+from pypfmt.output import Messages, write_file
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+def test_unchanged_bytes_are_not_rewritten(tmp_path: Path) -> None:
+    """Identical content leaves the inode and mtime alone."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text("a = 1\n")
+    before = filepath.stat()
+
+    assert write_file(str(filepath), "a = 1\n") is False
+
+    after = filepath.stat()
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+
+def test_replace_keeps_mode_and_leaves_no_temp_file(tmp_path: Path) -> None:
+    """The new file has the old permission bits; nothing else is left."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text("a = 1\n")
+    filepath.chmod(0o640)
+
+    assert write_file(str(filepath), "a = 2\n") is True
+
+    assert filepath.read_text() == "a = 2\n"
+    assert stat.S_IMODE(filepath.stat().st_mode) == 0o640
+    assert list(tmp_path.iterdir()) == [filepath]
+
+
+def test_symlink_target_is_replaced(tmp_path: Path) -> None:
+    """The link stays a link and its target gets the new content."""
+    target = tmp_path / "real.toml"
+    target.write_text("a = 1\n")
+    link = tmp_path / "pyproject.toml"
+    link.symlink_to(target)
+
+    write_file(str(link), "a = 2\n")
+
+    assert link.is_symlink()
+    assert target.read_text() == "a = 2\n"
+
+
+def test_failed_replace_cleans_up(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """On error the original is intact and the temporary file is gone."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text("a = 1\n")
+
+    def fail(self: Path, target: Path) -> Path:
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(Path, "replace", fail)
+
+    with pytest.raises(PermissionError):
+        write_file(str(filepath), "a = 2\n")
+
+    assert filepath.read_text() == "a = 1\n"
+    assert list(tmp_path.iterdir()) == [filepath]
+
+
+def test_messages_write_once() -> None:
+    """Buffered lines reach the stream on flush, unbuffered ones at once."""
+    stream = io.StringIO()
+    messages = Messages(stream=stream)
+    messages.add("a")
+    messages.add("b")
+
+    assert stream.getvalue() == ""
+    messages.flush()
+    assert stream.getvalue() == "a\nb\n"
+
+    Messages(buffered=False, stream=stream).add("c")
+    assert stream.getvalue() == "a\nb\nc\n"
+
+
+# -- CLI -----------------------------------------------------------------------
+
+
+def test_cli_reports_only_rewritten_files(tmp_path: Path, formatted_toml: str) -> None:
+    """Formatted files are neither rewritten nor reported."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "pyproject.toml").write_text(UNFORMATTED_TOML)
+    (tmp_path / "b" / "pyproject.toml").write_text(formatted_toml)
+
+    result = runner.invoke(app, ["--no-cache", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert result.stderr == f"{tmp_path / 'a' / 'pyproject.toml'}: reformatted\n"
+    assert (tmp_path / "a" / "pyproject.toml").read_text() == formatted_toml
+
+
+def test_cli_write_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A file that cannot be replaced is an error, not a crash."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    def fail(self: Path, target: Path) -> Path:
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(Path, "replace", fail)
+
+    result = runner.invoke(app, ["--no-cache", str(filepath)])
+
+    assert result.exit_code == 1
+    assert result.stderr == f"error: {filepath}: Permission denied\n"
+    assert filepath.read_text() == UNFORMATTED_TOML
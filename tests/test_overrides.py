@@ -0,0 +1,141 @@
+"""Tests for the precompiled sort-override index."""
+
+from __future__ import annotations
+
+import fnmatch
+
+import pytest
+from toml_sort import TomlSort
+from toml_sort.tomlsort import SortOverrideConfiguration
+
+from pypfmt.config import get_sort_overrides, merge_config
+from pypfmt.overrides import OverrideIndex, compile_overrides
+from pypfmt.sorter import sort_toml
+
+A = SortOverrideConfiguration(first=["a"])
+B = SortOverrideConfiguration(first=["b"])
+C = SortOverrideConfiguration(first=["c"])
+
+
+def _fnmatch_lookup(
+    overrides: dict[str, SortOverrideConfiguration], path: str
+) -> SortOverrideConfiguration | None:
+    """toml-sort's own rule: exact key, else the first fnmatch pattern."""
+    if path in overrides:
+        return overrides[path]
+    matches = [
+        cfg for pattern, cfg in overrides.items() if fnmatch.fnmatch(path, pattern)
+    ]
+    return matches[0] if matches else None
+
+
+# -- OverrideIndex -------------------------------------------------------------
+
+
+def test_exact_path_beats_earlier_pattern() -> None:
+    """An exact key wins even when a glob listed before it also matches."""
+    index = OverrideIndex({"tool.*": A, "tool.ruff": B})
+
+    assert index.lookup("tool.ruff") is B
+    assert index.lookup("tool.mypy") is A
+
+
+def test_first_matching_pattern_wins() -> None:
+    """Of several matching globs, the one listed first applies."""
+    index = OverrideIndex({"tool.r?ff.*": A, "tool.*": B, "tool.ruff.lint": C})
+
+    assert index.lookup("tool.ruff.format") is A
+    assert index.lookup("tool.ruff.lint") is C
+    assert index.lookup("tool.black") is B
+    assert index.lookup("project") is None
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "",
+        "dependency-groups",
+        "dependency-groups.dev",
+        "tool.ruff.lint.per-file-ignores",
+        "tool.ruff.lint.per-file-ignores.tests/*.py",
+        "tool.tomlsort.overrides.x",
+        "tool.hatch.envs.default",
+        "x[1]",
+    ],
+)
+def test_matches_fnmatch_semantics(path: str) -> None:
+    """The index answers exactly what toml-sort's linear scan would."""
+    overrides = {
+        **get_sort_overrides(),
+        "tool.hatch.envs.[a-d]*": A,
+        "x[[]1]": B,
+        "*.default": C,
+    }
+
+    assert OverrideIndex(overrides).lookup(path) is _fnmatch_lookup(overrides, path)
+
+
+def test_many_overrides() -> None:
+    """Hundreds of patterns compile into one index and still match in order."""
+    overrides = {f"tool.t{index}.*": A for index in range(500)}
+    overrides["tool.t499.special"] = B
+
+    index = OverrideIndex(overrides)
+
+    assert index.lookup("tool.t250.x") is A
+    assert index.lookup("tool.t499.special") is B
+    assert index.lookup("tool.u1.x") is None
+
+
+def test_compile_overrides_is_cached_per_contents() -> None:
+    """Equal mappings share one index; a mutated mapping gets a new one."""
+    _, overrides, *_ = merge_config({"extend-overrides": {"tool.x": {"first": ["a"]}}})
+    index = compile_overrides(overrides)
+
+    assert compile_overrides(dict(overrides)) is index
+    mutable = dict(overrides)
+    mutable["tool.y"] = B
+    assert compile_overrides(mutable).lookup("tool.y") is B
+    del mutable["tool.y"]
+    mutable["tool.*"] = A
+    assert compile_overrides(mutable).lookup("tool.z") is A
+    assert index.lookup("tool.z") is None
+
+
+# -- Sorting with the index ------------------------------------------------------
+
+
+def test_sort_matches_toml_sort(before_toml: str) -> None:
+    """Indexed sorting is byte-identical to stock toml-sort."""
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(
+        {
+            "extend-overrides": {
+                **{f"tool.gen{index}.*": {"first": ["z"]} for index in range(200)},
+                "tool.ruff.*": {"table_keys": False},
+            }
+        }
+    )
+
+    expected = TomlSort(
+        before_toml,
+        comment_config=comment_cfg,
+        sort_config=sort_cfg,
+        format_config=format_cfg,
+        sort_config_overrides=dict(overrides),
+    ).sorted()
+
+    assert sort_toml(before_toml, sort_cfg, overrides, comment_cfg, format_cfg) == (
+        expected
+    )
+
+
+def test_empty_key_is_not_the_root() -> None:
+    """A key named ``""`` gets the ``*`` override; the root keeps the defaults."""
+    text = '"" = ["b", "a"]\nz = 1\na = 2\n'
+    sort_cfg, overrides, comment_cfg, format_cfg, _ = merge_config(
+        {"extend-overrides": {"*": {"inline_arrays": True, "table_keys": False}}}
+    )
+
+    assert sort_toml(text, sort_cfg, overrides, comment_cfg, format_cfg) == (
+        '"" = ["a", "b"]\na = 2\nz = 1\n'
+    )
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
 import difflib
+import os
 import re
 import tomllib
 from typing import TYPE_CHECKING, Any, cast
@@ -14,7 +16,20 @@ from hypothesis import strategies as st
 if TYPE_CHECKING:
     from pathlib import Path
 
-from pypfmt.pipeline import format_pyproject
+    from pytest_mock import MockerFixture
+
+import pypfmt.pipeline
+from pypfmt.config import merge_config
+from pypfmt.engine import format_chunk, format_text
+from pypfmt.formatter import TaploFormatter, format_toml
+from pypfmt.pipeline import (
+    Profile,
+    format_many,
+    format_pyproject,
+    format_pyproject_async,
+    is_fixed_point,
+    parse_pyproject,
+)
 
 
 def _flatten_dict(data: dict[str, Any], prefix: str = "") -> dict[str, Any]:
@@ -293,3 +308,276 @@ def test_format_raises_or_idempotent(raw: str) -> None:
         return
     # Assert: valid TOML output must be a fixed point
     assert format_pyproject(result) == result
+
+
+# ---------------------------------------------------------------------------
+# Formatter backend: batched taplo runs
+# ---------------------------------------------------------------------------
+def test_format_many_matches_single_document_formatting(before_toml):
+    """Batch formatting must be byte-identical to one taplo run per document."""
+    formatter = TaploFormatter()
+    texts = [before_toml, '[project]\nname="x"\n', "a = [1,2]\n"]
+
+    batch = formatter.format_many(texts)
+
+    assert batch == [formatter.format(text) for text in texts]
+
+
+def test_format_many_reports_failing_document():
+    """A taplo failure inside a batch surfaces as RuntimeError."""
+    formatter = TaploFormatter()
+
+    with pytest.raises(RuntimeError, match="taplo format failed"):
+        formatter.format_many(["a = 1\n", "[broken\n"])
+
+
+def test_formatter_missing_binary(mocker: MockerFixture):
+    """A formatter without a taplo binary raises RuntimeError on use."""
+    mocker.patch("pypfmt.formatter.shutil.which", return_value=None)
+
+    with pytest.raises(RuntimeError, match="taplo binary not found"):
+        format_toml("a = 1\n", formatter=TaploFormatter())
+
+
+# ---------------------------------------------------------------------------
+# Single-parse pipeline
+# ---------------------------------------------------------------------------
+def test_parsed_document_matches_text_input(before_toml):
+    """Formatting a ParsedPyproject gives the same output as raw text."""
+    assert format_pyproject(parse_pyproject(before_toml)) == format_pyproject(
+        before_toml
+    )
+
+
+def test_engine_parses_each_document_once(mocker: MockerFixture):
+    """Conflict check, config extraction and validation share one parse."""
+    text = "[tool.tomlsort]\n\n[tool.pypfmt]\nsort-tables = true\n"
+    loads = mocker.spy(tomllib, "loads")
+
+    result = format_text(text, "pyproject.toml")
+
+    assert result.error is None
+    assert result.warning is not None
+    assert loads.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Fast path: known fixed points skip sort and format
+# ---------------------------------------------------------------------------
+def test_known_fixed_point_skips_sort_and_format(after_toml, mocker: MockerFixture):
+    """Re-formatting an observed fixed point returns it without toml-sort."""
+    assert format_pyproject(after_toml) == after_toml
+    sort = mocker.patch("pypfmt.pipeline.sort_toml")
+
+    assert format_pyproject(after_toml) == after_toml
+    sort.assert_not_called()
+
+
+def test_unformatted_input_is_not_a_fixed_point(before_toml):
+    """Only inputs the pipeline returned unchanged are remembered."""
+    format_pyproject(before_toml)
+    assert not is_fixed_point(before_toml)
+
+
+def test_fixed_points_are_config_specific(after_toml):
+    """A fixed point under the defaults is not assumed for other configs."""
+    format_pyproject(after_toml)
+    assert is_fixed_point(after_toml)
+    assert not is_fixed_point(after_toml, merge_config({"sort-tables": False}))
+
+
+# ---------------------------------------------------------------------------
+# Stage timing hooks
+# ---------------------------------------------------------------------------
+def test_on_stage_reports_each_stage(before_toml):
+    """The hook sees parse, sort and format with their input sizes."""
+    calls: list[tuple[str, float, int]] = []
+
+    format_pyproject(before_toml, on_stage=lambda *call: calls.append(call))
+
+    assert [stage for stage, _, _ in calls] == ["parse", "sort", "format"]
+    assert calls[0][2] == len(before_toml.encode("utf-8"))
+    assert all(seconds >= 0 for _, seconds, _ in calls)
+
+
+def test_profile_aggregates_across_documents(before_toml, after_toml):
+    """A Profile is a hook and totals every call per stage."""
+    profile = Profile()
+    format_pyproject(before_toml, on_stage=profile)
+    format_pyproject(after_toml, on_stage=profile)
+
+    assert profile.stages["parse"].calls == 2
+    assert profile.stages["format"].calls == 2
+    report = profile.report()
+    assert report.splitlines()[2].startswith("parse")
+    assert "sort" in report
+
+
+def test_engine_results_carry_timings(tmp_path: Path, before_toml):
+    """File results record every stage, including the read."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(before_toml)
+
+    (result,) = format_chunk([str(filepath)])
+
+    assert [timing.stage for timing in result.timings] == [
+        "read",
+        "parse",
+        "config",
+        "sort",
+        "format",
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Batch API
+# ---------------------------------------------------------------------------
+_BATCH_TEXTS = ['[project]\nname="x"\n', "b = 1\na = [1,2]\n", "[tool.z]\n[tool.a]\n"]
+
+
+def test_batch_api_matches_format_pyproject(before_toml):
+    """format_many yields what format_pyproject returns, in input order."""
+    texts = [before_toml, *_BATCH_TEXTS]
+
+    results = list(format_many(iter(texts), batch_size=2))
+
+    assert results == [format_pyproject(text) for text in texts]
+
+
+def test_batch_api_raises_or_returns_exceptions():
+    """Invalid documents raise in order, or are yielded when requested."""
+    texts = ["a = 1\n", "[broken\n", "b = 2\n"]
+
+    results = format_many(texts)
+    assert next(results) == "a = 1\n"
+    with pytest.raises(tomllib.TOMLDecodeError):
+        next(results)
+
+    outputs = list(format_many(texts, return_exceptions=True))
+    assert isinstance(outputs[1], tomllib.TOMLDecodeError)
+    assert outputs[0::2] == ["a = 1\n", "b = 2\n"]
+
+
+def test_batch_api_process_pool_keeps_order(before_toml):
+    """Fanning batches out to worker processes does not change the output."""
+    texts = [before_toml, *_BATCH_TEXTS] * 2
+
+    results = list(format_many(texts, jobs=2, batch_size=2))
+
+    assert results == [format_pyproject(text) for text in texts]
+
+
+def test_batch_api_resolves_defaults_once(mocker: MockerFixture):
+    """Default configs are built once per call, not once per document."""
+    spy = mocker.spy(pypfmt.pipeline, "merge_config")
+
+    list(format_many(_BATCH_TEXTS * 3, batch_size=2))
+
+    assert spy.call_count == 1
+
+
+def test_batch_api_runs_taplo_once_per_batch(mocker: MockerFixture):
+    """Each batch of documents is handed to taplo in a single call."""
+    formatter = TaploFormatter()
+    spy = mocker.spy(formatter, "format_many")
+
+    list(format_many(_BATCH_TEXTS * 2, formatter=formatter, batch_size=4))
+
+    assert spy.call_count == 2
+    assert [len(call.args[0]) for call in spy.call_args_list] == [4, 2]
+
+
+def test_batch_api_reports_stage_timings():
+    """on_stage sees each document's parse and sort, and one format per batch."""
+    profile = Profile()
+
+    list(format_many(_BATCH_TEXTS, on_stage=profile))
+
+    assert profile.stages["parse"].calls == len(_BATCH_TEXTS)
+    assert profile.stages["sort"].calls == len(_BATCH_TEXTS)
+    assert profile.stages["format"].calls == 1
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+def test_async_matches_format_pyproject(before_toml):
+    """Concurrent async formatting gives the sync pipeline's output."""
+    texts = [before_toml, *_BATCH_TEXTS]
+
+    async def run() -> list[str]:
+        return list(await asyncio.gather(*map(format_pyproject_async, texts)))
+
+    assert asyncio.run(run()) == [format_pyproject(text) for text in texts]
+
+
+def test_async_raises_sync_error_types(mocker: MockerFixture):
+    """Invalid TOML and a missing taplo raise the same errors as the sync API."""
+    with pytest.raises(tomllib.TOMLDecodeError):
+        asyncio.run(format_pyproject_async("[broken\n"))
+
+    mocker.patch("pypfmt.formatter.shutil.which", return_value=None)
+    with pytest.raises(RuntimeError, match="taplo binary not found"):
+        asyncio.run(format_pyproject_async("a = 1\n", formatter=TaploFormatter()))
+
+
+def test_async_reports_taplo_failure(tmp_path: Path):
+    """A failing taplo run surfaces as RuntimeError with its message."""
+    binary = tmp_path / "taplo"
+    binary.write_text("#!/bin/sh\necho boom >&2\nexit 1\n")
+    binary.chmod(0o755)
+
+    with pytest.raises(RuntimeError, match="taplo format failed: boom"):
+        asyncio.run(
+            format_pyproject_async("a = 1\n", formatter=TaploFormatter(str(binary)))
+        )
+
+
+def test_async_cancellation_kills_taplo(tmp_path: Path):
+    """Cancelling the task terminates the taplo subprocess."""
+    pid_file = tmp_path / "pid"
+    binary = tmp_path / "taplo"
+    binary.write_text(f"#!/bin/sh\necho $$ > {pid_file}\nexec sleep 30\n")
+    binary.chmod(0o755)
+
+    async def run() -> None:
+        task = asyncio.create_task(
+            format_pyproject_async("a = 1\n", formatter=TaploFormatter(str(binary)))
+        )
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_async_limit_bounds_concurrency(mocker: MockerFixture):
+    """No more documents are in flight than the semaphore allows."""
+    active = peak = 0
+    real_format = TaploFormatter.format_async
+
+    async def tracking(self: TaploFormatter, *args: Any) -> str:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await real_format(self, *args)
+        finally:
+            active -= 1
+
+    mocker.patch.object(TaploFormatter, "format_async", tracking)
+
+    async def run() -> None:
+        limit = asyncio.Semaphore(2)
+        await asyncio.gather(
+            *(format_pyproject_async(text, limit=limit) for text in _BATCH_TEXTS * 2)
+        )
+
+    asyncio.run(run())
+
+    assert 1 <= peak <= 2
@@ -1,5 +1,6 @@
 """CLI tests for pypfmt."""
 
+import os
 import sys
 from pathlib import Path
 
@@ -194,6 +195,76 @@ def test_cli_multiple_files_check(tmp_path: Path, formatted_toml: str) -> None:
     assert result.exit_code == 1
 
 
+# -- Parallel jobs -------------------------------------------------------------
+
+
+def test_cli_jobs_diff_preserves_input_order(tmp_path: Path) -> None:
+    """Parallel diff output follows input order, not completion order."""
+    files = [tmp_path / f"{name}.toml" for name in ("c", "a", "b")]
+    for filepath in files:
+        filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--diff", "-j", "2", *map(str, files)])
+
+    assert result.exit_code == 0
+    positions = [result.stdout.index(f"--- a/{filepath}") for filepath in files]
+    assert positions == sorted(positions)
+
+
+def test_cli_jobs_auto_check_aggregates_exit_code(
+    tmp_path: Path, formatted_toml: str
+) -> None:
+    """-j auto still exits non-zero if ANY file needs changes."""
+    file_a = tmp_path / "a.toml"
+    file_b = tmp_path / "b.toml"
+    file_a.write_text(formatted_toml)
+    file_b.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--check", "-j", "auto", str(file_a), str(file_b)])
+
+    assert result.exit_code == 1
+    assert f"error: {file_b}: not properly formatted" in result.stderr
+    assert str(file_a) not in result.stderr
+
+
+def test_cli_jobs_fix_reformats_all_files(tmp_path: Path, formatted_toml: str) -> None:
+    """Parallel fix mode writes every file from the parent process."""
+    files = [tmp_path / f"{index}.toml" for index in range(4)]
+    for filepath in files:
+        filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--jobs", "3", *map(str, files)])
+
+    assert result.exit_code == 0
+    assert all(filepath.read_text() == formatted_toml for filepath in files)
+    assert result.stderr.count("reformatted") == len(files)
+
+
+def test_cli_jobs_invalid_value(tmp_path: Path) -> None:
+    """A non-positive or non-numeric --jobs value is a usage error."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--jobs", "0", str(filepath)])
+
+    assert result.exit_code == 2
+    assert filepath.read_text() == UNFORMATTED_TOML
+
+
+def test_cli_profile_prints_stage_breakdown(tmp_path: Path) -> None:
+    """--profile aggregates stage timings across all files to stderr."""
+    files = [tmp_path / f"{index}.toml" for index in range(2)]
+    for filepath in files:
+        filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--check", "--profile", "-j", "2", *map(str, files)])
+
+    assert result.exit_code == 1
+    assert "profile: 2 document(s)" in result.stderr
+    for stage in ("read", "parse", "config", "sort", "format"):
+        assert f"\n{stage} " in result.stderr
+
+
 # -- Error handling ------------------------------------------------------------
 
 
@@ -273,12 +344,12 @@ def test_cli_no_args_tty_exits_with_usage(mocker: MockerFixture) -> None:
 
 
 def test_cli_no_args_non_tty_no_data_exits(mocker: MockerFixture) -> None:
-    """Non-TTY stdin with no data available exits code 2 instead of hanging."""
+    """Non-TTY stdin that is not a pipe or file exits code 2 instead of hanging."""
     # Arrange
     mock_sys = mocker.patch("pypfmt.cli.sys")
     mock_sys.stdin.isatty.return_value = False
     mock_sys.stdout = sys.stdout
-    mocker.patch("pypfmt.cli._stdin_has_data", return_value=False)
+    mocker.patch("pypfmt.cli._stdin_is_input", return_value=False)
 
     # Act
     result = runner.invoke(app, [])
@@ -288,64 +359,112 @@ def test_cli_no_args_non_tty_no_data_exits(mocker: MockerFixture) -> None:
     assert "no input files provided" in result.stderr
 
 
-# -- _stdin_has_data unit tests ------------------------------------------------
-
+# -- Explicit stdin -------------------------------------------------------------
 
-def test_stdin_has_data_returns_true_when_readable(mocker: MockerFixture) -> None:
-    """select.select returning readable fd means data is available."""
-    from pypfmt.cli import _stdin_has_data
 
+def test_cli_dash_reads_stdin(mocker: MockerFixture, formatted_toml: str) -> None:
+    """'-' reads stdin even when it would not be detected as input."""
     # Arrange
-    mocker.patch("pypfmt.cli.select.select", return_value=([sys.stdin], [], []))
+    is_input = mocker.patch("pypfmt.cli._stdin_is_input", return_value=False)
 
     # Act
-    result = _stdin_has_data()
+    result = runner.invoke(app, ["-"], input=UNFORMATTED_TOML)
 
     # Assert
-    assert result is True
+    assert result.exit_code == 0
+    assert result.stdout == formatted_toml
+    is_input.assert_not_called()
 
 
-def test_stdin_has_data_returns_false_when_not_readable(mocker: MockerFixture) -> None:
-    """select.select returning empty list means no data is available."""
-    from pypfmt.cli import _stdin_has_data
+def test_cli_dash_with_paths_is_usage_error(tmp_path: Path) -> None:
+    """'-' cannot be mixed with file paths."""
+    result = runner.invoke(app, ["-", str(tmp_path)], input=UNFORMATTED_TOML)
 
-    # Arrange
-    mocker.patch("pypfmt.cli.select.select", return_value=([], [], []))
+    assert result.exit_code == 2
 
-    # Act
-    result = _stdin_has_data()
 
-    # Assert
-    assert result is False
+def test_cli_stdin_filename_labels_messages() -> None:
+    """--stdin-filename names stdin in diffs and errors."""
+    diff = runner.invoke(
+        app, ["--diff", "--stdin-filename", "pkg/pyproject.toml"], input="a=1\n"
+    )
+    error = runner.invoke(
+        app, ["-", "--stdin-filename", "pkg/pyproject.toml"], input="a = \n"
+    )
 
+    assert "+++ b/pkg/pyproject.toml" in diff.stdout
+    assert error.exit_code == 1
+    assert "error: pkg/pyproject.toml:" in error.stderr
 
-def test_stdin_has_data_true_when_fileno_unsupported(mocker: MockerFixture) -> None:
-    """Falls back to True when stdin lacks fileno() support."""
-    import io
 
-    from pypfmt.cli import _stdin_has_data
+def test_cli_stdin_filename_needs_stdin(tmp_path: Path) -> None:
+    """--stdin-filename with file paths is a usage error."""
+    result = runner.invoke(app, ["--stdin-filename", "x", str(tmp_path)])
 
-    # Arrange
-    mocker.patch(
-        "pypfmt.cli.select.select", side_effect=io.UnsupportedOperation("fileno")
-    )
+    assert result.exit_code == 2
 
-    # Act
-    result = _stdin_has_data()
 
-    # Assert
-    assert result is True
+# -- _stdin_is_input unit tests -------------------------------------------------
 
 
-def test_stdin_has_data_fallback_on_oserror(mocker: MockerFixture) -> None:
-    """Falls back to True on OSError (e.g. bad file descriptor)."""
-    from pypfmt.cli import _stdin_has_data
+def _stdin_fd(mocker: MockerFixture, fd: int) -> None:
+    """Point ``pypfmt.cli.sys.stdin`` at file descriptor ``fd``."""
+    mocker.patch("pypfmt.cli.sys").stdin.fileno.return_value = fd
 
-    # Arrange
-    mocker.patch("pypfmt.cli.select.select", side_effect=OSError("Bad file descriptor"))
 
-    # Act
-    result = _stdin_has_data()
+def test_stdin_is_input_for_pipe(mocker: MockerFixture) -> None:
+    """A pipe is input, whether or not data has arrived yet."""
+    from pypfmt.cli import _stdin_is_input
 
-    # Assert
-    assert result is True
+    read_fd, write_fd = os.pipe()
+    try:
+        _stdin_fd(mocker, read_fd)
+
+        assert _stdin_is_input() is True
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_stdin_is_input_for_regular_file(mocker: MockerFixture, tmp_path: Path) -> None:
+    """A redirected file is input."""
+    from pypfmt.cli import _stdin_is_input
+
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+    with filepath.open() as handle:
+        _stdin_fd(mocker, handle.fileno())
+
+        assert _stdin_is_input() is True
+
+
+def test_stdin_is_not_input_for_devnull(mocker: MockerFixture) -> None:
+    """Character devices such as /dev/null are not input."""
+    from pypfmt.cli import _stdin_is_input
+
+    with Path(os.devnull).open() as handle:
+        _stdin_fd(mocker, handle.fileno())
+
+        assert _stdin_is_input() is False
+
+
+def test_stdin_is_input_when_fileno_unsupported(mocker: MockerFixture) -> None:
+    """In-memory stdin without a descriptor is read."""
+    import io
+
+    from pypfmt.cli import _stdin_is_input
+
+    mock_sys = mocker.patch("pypfmt.cli.sys")
+    mock_sys.stdin.fileno.side_effect = io.UnsupportedOperation("fileno")
+
+    assert _stdin_is_input() is True
+
+
+def test_stdin_is_not_input_for_bad_descriptor(mocker: MockerFixture) -> None:
+    """A closed or invalid descriptor is not input."""
+    from pypfmt.cli import _stdin_is_input
+
+    _stdin_fd(mocker, 0)
+    mocker.patch("pypfmt.cli.os.fstat", side_effect=OSError("Bad file descriptor"))
+
+    assert _stdin_is_input() is False
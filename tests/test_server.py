@@ -0,0 +1,294 @@
+"""Tests for the formatting daemon and its client."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from pypfmt import __version__
+from pypfmt.cli import _remote_result, app
+from pypfmt.client import DaemonClient, DaemonError, is_trusted, socket_path
+from pypfmt.diff import diff_stat, unified_diff
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="requires Unix domain sockets"
+)
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+@pytest.fixture
+def daemon(monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Run a daemon in a background thread and return its socket path."""
+    from pypfmt.server import DaemonServer
+
+    # Unix socket paths are limited to ~100 bytes; tmp_path can be longer.
+    directory = Path(tempfile.mkdtemp(prefix="pypfmt-"))
+    path = directory / "d.sock"
+    monkeypatch.setenv("PYPFMT_SOCKET", str(path))
+    server = DaemonServer(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield path
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_socket_path_honours_env(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """PYPFMT_SOCKET overrides the default socket location."""
+    monkeypatch.setenv("PYPFMT_SOCKET", str(tmp_path / "x.sock"))
+    assert socket_path() == tmp_path / "x.sock"
+
+
+def test_connect_without_daemon_returns_none(tmp_path: Path) -> None:
+    """No socket, or a stale one, means no client."""
+    assert DaemonClient.connect(tmp_path / "missing.sock") is None
+    stale = tmp_path / "stale.sock"
+    stale.write_text("")
+    assert DaemonClient.connect(stale) is None
+
+
+def test_default_socket_is_in_a_private_directory(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Without a runtime directory the socket gets a per-user directory."""
+    monkeypatch.delenv("PYPFMT_SOCKET")
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+    path = socket_path()
+
+    assert path.parent.name == f"pypfmt-{os.getuid()}"
+    assert path.parent.parent == Path(tempfile.gettempdir())
+
+
+def test_only_private_sockets_are_trusted(daemon: Path) -> None:
+    """Group or other access to the socket or its directory is refused."""
+    assert is_trusted(daemon)
+    daemon.parent.chmod(0o755)
+    assert not is_trusted(daemon)
+    daemon.parent.chmod(0o700)
+    daemon.chmod(0o770)
+    assert not is_trusted(daemon)
+    assert DaemonClient.connect(daemon) is None
+
+
+def test_cli_ignores_daemon_in_shared_directory(
+    daemon: Path, tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """A socket others could have planted is never talked to."""
+    daemon.parent.chmod(0o1777)
+    remote = mocker.patch("pypfmt.cli._remote_result")
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, [str(filepath)])
+
+    assert result.exit_code == 0
+    assert filepath.read_text() == formatted_toml
+    remote.assert_not_called()
+
+
+def test_changes_are_judged_against_local_content(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """The daemon's claimed original is ignored; the file read here counts."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    client = mocker.Mock()
+    client.request.return_value = {
+        "formatted": formatted_toml,
+        "original": UNFORMATTED_TOML,
+        "error": None,
+        "warning": None,
+    }
+
+    result = _remote_result(client, str(filepath), None)
+
+    assert not result.changed
+    assert client.request.call_args.args[0]["text"] == formatted_toml
+
+
+def test_daemon_ops(daemon: Path, formatted_toml: str) -> None:
+    """format, check and diff answer from the same warm pipeline."""
+    with DaemonClient.connect(daemon, version=__version__) as client:
+        request = {"path": "pyproject.toml", "text": UNFORMATTED_TOML}
+        formatted = client.request({"op": "format", **request})
+        checked = client.request({"op": "check", **request})
+        diffed = client.request({"op": "diff", **request})
+
+    assert formatted["formatted"] == formatted_toml
+    assert "original" not in formatted
+    assert checked["changed"] is True
+    assert "formatted" not in checked
+    assert diffed["diff"].startswith("--- a/pyproject.toml\n")
+
+
+def test_daemon_diffs_match_the_cli(daemon: Path, formatted_toml: str) -> None:
+    """Diffs come from pypfmt.diff, in the requested format."""
+    request = {"op": "diff", "path": "pyproject.toml", "text": UNFORMATTED_TOML}
+
+    with DaemonClient.connect(daemon) as client:
+        unified = client.request(request)
+        stat = client.request({**request, "diff_format": "stat"})
+        with pytest.raises(DaemonError, match="unknown diff_format"):
+            client.request({**request, "diff_format": "html"})
+
+    expected = unified_diff(UNFORMATTED_TOML, formatted_toml, "pyproject.toml")
+    assert unified["diff"] == "".join(expected)
+    assert stat["diff"] == diff_stat(UNFORMATTED_TOML, formatted_toml, "pyproject.toml")
+
+
+def test_daemon_reads_files_and_reports_errors(daemon: Path, tmp_path: Path) -> None:
+    """Requests without text read the file; failures come back as data."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    with DaemonClient.connect(daemon) as client:
+        read = client.request({"op": "format", "path": str(filepath)})
+        missing = client.request({"op": "check", "path": str(tmp_path / "nope")})
+        invalid = client.request({"op": "check", "path": "x", "text": "[bad"})
+
+    assert read["original"] == UNFORMATTED_TOML
+    assert missing["error"] == "file not found"
+    assert invalid["error"] is not None
+
+
+def test_conflict_warning_follows_the_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The client's PPF_HIDE_CONFLICT_WARNING counts, not the daemon's."""
+    from pypfmt.server import handle_request
+
+    request = {
+        "op": "check",
+        "path": "pyproject.toml",
+        "text": "[tool.pypfmt]\n[tool.tomlsort]\n",
+    }
+    monkeypatch.setenv("PPF_HIDE_CONFLICT_WARNING", "1")
+    shown = handle_request({**request, "hide_conflict_warning": False})
+    monkeypatch.delenv("PPF_HIDE_CONFLICT_WARNING")
+    hidden = handle_request({**request, "hide_conflict_warning": True})
+
+    assert shown["warning"] is not None
+    assert hidden["warning"] is None
+    assert "PPF_HIDE_CONFLICT_WARNING" not in os.environ
+
+
+def test_daemon_rejects_bad_requests(daemon: Path) -> None:
+    """Malformed lines and unknown ops get a protocol error response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(daemon))
+        stream = sock.makefile("rwb")
+        stream.write(b"not json\n" + json.dumps({"op": "explode"}).encode() + b"\n")
+        stream.flush()
+        responses = [json.loads(stream.readline()) for _ in range(2)]
+
+    assert [response["ok"] for response in responses] == [False, False]
+    assert "unknown op" in responses[1]["message"]
+
+
+@pytest.mark.parametrize("reply", [b"not json\n", b"[1, 2]\n", b"\xff\n"])
+def test_client_rejects_bad_responses(reply: bytes) -> None:
+    """A garbled response is a DaemonError, not a crash."""
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with theirs, DaemonClient(ours) as client:
+        theirs.sendall(reply)
+        with pytest.raises(DaemonError, match="invalid response"):
+            client.request({"op": "hello"})
+
+
+def test_version_mismatch_is_not_used(daemon: Path) -> None:
+    """A daemon running another pypfmt version is ignored."""
+    assert DaemonClient.connect(daemon, version="0.0.0-other") is None
+
+
+def test_second_daemon_refuses_to_start(daemon: Path) -> None:
+    """Only one daemon can own a socket."""
+    from pypfmt.server import DaemonServer
+
+    with pytest.raises(RuntimeError, match="already listening"):
+        DaemonServer(daemon)
+
+
+def test_server_requires_a_private_directory(tmp_path: Path) -> None:
+    """The daemon will not listen where others could replace its socket."""
+    from pypfmt.server import DaemonServer
+
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+
+    with pytest.raises(RuntimeError, match="chmod 700"):
+        DaemonServer(shared / "d.sock")
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "geteuid") or os.geteuid() != 0, reason="needs root to chown"
+)
+def test_server_keeps_other_users_sockets() -> None:
+    """A path owned by another user is neither removed nor reused."""
+    from pypfmt.server import DaemonServer
+
+    directory = Path(tempfile.mkdtemp(prefix="pypfmt-"))
+    path = directory / "d.sock"
+    try:
+        path.write_text("")
+        os.chown(path, os.getuid() + 1, -1)
+
+        with pytest.raises(RuntimeError, match="another user"):
+            DaemonServer(path)
+
+        assert path.exists()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_cli_uses_daemon(
+    daemon: Path, tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """The CLI formats files and stdin on a running daemon."""
+    local = mocker.patch("pypfmt.engine.format_files")
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    file_result = runner.invoke(app, [str(filepath)])
+    stdin_result = runner.invoke(app, [], input=UNFORMATTED_TOML)
+
+    assert file_result.exit_code == 0
+    assert filepath.read_text() == formatted_toml
+    assert stdin_result.stdout == formatted_toml
+    local.assert_not_called()
+
+
+def test_cli_jobs_bypass_daemon(
+    daemon: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Parallel runs format in-process rather than on the serial daemon."""
+    remote = mocker.patch("pypfmt.cli._remote_result")
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+
+    result = runner.invoke(app, ["--check", "-j", "2", str(filepath)])
+
+    assert result.exit_code == 1
+    remote.assert_not_called()
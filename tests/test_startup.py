@@ -0,0 +1,104 @@
+"""Tests for CLI start-up cost.
+
+Each check runs pypfmt in a fresh interpreter, because import work done
+by the test process itself would hide the cost being measured.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+# Modules that only formatting in-process (or printing a diff) may load.
+_HEAVY_MODULES = frozenset(
+    {
+        "hatchling",
+        "multiprocessing",
+        "pypfmt.diff",
+        "pypfmt.engine",
+        "pypfmt.native",
+        "pypfmt.pipeline",
+        "toml_sort",
+        "tomlkit",
+    }
+)
+
+# Wall-clock budgets in seconds, for the best of several cold starts.
+# Generous enough for slow CI runners, tight enough to catch an import
+# regression such as loading hatchling or toml-sort for --version.
+_VERSION_BUDGET = 0.5
+_FORMAT_BUDGET = 1.0
+_RUNS = 3
+
+_LOADED_MODULES = """
+import sys
+from pypfmt.cli import app
+try:
+    app(sys.argv[1:])
+except SystemExit:
+    pass
+print("\\n".join(sys.modules))
+"""
+
+
+def _loaded_modules(*args: str) -> set[str]:
+    """Return the modules imported by a fresh ``pypfmt *args`` run."""
+    result = subprocess.run(
+        [sys.executable, "-c", _LOADED_MODULES, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def _best_time(args: list[str], setup: Callable[[], None] | None = None) -> float:
+    """Return the fastest of several ``python -m pypfmt *args`` runs."""
+    timings = []
+    for _ in range(_RUNS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pypfmt", *args], capture_output=True, check=False
+        )
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_version_skips_heavy_imports() -> None:
+    """--version loads neither the pipeline nor hatchling."""
+    assert not _loaded_modules("--version") & _HEAVY_MODULES
+
+
+def test_help_skips_heavy_imports() -> None:
+    """--help loads neither the pipeline nor hatchling."""
+    assert not _loaded_modules("--help") & _HEAVY_MODULES
+
+
+@pytest.mark.slow
+def test_version_within_budget() -> None:
+    """A cold ``pypfmt --version`` stays within its time budget."""
+    elapsed = _best_time(["--version"])
+
+    assert elapsed < _VERSION_BUDGET, f"--version took {elapsed:.3f}s"
+
+
+@pytest.mark.slow
+def test_format_single_file_within_budget(tmp_path: Path, before_toml: str) -> None:
+    """A cold single-file format stays within its time budget."""
+    filepath = tmp_path / "pyproject.toml"
+
+    elapsed = _best_time(
+        ["--no-cache", str(filepath)], lambda: filepath.write_text(before_toml)
+    )
+
+    assert elapsed < _FORMAT_BUDGET, f"formatting took {elapsed:.3f}s"
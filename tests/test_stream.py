@@ -0,0 +1,155 @@
+"""Tests for framed document streams (``--stream``)."""
+
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from pypfmt.cache import FormatCache
+from pypfmt.cli import app
+from pypfmt.engine import format_frames
+from pypfmt.stream import read_frames, write_frame
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+class _Trickle(io.RawIOBase):
+    """Binary stream handing out at most ``size`` bytes per read."""
+
+    def __init__(self, data: bytes, size: int) -> None:
+        self._data = io.BytesIO(data)
+        self._size = size
+
+    def readable(self) -> bool:
+        return True
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._data.read(min(self._size, size))
+
+
+# -- Framing -------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+def test_nul_frames_survive_any_chunking(size: int) -> None:
+    """Documents split across reads come out whole; the last NUL is optional."""
+    stream = _Trickle(b"a = 1\0\0b = 2\0c = 3", size)
+
+    assert list(read_frames(stream, "nul")) == [b"a = 1", b"", b"b = 2", b"c = 3"]
+
+
+def test_length_frames() -> None:
+    """Each length-prefixed document is read exactly."""
+    stream = io.BytesIO(b"6\na = 1\n0\n2\n\0\n")
+
+    assert list(read_frames(stream, "length")) == [b"a = 1\n", b"", b"\0\n"]
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [(b"x\na", "invalid frame header"), (b"9\nabc", "truncated frame")],
+)
+def test_broken_length_frames(data: bytes, message: str) -> None:
+    """Malformed headers and short documents are errors."""
+    with pytest.raises(ValueError, match=message):
+        list(read_frames(io.BytesIO(data), "length"))
+
+
+@pytest.mark.parametrize("framing", ["nul", "length"])
+def test_written_frames_read_back(framing: str) -> None:
+    """``write_frame`` produces what ``read_frames`` accepts."""
+    out = io.BytesIO()
+    for data in (b"a = 1\n", b"", "é = 2\n".encode()):
+        write_frame(out, data, framing)
+    out.seek(0)
+
+    assert list(read_frames(out, framing)) == [b"a = 1\n", b"", "é = 2\n".encode()]
+
+
+# -- Formatting ----------------------------------------------------------------
+
+
+def test_format_frames_keeps_order_in_parallel(formatted_toml: str) -> None:
+    """Results come back in input order, one per frame."""
+    frames = [(f"d{index}", UNFORMATTED_TOML.encode()) for index in range(6)]
+    frames[2] = ("bad", b"\xff = 1")
+
+    results = list(format_frames(iter(frames), jobs=2))
+
+    assert [result.path for result in results] == [label for label, _ in frames]
+    assert results[0].formatted == formatted_toml
+    assert results[2].error == "not valid UTF-8"
+    assert results[2].original == "\udcff = 1"
+
+
+def test_format_frames_records_formatted_documents(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Documents taplo leaves unchanged are added to the cache."""
+    cache = FormatCache(tmp_path)
+    add = mocker.spy(cache, "add")
+    text = '[project]\nname = "frames-cache"\n'
+
+    (result,) = format_frames([("d", text.encode())], cache=cache, sort_engine="native")
+
+    assert not result.changed
+    add.assert_called_once()
+
+
+def test_cli_stream_fix(formatted_toml: str) -> None:
+    """Each input frame gets one output frame; bad documents pass through."""
+    stdin = f"{UNFORMATTED_TOML}\0x = \0{formatted_toml}\0"
+
+    result = runner.invoke(app, ["--no-cache", "--stream", "nul"], input=stdin)
+
+    assert result.exit_code == 1
+    assert result.stdout == f"{formatted_toml}\0x = \0{formatted_toml}\0"
+    assert "error: stdin:2:" in result.stderr
+
+
+def test_cli_stream_length(formatted_toml: str) -> None:
+    """Length framing is used for the output too."""
+    stdin = f"{len(UNFORMATTED_TOML)}\n{UNFORMATTED_TOML}"
+
+    result = runner.invoke(app, ["--no-cache", "--stream", "length"], input=stdin)
+
+    assert result.exit_code == 0
+    assert result.stdout == f"{len(formatted_toml)}\n{formatted_toml}"
+
+
+def test_cli_stream_check(formatted_toml: str) -> None:
+    """Check mode names the documents that need formatting."""
+    stdin = f"{formatted_toml}\0{UNFORMATTED_TOML}"
+
+    result = runner.invoke(
+        app, ["--no-cache", "--check", "--stream", "nul"], input=stdin
+    )
+
+    assert result.exit_code == 1
+    assert result.stdout == ""
+    assert result.stderr == "error: stdin:2: not properly formatted\n"
+
+
+def test_cli_stream_broken_framing() -> None:
+    """A truncated length frame stops the run with an error."""
+    result = runner.invoke(app, ["--no-cache", "--stream", "length"], input="9\na")
+
+    assert result.exit_code == 1
+    assert "truncated frame" in result.stderr
+
+
+def test_cli_stream_rejects_files(tmp_path: Path) -> None:
+    """--stream reads stdin only."""
+    result = runner.invoke(app, ["--stream", "nul", str(tmp_path)])
+
+    assert result.exit_code == 2
@@ -0,0 +1,156 @@
+"""Tests for watch mode."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from typer.testing import CliRunner
+
+from pypfmt import watch as watch_module
+from pypfmt.cli import app
+from pypfmt.watch import Watcher
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+UNFORMATTED_TOML = '[project]\nname="test"\n'
+
+
+def _write(path: Path, text: str) -> None:
+    """Write ``text`` and move mtime forward, whatever the fs resolution."""
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_first_poll_formats_every_file(tmp_path: Path, formatted_toml: str) -> None:
+    """The initial poll reports all watched files."""
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "pyproject.toml").write_text(formatted_toml)
+
+    results = list(Watcher([str(tmp_path)]).poll())
+
+    assert sorted(result.path for result in results) == [
+        str(tmp_path / "a" / "pyproject.toml"),
+        str(tmp_path / "b" / "pyproject.toml"),
+    ]
+
+
+def test_poll_reports_only_content_changes(tmp_path: Path, formatted_toml: str) -> None:
+    """Touching a file is ignored; editing it is reformatted."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    watcher = Watcher([str(filepath)])
+    list(watcher.poll())
+
+    _write(filepath, formatted_toml)
+    assert list(watcher.poll()) == []
+
+    _write(filepath, UNFORMATTED_TOML)
+    (result,) = watcher.poll()
+    assert result.changed
+    assert result.formatted == formatted_toml
+
+
+def test_poll_ignores_its_own_writes(tmp_path: Path, formatted_toml: str) -> None:
+    """A file rewritten by the consumer is not reformatted again."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+    watcher = Watcher([str(filepath)])
+
+    for result in watcher.poll():
+        _write(filepath, result.formatted or "")
+
+    assert list(watcher.poll()) == []
+    assert filepath.read_text() == formatted_toml
+
+
+def test_rescan_picks_up_new_and_recreated_files(
+    tmp_path: Path, formatted_toml: str
+) -> None:
+    """Files created after startup are found on the next directory walk."""
+    watcher = Watcher([str(tmp_path)], rescan_interval=0)
+    assert list(watcher.poll()) == []
+
+    filepath = tmp_path / "pkg" / "pyproject.toml"
+    filepath.parent.mkdir()
+    filepath.write_text(formatted_toml)
+    assert [result.path for result in watcher.poll()] == [str(filepath)]
+
+    filepath.unlink()
+    assert list(watcher.poll()) == []
+    filepath.write_text(formatted_toml)
+    assert [result.path for result in watcher.poll()] == [str(filepath)]
+
+
+def test_unchanged_tree_is_not_walked_again(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """Directories are only walked again once one of them changed."""
+    (tmp_path / "pkg").mkdir()
+    filepath = tmp_path / "pkg" / "pyproject.toml"
+    filepath.write_text(formatted_toml)
+    walk = mocker.spy(watch_module, "discover")
+    watcher = Watcher([str(tmp_path)], rescan_interval=0)
+    list(watcher.poll())
+
+    _write(filepath, UNFORMATTED_TOML)
+    assert [result.path for result in watcher.poll()] == [str(filepath)]
+    assert walk.call_count == 1
+
+    (tmp_path / "pkg" / "other.txt").write_text("")
+    list(watcher.poll())
+    assert walk.call_count == 2
+
+
+def test_config_edits_reformat_dependents(tmp_path: Path) -> None:
+    """Editing an inherited pypfmt.toml re-runs the files below it."""
+    (tmp_path / ".git").mkdir()
+    filepath = tmp_path / "pkg" / "pyproject.toml"
+    filepath.parent.mkdir()
+    filepath.write_text("[tool.x]\nb = 1\na = 2\n")
+    config = tmp_path / "pypfmt.toml"
+    watcher = Watcher([str(filepath)])
+    (first,) = watcher.poll()
+    assert first.formatted == "[tool.x]\na = 2\nb = 1\n"
+
+    _write(config, "sort-table-keys = false\n")
+    (result,) = watcher.poll()
+    assert result.path == str(filepath)
+    assert result.formatted == "[tool.x]\nb = 1\na = 2\n"
+
+    _write(config, "sort-table-keys = false\n")
+    assert list(watcher.poll()) == []
+
+    config.unlink()
+    (result,) = watcher.poll()
+    assert result.formatted == "[tool.x]\na = 2\nb = 1\n"
+
+
+def test_cli_watch_formats_then_stops_on_interrupt(
+    tmp_path: Path, formatted_toml: str, mocker: MockerFixture
+) -> None:
+    """--watch formats on startup and exits cleanly on Ctrl-C."""
+    filepath = tmp_path / "pyproject.toml"
+    filepath.write_text(UNFORMATTED_TOML)
+    mocker.patch("pypfmt.watch.time.sleep", side_effect=KeyboardInterrupt)
+
+    result = runner.invoke(app, ["--watch", str(filepath)])
+
+    assert result.exit_code == 0
+    assert filepath.read_text() == formatted_toml
+    assert "reformatted" in result.stderr
+
+
+def test_cli_watch_requires_paths() -> None:
+    """--watch without files is a usage error rather than reading stdin."""
+    result = runner.invoke(app, ["--watch"], input=UNFORMATTED_TOML)
+
+    assert result.exit_code == 2
+    assert "--watch requires" in result.stderr